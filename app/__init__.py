@@ -3,6 +3,8 @@ import os
 from flask import Flask
 from flask_migrate import Migrate
 from .models import db
+from .database import configure_database, register_pragmas
+from . import instrumentation
 
 def create_app():
     """Erstellt und konfiguriert die Flask-Anwendung."""
@@ -20,15 +22,50 @@ def create_app():
     os.makedirs(upload_path, exist_ok=True)
 
     app.config["SECRET_KEY"] = "dein-super-geheimer-schluessel-hier"
-    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(instance_path, 'kundenverwaltung.db')}"
+    # Optionale lokale Einstellungen (z.B. SQLITE_*-Werte) aus instance/config.py
+    app.config.from_pyfile(os.path.join(instance_path, "config.py"), silent=True)
+    # Datenbank-URI, SQLite-PRAGMAs und Pool (siehe app/database.py)
+    configure_database(app, instance_path)
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
     app.config["UPLOAD_FOLDER"] = upload_path
+    # Anzahl Kontakte, die beim Import pro Block eingefügt und committed werden
+    app.config["IMPORT_CHUNK_SIZE"] = int(os.environ.get("IMPORT_CHUNK_SIZE", 1000))
+    # Maximale Anzahl paralleler Prozesse beim Einlesen mehrerer Import-Dateien
+    app.config["IMPORT_MAX_WORKERS"] = int(
+        os.environ.get("IMPORT_MAX_WORKERS", min(4, os.cpu_count() or 1))
+    )
+    # PDF-Export: Unicode-Schrift (TTF), Kontakte pro Teil-PDF (0 = eine Datei) und Prozesse
+    app.config["PDF_FONT_PATH"] = os.environ.get("PDF_FONT_PATH")
+    app.config["PDF_FONT_BOLD_PATH"] = os.environ.get("PDF_FONT_BOLD_PATH")
+    app.config["PDF_CHUNK_SIZE"] = int(os.environ.get("PDF_CHUNK_SIZE", 0))
+    app.config["PDF_WORKERS"] = int(os.environ.get("PDF_WORKERS", 1))
+    # Export-Cache: Ordner, Obergrenze in MB (0 = aus) und Formate, die nach
+    # Massenänderungen im Hintergrund vorab erzeugt werden (z.B. "xlsx,pdf")
+    app.config["EXPORT_CACHE_DIR"] = os.environ.get(
+        "EXPORT_CACHE_DIR", app.config.get("EXPORT_CACHE_DIR", os.path.join(instance_path, "export_cache"))
+    )
+    app.config["EXPORT_CACHE_MAX_MB"] = int(
+        os.environ.get("EXPORT_CACHE_MAX_MB", app.config.get("EXPORT_CACHE_MAX_MB", 500))
+    )
+    app.config["EXPORT_PREBUILD"] = os.environ.get(
+        "EXPORT_PREBUILD", app.config.get("EXPORT_PREBUILD", "")
+    )
+    app.config["EXPORT_PREBUILD_DELAY"] = float(
+        os.environ.get("EXPORT_PREBUILD_DELAY", app.config.get("EXPORT_PREBUILD_DELAY", 5))
+    )
     
     # Datenbank und Migration initialisieren
     db.init_app(app)
     Migrate(app, db)
 
     with app.app_context():
+        register_pragmas(app, db.engine)
+        # Optionale Messung (Server-Timing, /metrics), siehe app/instrumentation.py
+        instrumentation.init_app(app, db.engine)
+
+        # Registriert die Events, die die Kontakt-Nebentabellen aktuell halten
+        from .services import kontakt_index  # noqa: F401
+
         # Blueprints (Routen-Gruppen) registrieren
         from .routes import main, vorlagen, kontakte, api, import_export
         app.register_blueprint(main.bp)
@@ -37,4 +74,7 @@ def create_app():
         app.register_blueprint(api.bp)
         app.register_blueprint(import_export.bp)
 
+        from . import cli
+        cli.register(app)
+
         return app
\ No newline at end of file
@@ -0,0 +1,18 @@
+# app/cli.py
+"""Kommandozeilen-Befehle (`flask --app run.py <befehl>`)."""
+import click
+from .models import db
+from .services import seed_service
+
+
+def register(app):
+    @app.cli.command("seed")
+    @click.option("--force", is_flag=True, help="Auch unveränderte Dateien erneut einspielen.")
+    def seed(force):
+        """Spielt geänderte Vorlagen- und Tag-Dateien in die Datenbank ein."""
+        db.create_all()
+        stats = seed_service.seed_all(seed_service.projekt_pfad(app), force=force)
+        click.echo(
+            f"{stats['angelegt']} angelegt, {stats['aktualisiert']} aktualisiert, "
+            f"{stats['unveraendert']} unverändert, {stats['fehler']} Fehler"
+        )
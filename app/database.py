@@ -0,0 +1,114 @@
+# app/database.py
+"""
+Datenbank-Profil für SQLite. Journal-Modus, Synchronisierung, Cache, mmap und
+Wartezeit bei Sperren werden bei jeder neuen Verbindung per PRAGMA gesetzt;
+die Werte kommen aus der Umgebung oder aus `instance/config.py`.
+"""
+import os
+from sqlalchemy import event
+
+# Vorgaben je Profil. "tuned" ist für den Mehrbenutzerbetrieb gedacht,
+# "default" lässt die SQLite-Standardwerte unverändert (z.B. zum Vergleich).
+PROFILES = {
+    "tuned": {
+        "SQLITE_JOURNAL_MODE": "WAL",
+        "SQLITE_SYNCHRONOUS": "NORMAL",
+        "SQLITE_MMAP_SIZE": 256 * 1024 * 1024,
+        "SQLITE_CACHE_SIZE": -64000,  # Negativ = KiB, also ca. 64 MB
+        "SQLITE_BUSY_TIMEOUT": 5000,  # Millisekunden
+        "SQLITE_TEMP_STORE": "MEMORY",
+    },
+    "default": {
+        "SQLITE_JOURNAL_MODE": None,
+        "SQLITE_SYNCHRONOUS": None,
+        "SQLITE_MMAP_SIZE": None,
+        "SQLITE_CACHE_SIZE": None,
+        "SQLITE_BUSY_TIMEOUT": None,
+        "SQLITE_TEMP_STORE": None,
+    },
+}
+
+# Reihenfolge ist wichtig: busy_timeout zuerst, damit das Umschalten des
+# Journal-Modus auf eine gesperrte Datenbank wartet
+PRAGMAS = [
+    ("busy_timeout", "SQLITE_BUSY_TIMEOUT"),
+    ("journal_mode", "SQLITE_JOURNAL_MODE"),
+    ("synchronous", "SQLITE_SYNCHRONOUS"),
+    ("cache_size", "SQLITE_CACHE_SIZE"),
+    ("mmap_size", "SQLITE_MMAP_SIZE"),
+    ("temp_store", "SQLITE_TEMP_STORE"),
+]
+
+POOL_DEFAULTS = {
+    "SQLITE_POOL_SIZE": 5,
+    "SQLITE_POOL_MAX_OVERFLOW": 10,
+    "SQLITE_POOL_TIMEOUT": 30,
+}
+
+INT_SETTINGS = {
+    "SQLITE_MMAP_SIZE", "SQLITE_CACHE_SIZE", "SQLITE_BUSY_TIMEOUT",
+    *POOL_DEFAULTS,
+}
+
+
+def _setting(app, key, default):
+    """Umgebungsvariable vor Instanz-Konfiguration vor Vorgabe; leere Werte schalten ab."""
+    value = os.environ.get(key, app.config.get(key, default))
+    if value in (None, ""):
+        return None
+    return int(value) if key in INT_SETTINGS else value
+
+
+def configure_database(app, instance_path):
+    """Setzt Datenbank-URI, PRAGMA-Werte und Pool-Optionen in `app.config`."""
+    default_uri = f"sqlite:///{os.path.join(instance_path, 'kundenverwaltung.db')}"
+    app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get(
+        "DATABASE_URL", app.config.get("SQLALCHEMY_DATABASE_URI", default_uri)
+    )
+
+    profile_name = os.environ.get("SQLITE_PROFILE", app.config.get("SQLITE_PROFILE", "tuned"))
+    if profile_name not in PROFILES:
+        raise ValueError(
+            f"Unbekanntes SQLITE_PROFILE '{profile_name}', erlaubt: {', '.join(PROFILES)}"
+        )
+    app.config["SQLITE_PROFILE"] = profile_name
+    for key, default in {**PROFILES[profile_name], **POOL_DEFAULTS}.items():
+        app.config[key] = _setting(app, key, default)
+
+    if not app.config["SQLALCHEMY_DATABASE_URI"].startswith("sqlite"):
+        return
+
+    engine_options = dict(app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {}))
+    if ":memory:" not in app.config["SQLALCHEMY_DATABASE_URI"]:
+        engine_options.setdefault("pool_size", app.config["SQLITE_POOL_SIZE"])
+        engine_options.setdefault("max_overflow", app.config["SQLITE_POOL_MAX_OVERFLOW"])
+        engine_options.setdefault("pool_timeout", app.config["SQLITE_POOL_TIMEOUT"])
+    busy_timeout = app.config["SQLITE_BUSY_TIMEOUT"]
+    if busy_timeout is not None:
+        # Wartezeit des Python-Treibers passend zum busy_timeout (in Sekunden)
+        connect_args = dict(engine_options.get("connect_args", {}))
+        connect_args.setdefault("timeout", busy_timeout / 1000)
+        engine_options["connect_args"] = connect_args
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options
+
+
+def register_pragmas(app, engine):
+    """Setzt die konfigurierten PRAGMAs bei jeder neuen SQLite-Verbindung."""
+    if engine.dialect.name != "sqlite":
+        return
+    pragmas = [
+        (pragma, app.config[key])
+        for pragma, key in PRAGMAS
+        if app.config.get(key) is not None
+    ]
+    if not pragmas:
+        return
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma, value in pragmas:
+                cursor.execute(f"PRAGMA {pragma}={value}")
+        finally:
+            cursor.close()
@@ -0,0 +1,306 @@
+# app/instrumentation.py
+"""
+Optionale Messung pro Request: Laufzeit je Endpunkt (Histogramm), Anzahl und
+Dauer der SQL-Abfragen, geladene und geänderte Zeilen sowie die Zeit für
+JSON-(De-)Serialisierung (Antworten, Request-Bodies und `Kontakt.daten`).
+Die Werte gehen als `Server-Timing`-Header an den Browser und stehen unter
+`/metrics` im Prometheus-Textformat bereit.
+Wiederholt ein Request dieselbe Abfrage sehr oft, wird ein N+1-Verdacht
+geloggt.
+
+Eingeschaltet über `INSTRUMENTATION=1` (Umgebung oder `instance/config.py`).
+Ausgeschaltet kosten `json_loads`, `json_dumps` und `zeilen_geladen` nur
+eine Abfrage von `_aktiv`.
+"""
+import json
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from flask import (
+    Response,
+    g,
+    got_request_exception,
+    has_request_context,
+    request,
+    request_finished,
+    request_started,
+)
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# Obergrenzen der Histogramm-Eimer in Sekunden
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DEFAULT_N_PLUS_ONE = 10
+HINTERGRUND = "<hintergrund>"
+
+_aktiv = False
+
+
+class Metriken:
+    """Zähler und Histogramme aller Requests, threadsicher."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.dauer = defaultdict(lambda: [0] * (len(BUCKETS) + 1))  # (endpoint, method)
+        self.dauer_summe = Counter()
+        self.requests = Counter()  # (endpoint, method, status)
+        self.queries = Counter()  # endpoint
+        self.query_zeit = Counter()
+        self.rows_loaded = Counter()
+        self.rows_affected = Counter()
+        self.json_zeit = Counter()
+        self.n_plus_one = Counter()
+
+    def request(self, endpoint, method, status, dauer, stand):
+        with self._lock:
+            eimer = self.dauer[(endpoint, method)]
+            for i, grenze in enumerate(BUCKETS):
+                if dauer <= grenze:
+                    eimer[i] += 1
+                    break
+            else:
+                eimer[-1] += 1
+            self.dauer_summe[(endpoint, method)] += dauer
+            self.requests[(endpoint, method, status)] += 1
+            self._abfragen(endpoint, stand)
+
+    def hintergrund(self, stand):
+        with self._lock:
+            self._abfragen(HINTERGRUND, stand)
+
+    def _abfragen(self, endpoint, stand):
+        self.queries[endpoint] += stand.queries
+        self.query_zeit[endpoint] += stand.query_zeit
+        self.rows_loaded[endpoint] += stand.rows_loaded
+        self.rows_affected[endpoint] += stand.rows_affected
+        self.json_zeit[endpoint] += stand.json_zeit
+
+    def warnung(self, endpoint):
+        with self._lock:
+            self.n_plus_one[endpoint] += 1
+
+    def text(self):
+        """Alle Werte im Prometheus-Textformat."""
+        zeilen = []
+
+        def kopf(name, typ, hilfe):
+            zeilen.append(f"# HELP {name} {hilfe}")
+            zeilen.append(f"# TYPE {name} {typ}")
+
+        with self._lock:
+            name = "kontakte_http_request_duration_seconds"
+            kopf(name, "histogram", "Laufzeit der Requests je Endpunkt.")
+            for (endpoint, method), eimer in sorted(self.dauer.items()):
+                labels = f'endpoint="{_esc(endpoint)}",method="{method}"'
+                kumuliert = 0
+                for grenze, anzahl in zip(BUCKETS, eimer):
+                    kumuliert += anzahl
+                    zeilen.append(f'{name}_bucket{{{labels},le="{grenze}"}} {kumuliert}')
+                kumuliert += eimer[-1]
+                zeilen.append(f'{name}_bucket{{{labels},le="+Inf"}} {kumuliert}')
+                zeilen.append(f"{name}_sum{{{labels}}} {self.dauer_summe[(endpoint, method)]:.6f}")
+                zeilen.append(f"{name}_count{{{labels}}} {kumuliert}")
+
+            name = "kontakte_http_requests_total"
+            kopf(name, "counter", "Anzahl Requests je Endpunkt und Status.")
+            for (endpoint, method, status), anzahl in sorted(self.requests.items()):
+                zeilen.append(
+                    f'{name}{{endpoint="{_esc(endpoint)}",method="{method}",status="{status}"}} {anzahl}'
+                )
+
+            for name, werte, hilfe in (
+                ("kontakte_db_queries_total", self.queries, "SQL-Abfragen je Endpunkt."),
+                ("kontakte_db_query_seconds_total", self.query_zeit, "Zeit in SQL-Abfragen."),
+                ("kontakte_db_rows_loaded_total", self.rows_loaded,
+                 "Geladene Zeilen (ORM-Objekte und Kontakt-Zeilen)."),
+                ("kontakte_db_rows_affected_total", self.rows_affected,
+                 "Von INSERT/UPDATE/DELETE betroffene Zeilen."),
+                ("kontakte_json_seconds_total", self.json_zeit, "Zeit für JSON-(De-)Serialisierung."),
+                ("kontakte_n_plus_one_warnings_total", self.n_plus_one,
+                 "Requests mit N+1-Verdacht."),
+            ):
+                kopf(name, "counter", hilfe)
+                for endpoint, wert in sorted(werte.items()):
+                    wert = f"{wert:.6f}" if isinstance(wert, float) else wert
+                    zeilen.append(f'{name}{{endpoint="{_esc(endpoint)}"}} {wert}')
+        return "\n".join(zeilen) + "\n"
+
+
+def _esc(wert):
+    return str(wert).replace("\\", "\\\\").replace('"', '\\"')
+
+
+class Stand:
+    """Messwerte eines einzelnen Requests (bzw. einer Abfrage außerhalb eines Requests)."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.query_zeit = 0.0
+        self.rows_loaded = 0
+        self.rows_affected = 0
+        self.json_zeit = 0.0
+        self.statements = Counter()
+
+
+def _stand():
+    if has_request_context():
+        return g.get("_instrumentation")
+    return None
+
+
+class TimingJSONProvider(DefaultJSONProvider):
+    """JSON-Provider, der die Zeit für dumps/loads dem laufenden Request zuschreibt."""
+
+    def dumps(self, obj, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().dumps(obj, **kwargs)
+        finally:
+            stand = _stand()
+            if stand is not None:
+                stand.json_zeit += time.perf_counter() - start
+
+    def loads(self, s, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().loads(s, **kwargs)
+        finally:
+            stand = _stand()
+            if stand is not None:
+                stand.json_zeit += time.perf_counter() - start
+
+
+def json_loads(s):
+    """`json.loads`, dessen Dauer dem laufenden Request zugeschrieben wird."""
+    if not _aktiv:
+        return json.loads(s)
+    start = time.perf_counter()
+    try:
+        return json.loads(s)
+    finally:
+        stand = _stand()
+        if stand is not None:
+            stand.json_zeit += time.perf_counter() - start
+
+
+def json_dumps(obj, **kwargs):
+    """`json.dumps`, dessen Dauer dem laufenden Request zugeschrieben wird."""
+    if not _aktiv:
+        return json.dumps(obj, **kwargs)
+    start = time.perf_counter()
+    try:
+        return json.dumps(obj, **kwargs)
+    finally:
+        stand = _stand()
+        if stand is not None:
+            stand.json_zeit += time.perf_counter() - start
+
+
+def zeilen_geladen(anzahl):
+    """Zählt Zeilen, die ohne ORM-Objekte (Core-Abfragen) geladen wurden."""
+    if _aktiv:
+        stand = _stand()
+        if stand is not None:
+            stand.rows_loaded += anzahl
+
+
+def _geladen(session, instance):
+    stand = _stand()
+    if stand is not None:
+        stand.rows_loaded += 1
+
+
+def _setting(app, key, default):
+    return os.environ.get(key, app.config.get(key, default))
+
+
+def is_enabled(app):
+    return str(_setting(app, "INSTRUMENTATION", "")).lower() in ("1", "true", "yes", "on")
+
+
+def init_app(app, engine):
+    """Schaltet die Messung ein, wenn `INSTRUMENTATION` gesetzt ist."""
+    global _aktiv
+    if not is_enabled(app):
+        return None
+    _aktiv = True
+    schwelle = int(_setting(app, "INSTRUMENTATION_N_PLUS_ONE", DEFAULT_N_PLUS_ONE))
+    metriken = Metriken()
+    app.extensions["instrumentation"] = metriken
+    app.json = TimingJSONProvider(app)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _vor_abfrage(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("_instrumentation_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _nach_abfrage(conn, cursor, statement, parameters, context, executemany):
+        dauer = time.perf_counter() - conn.info["_instrumentation_start"].pop()
+        stand = _stand()
+        if stand is None:
+            stand = Stand()
+            eigener = True
+        else:
+            eigener = False
+        stand.queries += 1
+        stand.query_zeit += dauer
+        if cursor.rowcount and cursor.rowcount > 0 and not statement.lstrip().upper().startswith("SELECT"):
+            stand.rows_affected += cursor.rowcount
+        stand.statements[statement] += 1
+        if eigener:
+            metriken.hintergrund(stand)
+
+    if not event.contains(Session, "loaded_as_persistent", _geladen):
+        event.listen(Session, "loaded_as_persistent", _geladen)
+
+    def _start(sender, **extra):
+        g._instrumentation = Stand()
+
+    def _fertig(sender, response, **extra):
+        stand = g.pop("_instrumentation", None)
+        if stand is None:
+            return
+        dauer = time.perf_counter() - stand.start
+        endpoint = request.endpoint or "<unbekannt>"
+        metriken.request(endpoint, request.method, response.status_code, dauer, stand)
+        response.headers["Server-Timing"] = ", ".join([
+            f'db;dur={stand.query_zeit * 1000:.1f};desc="{stand.queries} Abfragen"',
+            f"json;dur={stand.json_zeit * 1000:.1f}",
+            f"app;dur={dauer * 1000:.1f}",
+        ])
+        _n_plus_one_pruefen(app, metriken, endpoint, stand, schwelle)
+
+    def _fehler(sender, exception, **extra):
+        stand = g.pop("_instrumentation", None)
+        if stand is not None:
+            dauer = time.perf_counter() - stand.start
+            metriken.request(request.endpoint or "<unbekannt>", request.method, 500, dauer, stand)
+
+    # Flask hält nur schwache Referenzen auf die Empfänger
+    app.extensions["instrumentation_handler"] = (_start, _fertig, _fehler)
+    request_started.connect(_start, app)
+    request_finished.connect(_fertig, app)
+    got_request_exception.connect(_fehler, app)
+
+    @app.route("/metrics")
+    def metrics():
+        return Response(metriken.text(), mimetype="text/plain; version=0.0.4")
+
+    return metriken
+
+
+def _n_plus_one_pruefen(app, metriken, endpoint, stand, schwelle):
+    """Loggt Abfragen, die ein Request mindestens `schwelle`-mal ausgeführt hat."""
+    if not schwelle or not stand.statements:
+        return
+    statement, anzahl = stand.statements.most_common(1)[0]
+    if anzahl < schwelle:
+        return
+    metriken.warnung(endpoint)
+    app.logger.warning(
+        f"N+1-Verdacht in {endpoint}: dieselbe Abfrage {anzahl}x ausgeführt: "
+        f"{' '.join(statement.split())[:200]}"
+    )
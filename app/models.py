@@ -1,6 +1,7 @@
 # app/models.py
 from flask_sqlalchemy import SQLAlchemy
-import json
+import uuid
+from . import instrumentation
 
 db = SQLAlchemy()
 
@@ -11,9 +12,24 @@ class Vorlage(db.Model):
     name = db.Column(db.String(100), nullable=False, unique=True)
     # NEU: Spalte, um Standard-Vorlagen zu kennzeichnen
     is_standard = db.Column(db.Boolean, default=False, nullable=False)
+    # Stempel, der sich bei jeder Änderung an Gruppen/Eigenschaften ändert (Schema-Cache)
+    schema_version = db.Column(
+        db.String(32), nullable=False, default=lambda: uuid.uuid4().hex
+    )
+
+    # Wird bei jedem Schreibzugriff auf einen Kontakt der Vorlage erhöht (Export-Cache)
+    daten_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
+    def touch_schema(self):
+        """Markiert das Schema als geändert, damit Caches es neu aufbauen."""
+        self.schema_version = uuid.uuid4().hex
 
     gruppen = db.relationship(
-        "Gruppe", backref="vorlage", lazy=True, cascade="all, delete-orphan"
+        "Gruppe",
+        backref="vorlage",
+        lazy=True,
+        cascade="all, delete-orphan",
+        order_by="(Gruppe.position, Gruppe.id)",
     )
     kontakte = db.relationship(
         "Kontakt", backref="vorlage", lazy=True, cascade="all, delete-orphan"
@@ -32,8 +48,14 @@ class Gruppe(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     vorlage_id = db.Column(db.Integer, db.ForeignKey("vorlage.id"), nullable=False)
+    # Reihenfolge im Editor; IDs bleiben beim Speichern erhalten
+    position = db.Column(db.Integer, nullable=False, default=0, server_default="0")
     eigenschaften = db.relationship(
-        "Eigenschaft", backref="gruppe", lazy=True, cascade="all, delete-orphan"
+        "Eigenschaft",
+        backref="gruppe",
+        lazy=True,
+        cascade="all, delete-orphan",
+        order_by="(Eigenschaft.position, Eigenschaft.id)",
     )
 
 
@@ -44,16 +66,106 @@ class Eigenschaft(db.Model):
     datentyp = db.Column(db.String(50), nullable=False)
     optionen = db.Column(db.Text)
     gruppe_id = db.Column(db.Integer, db.ForeignKey("gruppe.id"), nullable=False)
+    position = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
+
+class TagKategorie(db.Model):
+    __tablename__ = "tag_kategorie"
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False, unique=True)
+    position = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    tags = db.relationship(
+        "Tag",
+        backref="kategorie",
+        lazy=True,
+        cascade="all, delete-orphan",
+        order_by="(Tag.position, Tag.id)",
+    )
+
+
+class Tag(db.Model):
+    __tablename__ = "tag"
+    id = db.Column(db.Integer, primary_key=True)
+    # Tag-Namen sind über alle Kategorien eindeutig (das Frontend sucht per Name)
+    name = db.Column(db.String(100), nullable=False, unique=True)
+    color = db.Column(db.String(20), nullable=False, default="#e9ecef")
+    kategorie_id = db.Column(
+        db.Integer, db.ForeignKey("tag_kategorie.id"), nullable=False
+    )
+    position = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
+
+# Zuordnung Kontakt <-> Tag. Der Primärschlüssel beantwortet "Tags eines
+# Kontakts", der zweite Index "Kontakte mit Tag X".
+kontakt_tag = db.Table(
+    "kontakt_tag",
+    db.Column(
+        "kontakt_id",
+        db.Integer,
+        db.ForeignKey("kontakt.id", ondelete="CASCADE"),
+        primary_key=True,
+    ),
+    db.Column(
+        "tag_id",
+        db.Integer,
+        db.ForeignKey("tag.id", ondelete="CASCADE"),
+        primary_key=True,
+    ),
+    db.Index("ix_kontakt_tag_tag_id_kontakt_id", "tag_id", "kontakt_id"),
+)
+
+
+class SeedDatei(db.Model):
+    """Inhalts-Hash jeder eingespielten Vorlagen-Datei (siehe `services/seed_service.py`)."""
+
+    __tablename__ = "seed_datei"
+    pfad = db.Column(db.String(255), primary_key=True)
+    hash = db.Column(db.String(64), nullable=False)
 
 
 class Kontakt(db.Model):
     __tablename__ = "kontakt"
     id = db.Column(db.Integer, primary_key=True)
-    vorlage_id = db.Column(db.Integer, db.ForeignKey("vorlage.id"), nullable=False)
+    vorlage_id = db.Column(
+        db.Integer, db.ForeignKey("vorlage.id"), nullable=False, index=True
+    )
     daten = db.Column(db.Text, nullable=False, default="{}")
+    # Wird bei jeder Änderung erhöht (optimistische Sperre)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+
+    # Abgeleitet aus Name / Vorname + Nachname / Firmenname (siehe kontakt_index):
+    # Anzeigename und normalisierter Sortierschlüssel für Auswahllisten
+    display_name = db.Column(db.String(255), nullable=False, default="", server_default="")
+    sort_name = db.Column(db.String(255), nullable=False, default="", server_default="")
+
+    __mapper_args__ = {"version_id_col": version}
+    __table_args__ = (
+        db.Index("ix_kontakt_vorlage_id_sort_name", "vorlage_id", "sort_name", "id"),
+    )
 
     def get_data(self):
-        return json.loads(self.daten or "{}")
+        return instrumentation.json_loads(self.daten or "{}")
 
     def set_data(self, data_dict):
-        self.daten = json.dumps(data_dict)
+        # Ohne \u-Escapes, damit JSON-Pfade wie $."Straße" in SQLite greifen
+        self.daten = instrumentation.json_dumps(data_dict, ensure_ascii=False)
+
+
+class KontaktWert(db.Model):
+    """Abfragbare Kopie der einzelnen Werte aus `Kontakt.daten` (ein Eintrag pro Feld).
+
+    Wird von `services/kontakt_index.py` gepflegt und nie direkt beschrieben.
+    """
+
+    __tablename__ = "kontakt_wert"
+    kontakt_id = db.Column(
+        db.Integer,
+        db.ForeignKey("kontakt.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    name = db.Column(db.String(100), primary_key=True)
+    wert = db.Column(db.String(255), nullable=False)
+
+    __table_args__ = (
+        db.Index("ix_kontakt_wert_name_wert", "name", "wert", "kontakt_id"),
+    )
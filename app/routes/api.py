@@ -1,27 +1,40 @@
 # app/routes/api.py
 import json
-import os
-from flask import Blueprint, jsonify, send_from_directory, request, current_app
-from ..models import db, Kontakt
+from flask import Blueprint, jsonify, request, current_app, url_for
+from ..models import db, Kontakt, Vorlage
+from ..services import (
+    kontakt_service, kontakt_index, duplicate_service, export_cache, jobs, reference_data,
+    tag_service,
+)
 
 bp = Blueprint("api", __name__, url_prefix="/api")
 
 
+def _ist_id(wert):
+    """Kontakt-IDs und Versionen sind Ganzzahlen; JSON-true/false zählen nicht."""
+    return isinstance(wert, int) and not isinstance(wert, bool)
+
+
+def _referenz_antwort(datei):
+    """Liefert eine Referenzdatei aus dem Speicher; bei passendem ETag mit 304."""
+    body, etag, last_modified = datei.get()
+    response = current_app.response_class(body, mimetype="application/json")
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    # Der Browser fragt jedes Mal nach, bekommt aber meist nur ein 304
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
 @bp.route("/attribute-suggestions")
 def attribute_suggestions():
-    return send_from_directory("../data", "attribute_suggestions.json")
+    return _referenz_antwort(reference_data.attribute_suggestions)
 
 
 @bp.route("/selection-options")
 def selection_options():
-    # Stellt sicher, dass die Datei existiert, und erstellt sie ggf.
-    options_path = os.path.join(
-        current_app.root_path, "..", "data", "selection_options.json"
-    )
-    if not os.path.exists(options_path):
-        with open(options_path, "w", encoding="utf-8") as f:
-            json.dump({"options": []}, f)
-    return send_from_directory("../data", "selection_options.json")
+    return _referenz_antwort(reference_data.selection_options)
 
 
 @bp.route("/selection-options", methods=["POST"])
@@ -32,11 +45,7 @@ def save_selection_options():
         return jsonify({"success": False, "error": "Ungültige Daten"}), 400
 
     try:
-        options_path = os.path.join(
-            current_app.root_path, "..", "data", "selection_options.json"
-        )
-        with open(options_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        reference_data.selection_options.schreiben(data)
         return jsonify(
             {"success": True, "message": "Auswahllisten erfolgreich gespeichert."}
         )
@@ -44,38 +53,142 @@ def save_selection_options():
         return jsonify({"success": False, "error": str(e)}), 500
 
 
+@bp.route("/kontakte")
+def list_kontakte():
+    """Liefert Kontakte einer Vorlage seitenweise (Cursor), gefiltert und sortiert."""
+    vorlage_id = request.args.get("vorlage_id", type=int)
+    if not vorlage_id:
+        return jsonify({"success": False, "error": "Fehlende vorlage_id"}), 400
+
+    try:
+        filters = json.loads(request.args.get("filters") or "{}")
+    except ValueError:
+        return jsonify({"success": False, "error": "Ungültige Filter"}), 400
+    if not isinstance(filters, dict):
+        return jsonify({"success": False, "error": "Ungültige Filter"}), 400
+
+    try:
+        page = kontakt_service.list_kontakte(
+            vorlage_id,
+            filters=filters,
+            sort=request.args.get("sort") or None,
+            order=request.args.get("order", "asc"),
+            fields=request.args.getlist("field"),
+            cursor=request.args.get("cursor") or None,
+            limit=request.args.get("limit", kontakt_service.DEFAULT_PAGE_SIZE, type=int),
+            q=request.args.get("q") or None,
+            tags=request.args.getlist("tag"),
+        )
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    return jsonify(page)
+
+
+@bp.route("/kontakte/search")
+def search_kontakte():
+    """Volltextsuche über alle Kontakte (optional nur einer Vorlage), nach Relevanz sortiert."""
+    kontakte = kontakt_service.search_kontakte(
+        request.args.get("q", ""),
+        vorlage_id=request.args.get("vorlage_id", type=int),
+        limit=request.args.get("limit", kontakt_service.DEFAULT_SEARCH_LIMIT, type=int),
+    )
+    return jsonify({"kontakte": kontakte})
+
+
+@bp.route("/kontakte/duplikate", methods=["POST"])
+def find_duplicates():
+    """Startet die Dubletten-Suche für eine Vorlage als Hintergrund-Job."""
+    data = request.get_json(silent=True) or {}
+    vorlage = db.session.get(Vorlage, data.get("vorlage_id") or 0)
+    if not vorlage:
+        return jsonify({"success": False, "error": "Vorlage nicht gefunden."}), 404
+    try:
+        threshold = float(data.get("threshold") or duplicate_service.DEFAULT_THRESHOLD)
+    except (TypeError, ValueError):
+        threshold = None
+    if threshold is None or not 0 < threshold <= 1:
+        return jsonify({"success": False, "error": "Schwellwert muss zwischen 0 und 1 liegen."}), 400
+
+    job = jobs.start("duplikate", duplicate_service.flag_duplicates, vorlage.id, threshold)
+    return jsonify({
+        "success": True,
+        "job_id": job.id,
+        "status_url": url_for("api.job_status", job_id=job.id),
+    })
+
+
+@bp.route("/jobs/<string:job_id>")
+def job_status(job_id):
+    job = jobs.get(job_id)
+    if not job:
+        return jsonify({"success": False, "error": "Job nicht gefunden."}), 404
+    return jsonify(job.to_dict())
+
+
 @bp.route("/kontakte-by-vorlage/<int:vorlage_id>")
 def get_kontakte_by_vorlage(vorlage_id):
-    kontakte = Kontakt.query.filter_by(vorlage_id=vorlage_id).all()
-    result = []
-    for k in kontakte:
-        data = k.get_data()
-        display_name = (
-            data.get("Name")
-            or f"{data.get('Vorname', '')} {data.get('Nachname', '')}".strip()
-            or data.get("Firmenname", f"Kontakt ID: {k.id}")
-        )
-        result.append({"id": k.id, "display_name": display_name})
-    return jsonify(result)
+    return jsonify(kontakt_service.namen_liste(vorlage_id))
+
+
+@bp.route("/kontakte/suggest")
+def suggest_kontakte():
+    """Präfixsuche über die Anzeigenamen einer Vorlage (für Auswahllisten)."""
+    vorlage_id = request.args.get("vorlage_id", type=int)
+    if not vorlage_id:
+        return jsonify({"success": False, "error": "Fehlende vorlage_id"}), 400
+    kontakte = kontakt_service.suggest(
+        vorlage_id,
+        request.args.get("q", ""),
+        limit=request.args.get("limit", kontakt_service.DEFAULT_SEARCH_LIMIT, type=int),
+    )
+    return jsonify({"kontakte": kontakte})
 
 
 @bp.route("/kontakt/<int:kontakt_id>/update", methods=["POST"])
 def update_kontakt_field(kontakt_id):
-    kontakt = db.session.get(Kontakt, kontakt_id)
-    if not kontakt:
-        return jsonify({"success": False, "error": "Kontakt nicht gefunden"}), 404
-
     data = request.get_json()
     field_name = data.get("field")
     new_value = data.get("value")
-    if field_name is None:
+    if not isinstance(field_name, str) or not field_name:
         return jsonify({"success": False, "error": "Fehlende Daten"}), 400
 
-    kontakt_daten = kontakt.get_data()
-    kontakt_daten[field_name] = new_value
-    kontakt.set_data(kontakt_daten)
-    db.session.commit()
-    return jsonify({"success": True, "message": "Feld aktualisiert"})
+    try:
+        versions = kontakt_service.update_fields(
+            [{"id": kontakt_id, "field": field_name, "value": new_value}]
+        )
+    except kontakt_service.UpdateConflict:
+        return jsonify({"success": False, "error": "Kontakt nicht gefunden"}), 404
+    return jsonify(
+        {"success": True, "message": "Feld aktualisiert", "version": versions[kontakt_id]}
+    )
+
+
+@bp.route("/kontakte/felder", methods=["PATCH"])
+def update_kontakt_felder():
+    """Übernimmt viele Feld-Änderungen [{id, field, value, version}] in einer Transaktion."""
+    data = request.get_json(silent=True) or {}
+    operations = data.get("operations")
+    if not isinstance(operations, list) or not operations:
+        return jsonify({"success": False, "error": "Keine Änderungen angegeben."}), 400
+    for op in operations:
+        # id (und ggf. version) als Ganzzahl, Feldname als Text: alles andere endete als 500
+        if (
+            not isinstance(op, dict)
+            or not _ist_id(op.get("id"))
+            or not isinstance(op.get("field"), str)
+            or not op["field"]
+            or (op.get("version") is not None and not _ist_id(op["version"]))
+        ):
+            return jsonify({"success": False, "error": "Ungültige Änderung."}), 400
+
+    try:
+        versions = kontakt_service.update_fields(operations)
+    except kontakt_service.UpdateConflict as e:
+        return (
+            jsonify({"success": False, "error": str(e), "conflicts": e.conflicts}),
+            409,
+        )
+    return jsonify({"success": True, "versions": versions})
 
 
 @bp.route("/kontakt/neu", methods=["POST"])
@@ -104,13 +217,113 @@ def bulk_delete_kontakte():
         return jsonify({"success": False, "error": "Keine IDs angegeben."}), 400
 
     try:
+        vorlage_ids = kontakt_service.vorlagen_von(kontakt_ids)
         Kontakt.query.filter(Kontakt.id.in_(kontakt_ids)).delete(
             synchronize_session=False
         )
+        kontakt_index.remove(db.session.connection(), kontakt_ids, vorlage_ids)
         db.session.commit()
+        for vorlage_id in vorlage_ids:
+            export_cache.vormerken(vorlage_id)
         return jsonify(
             {"success": True, "message": f"{len(kontakt_ids)} Kontakte gelöscht."}
         )
     except Exception as e:
         db.session.rollback()
         return jsonify({"success": False, "error": str(e)}), 500
+
+
+@bp.route("/kontakte/bulk-update", methods=["POST"])
+def bulk_update_kontakte():
+    """
+    Setzt Feldwerte bei vielen Kontakten in einer Transaktion:
+    {"set": {feld: wert}, "ids": [...]} oder
+    {"set": {...}, "filter": {"vorlage_id", "filters", "q", "tags"}}.
+    """
+    data = request.get_json(silent=True) or {}
+    zuweisungen = data.get("set")
+    if not isinstance(zuweisungen, dict) or not zuweisungen or not all(zuweisungen):
+        return jsonify({"success": False, "error": "Keine Feldwerte angegeben."}), 400
+
+    kontakt_ids = data.get("ids")
+    auswahl = data.get("filter")
+    if (kontakt_ids is None) == (auswahl is None):
+        return jsonify({"success": False, "error": "Entweder IDs oder einen Filter angeben."}), 400
+    if kontakt_ids is not None:
+        if not isinstance(kontakt_ids, list) or not all(_ist_id(i) for i in kontakt_ids):
+            return jsonify({"success": False, "error": "Ungültige IDs."}), 400
+        auswahl = {}
+    elif not isinstance(auswahl, dict) or not _ist_id(auswahl.get("vorlage_id")):
+        return jsonify({"success": False, "error": "Filter braucht eine vorlage_id."}), 400
+    elif (
+        not isinstance(auswahl.get("filters") or {}, dict)
+        or not isinstance(auswahl.get("q") or "", str)
+        or not isinstance(auswahl.get("tags") or [], list)
+        or not all(isinstance(t, str) for t in auswahl.get("tags") or [])
+    ):
+        return jsonify({"success": False, "error": "Ungültige Filter"}), 400
+
+    try:
+        anzahl = kontakt_service.bulk_update(
+            zuweisungen,
+            ids=kontakt_ids,
+            vorlage_id=auswahl.get("vorlage_id"),
+            filters=auswahl.get("filters"),
+            q=auswahl.get("q") or None,
+            tags=auswahl.get("tags"),
+        )
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"success": False, "error": str(e)}), 500
+    if anzahl:
+        for vorlage_id in kontakt_service.vorlagen_von(kontakt_ids, auswahl.get("vorlage_id")):
+            export_cache.vormerken(vorlage_id)
+    return jsonify({"success": True, "updated": anzahl})
+
+
+@bp.route("/tags")
+def tags():
+    """Alle Tag-Kategorien mit ihren Tags und Farben."""
+    return jsonify(tag_service.tags_payload())
+
+
+def _tag_anfrage():
+    """Liest {"ids": [...], "tags": [...]} aus dem Request (oder None bei ungültigen Daten)."""
+    data = request.get_json(silent=True) or {}
+    kontakt_ids = data.get("ids")
+    tag_namen = data.get("tags")
+    if not isinstance(kontakt_ids, list) or not isinstance(tag_namen, list):
+        return None
+    if not kontakt_ids or not tag_namen:
+        return None
+    if not all(_ist_id(i) for i in kontakt_ids):
+        return None
+    if not all(isinstance(n, str) for n in tag_namen):
+        return None
+    return kontakt_ids, tag_namen
+
+
+@bp.route("/kontakte/bulk-tag", methods=["POST"])
+def bulk_tag_kontakte():
+    """Ordnet vielen Kontakten auf einmal Tags zu."""
+    anfrage = _tag_anfrage()
+    if anfrage is None:
+        return jsonify({"success": False, "error": "IDs und Tags angeben."}), 400
+    try:
+        neu = tag_service.tag_kontakte(*anfrage)
+    except tag_service.UnbekannteTags as e:
+        return jsonify({"success": False, "error": str(e), "tags": e.namen}), 400
+    return jsonify({"success": True, "added": neu})
+
+
+@bp.route("/kontakte/bulk-untag", methods=["POST"])
+def bulk_untag_kontakte():
+    """Entfernt Tags von vielen Kontakten auf einmal."""
+    anfrage = _tag_anfrage()
+    if anfrage is None:
+        return jsonify({"success": False, "error": "IDs und Tags angeben."}), 400
+    try:
+        entfernt = tag_service.untag_kontakte(*anfrage)
+    except tag_service.UnbekannteTags as e:
+        return jsonify({"success": False, "error": str(e), "tags": e.namen}), 400
+    return jsonify({"success": True, "removed": entfernt})
@@ -1,13 +1,35 @@
 # app/routes/import_export.py
 import os
 from datetime import datetime
-from flask import Blueprint, request, jsonify, flash, url_for, Response
-from ..models import db, Vorlage, Kontakt
-from ..services import importer_service, exporter_service
+from flask import (
+    Blueprint, request, jsonify, url_for, Response, current_app, send_file, stream_with_context
+)
+from ..models import db, Vorlage
+from ..services import (
+    importer_service, exporter_service, import_session, bulk_writer, jobs, duplicate_service,
+    schema_registry, export_cache,
+)
+from ..services.exporters import pdf_exporter
+from ..services.importers import xlsx_importer
 
 bp = Blueprint('import_export', __name__)
 ALLOWED_EXTENSIONS = {"csv", "msg", "oft", "txt", "vcf", "xlsx"}
 
+
+def map_import_row(row, mappings, default_values):
+    """
+    Überträgt eine Import-Zeile auf die Felder der Vorlage.
+    `mappings` ordnet jedem Vorlagen-Feld die Spalte der Import-Datei zu.
+    """
+    kontakt_daten = {}
+    for vorlage_prop, import_header in mappings.items():
+        value = row.get(import_header) if import_header else None
+        if value in (None, "") and default_values.get(vorlage_prop) not in (None, ""):
+            value = default_values[vorlage_prop]
+        if value is not None:
+            kontakt_daten[vorlage_prop] = value
+    return kontakt_daten
+
 @bp.route("/import/upload", methods=["POST"])
 def upload_import_file():
     if 'files' not in request.files:
@@ -16,90 +38,202 @@ def upload_import_file():
     files = request.files.getlist('files')
     if not files or files[0].filename == '':
         return jsonify({"error": "Keine Dateien ausgewählt."}), 400
-    
-    all_records = []
-    
+
     for file in files:
         file_ext = os.path.splitext(file.filename)[1].lower().replace('.', '')
         if file_ext not in ALLOWED_EXTENSIONS:
             return jsonify({"error": f"Dateityp '{file_ext}' nicht erlaubt."}), 400
 
-        try:
-            # Wichtig: Dateiobjekt zurück zum Anfang setzen, falls es mehrfach gelesen wird
-            file.seek(0)
-            data = importer_service.import_file(file)
-            if isinstance(data, dict) and "error" in data:
-                return jsonify(data), 400
-            all_records.extend(data)
-        except Exception as e:
-            return jsonify({"error": f"Fehler beim Verarbeiten der Datei '{file.filename}': {str(e)}"}), 500
-
-    if not all_records:
-        return jsonify({"error": "Keine Daten in den Dateien gefunden."}), 400
-
-    # Sammle alle eindeutigen Spaltennamen aus allen Dateien
-    all_headers = set()
-    for record in all_records:
-        all_headers.update(record.keys())
-        
-    preview_data = all_records[:5]
-    return jsonify({"headers": list(all_headers), "preview_data": preview_data, "original_data": all_records})
+    # Tabellenblätter von Excel-Dateien, damit der Benutzer eines wählen kann
+    sheet = request.form.get('sheet') or None
+    sheets = {}
+    for file in files:
+        if file.filename.lower().endswith('.xlsx'):
+            try:
+                sheets[file.filename] = xlsx_importer.list_sheets(file.stream)
+            except Exception:
+                pass  # Der Fehler wird beim Einlesen für diese Datei gemeldet
+            file.stream.seek(0)
+
+    # Die Zeilen landen direkt in der Import-Sitzung auf dem Server, an den
+    # Browser gehen nur die Spalten und eine kurze Vorschau zurück.
+    errors = []
+    with import_session.SessionWriter() as writer:
+        for filename, records, error in importer_service.import_files(files, sheet=sheet):
+            if error:
+                errors.append({"file": filename, "error": error})
+                continue
+            try:
+                writer.write_many(records)
+            except Exception as e:
+                # Gestreamte Datei bricht mittendrin ab: bisherige Zeilen bleiben erhalten
+                errors.append({"file": filename, "error": str(e)})
+
+    if writer.count == 0:
+        import_session.delete_session(writer.session_id)
+        message = "Keine Daten in den Dateien gefunden."
+        if errors:
+            message = "; ".join(f"{e['file']}: {e['error']}" for e in errors)
+        return jsonify({"error": message, "errors": errors}), 400
+
+    return jsonify({**writer.meta(), "errors": errors, "sheets": sheets, "sheet": sheet})
+
+def iter_mapped_rows(session_id, mappings, default_values, batch_size):
+    """Liest die Zeilen einer Import-Sitzung und überträgt sie auf die Vorlagen-Felder."""
+    for batch in import_session.iter_batches(session_id, batch_size):
+        for row in batch:
+            kontakt_daten = map_import_row(row, mappings, default_values)
+            if kontakt_daten:
+                yield kontakt_daten
+
+@bp.route("/import/duplicates", methods=["POST"])
+def check_import_duplicates():
+    """Prüft die zugeordneten Import-Zeilen auf Dubletten, ohne etwas zu speichern."""
+    data = request.get_json()
+    vorlage_id = data.get('vorlage_id')
+    mappings = data.get('mappings')
+    session_id = data.get('session_id')
+    if not all([vorlage_id, mappings, session_id]):
+        return jsonify({"success": False, "error": "Fehlende Daten für die Prüfung."}), 400
+
+    try:
+        import_session.get_meta(session_id)
+    except import_session.ImportSessionNotFound as e:
+        return jsonify({"success": False, "error": str(e)}), 404
+
+    chunk_size = current_app.config.get("IMPORT_CHUNK_SIZE", bulk_writer.DEFAULT_CHUNK_SIZE)
+    result = duplicate_service.check_import(
+        vorlage_id,
+        iter_mapped_rows(session_id, mappings, data.get('default_values') or {}, chunk_size),
+    )
+    return jsonify({"success": True, **result})
 
 @bp.route("/import/finalize", methods=["POST"])
 def finalize_import():
     data = request.get_json()
     vorlage_id = data.get('vorlage_id')
     mappings = data.get('mappings')
-    original_data = data.get('original_data')
+    default_values = data.get('default_values') or {}
+    session_id = data.get('session_id')
+    # Umgang mit gefundenen Dubletten: insert, skip, update oder merge
+    duplicate_mode = data.get('duplicate_mode') or "insert"
+    # Abgleich über Schlüssel-Felder (z.B. ["E-Mail"]): Treffer werden aktualisiert
+    key_fields = data.get('key_fields') or []
 
-    if not all([vorlage_id, mappings, original_data]):
+    if not all([vorlage_id, mappings, session_id]):
         return jsonify({"success": False, "error": "Fehlende Daten für den Import."}), 400
+    if duplicate_mode not in duplicate_service.IMPORT_MODES:
+        return jsonify({"success": False, "error": "Ungültiger Dubletten-Modus."}), 400
     
     vorlage = db.session.get(Vorlage, vorlage_id)
     if not vorlage: 
         return jsonify({"success": False, "error": "Vorlage nicht gefunden."}), 404
 
-    count = 0
-    for row in original_data:
-        new_kontakt_data = {
-            vorlage_prop: row.get(import_header) 
-            for import_header, vorlage_prop in mappings.items() 
-            if vorlage_prop
-        }
-        if new_kontakt_data:
-            kontakt = Kontakt(vorlage_id=vorlage_id)
-            kontakt.set_data(new_kontakt_data)
-            db.session.add(kontakt)
-            count += 1
-            
-    db.session.commit()
-    flash(f"{count} Kontakte wurden erfolgreich importiert.", "success")
-    return jsonify({"success": True, "redirect_url": url_for('kontakte.auflisten')})
+    if key_fields and duplicate_mode not in bulk_writer.UPSERT_MODES:
+        return jsonify({
+            "success": False,
+            "error": "Mit Schlüssel-Feldern bitte Zusammenführen, Aktualisieren oder Überspringen wählen.",
+        }), 400
+
+    vorlage_felder = {e.name for g in vorlage.gruppen for e in g.eigenschaften}
+    unbekannt = [feld for feld in key_fields if feld not in vorlage_felder]
+    if unbekannt:
+        return jsonify({"success": False, "error": f"Unbekannte Schlüssel-Felder: {', '.join(unbekannt)}"}), 400
+
+    try:
+        meta = import_session.get_meta(session_id)
+    except import_session.ImportSessionNotFound as e:
+        return jsonify({"success": False, "error": str(e)}), 404
+
+    chunk_size = current_app.config.get("IMPORT_CHUNK_SIZE", bulk_writer.DEFAULT_CHUNK_SIZE)
+    job = jobs.start("import", _run_import, vorlage.id, session_id, mappings,
+                     default_values, chunk_size, meta["total"], duplicate_mode, key_fields)
+    return jsonify({
+        "success": True,
+        "job_id": job.id,
+        "status_url": url_for('import_export.import_status', job_id=job.id),
+        "redirect_url": url_for('kontakte.auflisten'),
+    })
+
+def _run_import(job, vorlage_id, session_id, mappings, default_values, chunk_size, total,
+                duplicate_mode="insert", key_fields=None):
+    """Hintergrund-Job: schreibt die Zeilen einer Import-Sitzung blockweise in die DB."""
+    job.progress(0, total)
+    rows = iter_mapped_rows(session_id, mappings, default_values, chunk_size)
+    try:
+        if key_fields:
+            return bulk_writer.upsert_kontakte(
+                vorlage_id, rows, key_fields, duplicate_mode, chunk_size, job=job
+            )
+        return duplicate_service.import_kontakte(
+            vorlage_id, rows, duplicate_mode, chunk_size, job=job
+        )
+    finally:
+        import_session.delete_session(session_id)
+        export_cache.vormerken(vorlage_id)
+
+@bp.route("/import/status/<string:job_id>")
+def import_status(job_id):
+    job = jobs.get(job_id)
+    if not job:
+        return jsonify({"success": False, "error": "Import-Job nicht gefunden."}), 404
+    return jsonify(job.to_dict())
 
 @bp.route("/export/<int:vorlage_id>/<string:file_format>")
 def export_data(vorlage_id, file_format):
-    vorlage_model = db.session.get(Vorlage, vorlage_id)
-    if not vorlage_model:
+    schema = schema_registry.get(vorlage_id)
+    if not schema:
         return "Vorlage nicht gefunden", 404
-    
-    kontakte_data = [{"id": k.id, "daten": k.get_data()} for k in vorlage_model.kontakte]
-    vorlage_struktur = {
-        "name": vorlage_model.name,
-        "gruppen": [
-            {"name": g.name, "eigenschaften": [{"name": e.name} for e in g.eigenschaften]} 
-            for g in vorlage_model.gruppen
-        ]
-    }
-    
-    content, mimetype = exporter_service.export_data(file_format, kontakte_data, vorlage_struktur)
+    vorlage_struktur = schema.export_struktur
+
+    pdf_options = None
+    if file_format == 'pdf':
+        layout = request.args.get('layout', 'details')
+        if layout not in pdf_exporter.LAYOUTS:
+            return "Ungültiges PDF-Layout", 400
+        # 0 oder keine Angabe: eine einzige PDF-Datei
+        chunk_size = request.args.get('chunk_size', type=int)
+        if chunk_size is not None and chunk_size < 0:
+            return "Ungültige chunk_size", 400
+        pdf_options = export_cache.pdf_optionen(layout, chunk_size)
+
+    datum = datetime.now().strftime('%Y-%m-%d')
+
+    if export_cache.ist_aktiv() and file_format in export_cache.FORMATE:
+        eintrag = export_cache.artefakt(vorlage_id, file_format, pdf_options)
+        # Der Client hat diesen Stand schon: nichts erzeugen
+        if eintrag and request.if_none_match.contains(eintrag.etag):
+            return Response(status=304, headers={"ETag": f'"{eintrag.etag}"'})
+        treffer = export_cache.holen(eintrag) if eintrag else None
+        if not treffer:
+            return "Ungültiges Export-Format", 400
+        pfad, mimetype = treffer
+        extension = 'zip' if mimetype == 'application/zip' else file_format
+        return send_file(
+            pfad, mimetype=mimetype, as_attachment=True,
+            download_name=f"{schema.name}_export_{datum}.{extension}",
+            etag=eintrag.etag, conditional=True,
+        )
+
+    content, mimetype = exporter_service.export_data(
+        file_format, export_cache.iter_kontakte(vorlage_id), vorlage_struktur, pdf_options
+    )
     
     if not content:
         return "Ungültiges Export-Format", 400
         
-    filename = f"{vorlage_model.name}_export_{datetime.now().strftime('%Y-%m-%d')}.{file_format}"
+    extension = 'zip' if mimetype == 'application/zip' else file_format
+    filename = f"{schema.name}_export_{datum}.{extension}"
+
+    if hasattr(content, "read"):
+        return send_file(content, mimetype=mimetype, as_attachment=True, download_name=filename)
+
+    if not isinstance(content, (bytes, str)):
+        # Generator: die Datei wird während des Lesens aus der DB gestreamt
+        content = stream_with_context(content)
         
     return Response(
         content,
         mimetype=mimetype,
         headers={"Content-Disposition": f"attachment;filename={filename}"}
-    )
\ No newline at end of file
+    )
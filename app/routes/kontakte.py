@@ -1,31 +1,17 @@
 # app/routes/kontakte.py
 import json
 from flask import Blueprint, render_template, request, redirect, url_for
-from sqlalchemy.orm import joinedload, subqueryload
-from ..models import db, Vorlage, Kontakt, Gruppe, Eigenschaft
+from ..models import db, Vorlage, Kontakt
+from ..services import schema_registry
 
 bp = Blueprint('kontakte', __name__, url_prefix='/kontakte')
 
 @bp.route("/")
 def auflisten():
-    # KORRIGIERTE UND OPTIMIERTE DATENBANKABFRAGE
-    vorlagen_query = Vorlage.query.options(
-        subqueryload(Vorlage.kontakte),
-        subqueryload(Vorlage.gruppen).subqueryload(Gruppe.eigenschaften)
-    ).order_by(Vorlage.name).all()
-    
-    vorlagen_data = []
-    for v in vorlagen_query:
-        vorlage_dict = {
-            "id": v.id,
-            "name": v.name,
-            "eigenschaften": [{"id": e.id, "name": e.name, "datentyp": e.datentyp, "optionen": e.optionen} for g in v.gruppen for e in g.eigenschaften],
-            "kontakte": [{"id": k.id, "daten": k.get_data()} for k in v.kontakte],
-            "gruppen": [{"id": g.id, "name": g.name, "eigenschaften": [{"id": e.id, "name": e.name, "datentyp": e.datentyp, "optionen": e.optionen} for e in g.eigenschaften]} for g in v.gruppen]
-        }
-        vorlagen_data.append(vorlage_dict)
-
-    return render_template("kontakte_liste.html", vorlagen_for_json=json.dumps(vorlagen_data))
+    # Es werden nur die Vorlagen-Strukturen ausgeliefert. Die Kontakte selbst
+    # lädt die Seite seitenweise über /api/kontakte nach; die Strukturen kommen
+    # fertig serialisiert aus dem Schema-Cache.
+    return render_template("kontakte_liste.html", vorlagen_for_json=schema_registry.liste_json())
 
 @bp.route("/editor", methods=["GET", "POST"])
 def editor():
@@ -54,13 +40,12 @@ def editor():
         db.session.commit()
         return redirect(url_for('kontakte.auflisten'))
         
-    vorlage_for_json = {"id": vorlage.id, "name": vorlage.name, "gruppen": [{"id": g.id, "name": g.name, "eigenschaften": [{"id": e.id, "name": e.name, "datentyp": e.datentyp, "optionen": e.optionen} for e in g.eigenschaften]} for g in vorlage.gruppen]}
     kontakt_daten_for_json = kontakt.get_data() if kontakt else {}
     
     return render_template("kontakt_editor.html", 
                            action_url=action_url,
                            kontakt=kontakt,
-                           vorlage_for_json=json.dumps(vorlage_for_json), 
+                           vorlage_for_json=schema_registry.get(vorlage.id).editor_json, 
                            kontakt_daten_for_json=json.dumps(kontakt_daten_for_json))
 
 @bp.route("/loeschen/<int:kontakt_id>", methods=["POST"])
@@ -11,11 +11,23 @@ from flask import (
     current_app,
 )
 from werkzeug.utils import secure_filename
-from ..models import db, Vorlage, Gruppe, Eigenschaft
+from ..models import db, Vorlage
+from ..services import export_cache, schema_registry, vorlage_service
 
 bp = Blueprint("vorlagen", __name__, url_prefix="/vorlagen")
 
 
+def _user_vorlage_pfad(name):
+    """Pfad der JSON-Datei einer benutzerdefinierten Vorlage."""
+    return os.path.join(
+        current_app.root_path,
+        "..",
+        "data",
+        "user_vorlagen",
+        f"user_{secure_filename(name).lower()}.json",
+    )
+
+
 @bp.route("/")
 def verwalten():
     vorlagen_liste = Vorlage.query.order_by(
@@ -27,38 +39,22 @@ def verwalten():
 @bp.route("/editor")
 def editor():
     vorlage_id = request.args.get("vorlage_id", type=int)
-    all_vorlagen = Vorlage.query.all()
     if vorlage_id:
-        vorlage = db.session.get(Vorlage, vorlage_id)
-        vorlage_data = {
-            "id": vorlage.id,
-            "name": vorlage.name,
-            "is_standard": vorlage.is_standard,
-            "gruppen": [
-                {
-                    "name": g.name,
-                    "eigenschaften": [
-                        {"name": e.name, "datentyp": e.datentyp, "optionen": e.optionen}
-                        for e in g.eigenschaften
-                    ],
-                }
-                for g in vorlage.gruppen
-            ],
-        }
-        action_url = url_for("vorlagen.speichern", vorlage_id=vorlage.id)
+        vorlage_data = schema_registry.get(vorlage_id).vorlagen_editor_json
+        action_url = url_for("vorlagen.speichern", vorlage_id=vorlage_id)
     else:
-        vorlage_data = {
+        vorlage_data = json.dumps({
             "name": "",
             "gruppen": [{"name": "Allgemein", "eigenschaften": []}],
             "is_standard": False,
-        }
+        })
         action_url = url_for("vorlagen.speichern")
 
-    all_vorlagen_data = [{"id": v.id, "name": v.name} for v in all_vorlagen]
+    all_vorlagen_data = [{"id": v.id, "name": v.name} for v in schema_registry.get_all()]
 
     return render_template(
         "vorlage_editor.html",
-        vorlage_data=json.dumps(vorlage_data),
+        vorlage_data=vorlage_data,
         action_url=action_url,
         all_vorlagen_data=json.dumps(all_vorlagen_data),
     )
@@ -92,56 +88,40 @@ def speichern(vorlage_id=None):
                 400,
             )
 
+        alter_name = vorlage.name
         vorlage.name = data["name"]
-
-        # KORREKTUR: Alte Gruppen werden hier zuverlässig gelöscht.
-        # Wir iterieren über eine Kopie der Liste, um alle Gruppen-Objekte
-        # sicher aus der Session zu entfernen. Die Kaskadierung in den Models
-        # sorgt dafür, dass auch alle zugehörigen Eigenschaften gelöscht werden.
-        for gruppe in list(vorlage.gruppen):
-            db.session.delete(gruppe)
-
     else:
+        alter_name = None
         vorlage = Vorlage(name=data["name"], is_standard=False)
         db.session.add(vorlage)
 
+    # Nur die Differenz zum Bestand wird geschrieben; IDs bleiben erhalten
+    geaendert, umbenennungen = vorlage_service.apply_structure(
+        vorlage, data.get("gruppen", [])
+    )
     db.session.flush()
-
-    # Neue Gruppen und Eigenschaften werden hinzugefügt
-    for gruppe_data in data.get("gruppen", []):
-        gruppe = Gruppe(name=gruppe_data["name"], vorlage_id=vorlage.id)
-        db.session.add(gruppe)
-        db.session.flush()
-        for eigenschaft_data in gruppe_data.get("eigenschaften", []):
-            eigenschaft = Eigenschaft(
-                name=eigenschaft_data["name"],
-                datentyp=eigenschaft_data["datentyp"],
-                optionen=eigenschaft_data.get("optionen", ""),
-                gruppe_id=gruppe.id,
-            )
-            db.session.add(eigenschaft)
+    if umbenennungen:
+        vorlage_service.rename_felder(vorlage.id, umbenennungen)
+    # Auch der Name steckt im Schema-Cache (Listen, Editoren, Export-Dateinamen)
+    if geaendert or (alter_name is not None and alter_name != vorlage.name):
+        vorlage.touch_schema()
+    db.session.commit()
+    schema_registry.invalidate(vorlage.id)
 
     if not vorlage.is_standard:
         try:
-            user_vorlagen_path = os.path.join(
-                current_app.root_path, "..", "data", "user_vorlagen"
+            if alter_name and alter_name != vorlage.name:
+                alter_pfad = _user_vorlage_pfad(alter_name)
+                if os.path.exists(alter_pfad):
+                    os.remove(alter_pfad)
+            vorlage_service.write_json_if_changed(
+                _user_vorlage_pfad(vorlage.name), vorlage_service.struktur_daten(vorlage)
             )
-            os.makedirs(user_vorlagen_path, exist_ok=True)
-
-            filename = f"user_{secure_filename(vorlage.name).lower()}.json"
-            filepath = os.path.join(user_vorlagen_path, filename)
-
-            json_data = {"name": vorlage.name, "gruppen": data.get("gruppen", [])}
-
-            with open(filepath, "w", encoding="utf-8") as f:
-                json.dump(json_data, f, ensure_ascii=False, indent=2)
-
         except Exception as e:
             current_app.logger.error(
                 f"Konnte JSON für Vorlage '{vorlage.name}' nicht speichern: {e}"
             )
 
-    db.session.commit()
     return jsonify({"redirect_url": url_for("vorlagen.verwalten")})
 
 
@@ -153,11 +133,7 @@ def loeschen(vorlage_id):
             return redirect(url_for("vorlagen.verwalten"))
 
         try:
-            user_vorlagen_path = os.path.join(
-                current_app.root_path, "..", "data", "user_vorlagen"
-            )
-            filename = f"user_{secure_filename(vorlage.name).lower()}.json"
-            filepath = os.path.join(user_vorlagen_path, filename)
+            filepath = _user_vorlage_pfad(vorlage.name)
             if os.path.exists(filepath):
                 os.remove(filepath)
         except Exception as e:
@@ -167,5 +143,7 @@ def loeschen(vorlage_id):
 
         db.session.delete(vorlage)
         db.session.commit()
+        schema_registry.invalidate(vorlage_id)
+        export_cache.verwerfen(vorlage_id)
 
     return redirect(url_for("vorlagen.verwalten"))
@@ -0,0 +1,206 @@
+# app/services/bulk_writer.py
+"""
+Schreibt große Mengen an Kontakten ohne ORM-Objekte: Die Zeilen werden in
+Blöcken per executemany eingefügt bzw. aktualisiert und jeder Block wird
+einzeln committed. Schlägt ein Block fehl, bleiben die bereits geschriebenen
+Blöcke erhalten.
+"""
+from collections import Counter
+from itertools import islice
+from sqlalchemy import bindparam, insert, select, update
+from ..models import db, Kontakt
+from .. import instrumentation
+from . import kontakt_index
+from .kontakt_service import feld_ausdruck
+
+DEFAULT_CHUNK_SIZE = 1000
+UPSERT_MODES = ("update", "merge", "skip")
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def insert_chunk(vorlage_id, daten_list):
+    """Fügt einen Block von Kontakt-Daten ein und gibt die neuen IDs zurück (ohne Commit)."""
+    rows = [
+        {"vorlage_id": vorlage_id, "daten": instrumentation.json_dumps(daten, ensure_ascii=False)}
+        for daten in daten_list
+    ]
+    stmt = insert(Kontakt).returning(Kontakt.id, sort_by_parameter_order=True)
+    ids = db.session.execute(stmt, rows).scalars().all()
+    kontakt_index.sync(db.session.connection(), ids)
+    return ids
+
+
+def update_chunk(updates):
+    """Schreibt geänderte Daten {kontakt_id: daten} per executemany (ohne Commit)."""
+    stmt = (
+        update(Kontakt)
+        .where(Kontakt.id == bindparam("kontakt_id"))
+        .values(daten=bindparam("neue_daten"), version=Kontakt.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.connection().execute(
+        stmt,
+        [
+            {"kontakt_id": k, "neue_daten": instrumentation.json_dumps(d, ensure_ascii=False)}
+            for k, d in updates.items()
+        ],
+    )
+    kontakt_index.sync(db.session.connection(), list(updates))
+
+
+def load_daten(kontakt_ids):
+    """Lädt die Daten mehrerer Kontakte als {kontakt_id: dict}."""
+    rows = db.session.execute(
+        select(Kontakt.id, Kontakt.daten).where(Kontakt.id.in_(list(kontakt_ids)))
+    )
+    return {kontakt_id: instrumentation.json_loads(daten or "{}") for kontakt_id, daten in rows}
+
+
+def merge_daten(vorhanden, neu, mode):
+    """"update": Import-Werte überschreiben; "merge": nur leere Felder werden ergänzt."""
+    ergebnis = dict(vorhanden)
+    for feld, wert in neu.items():
+        if wert in (None, ""):
+            continue
+        if mode == "update" or ergebnis.get(feld) in (None, ""):
+            ergebnis[feld] = wert
+    return ergebnis
+
+
+def insert_kontakte(vorlage_id, daten_iter, chunk_size=DEFAULT_CHUNK_SIZE, job=None):
+    """
+    Fügt alle Kontakt-Daten aus `daten_iter` blockweise ein.
+    Gibt eine Zusammenfassung mit der Zahl der eingefügten Kontakte und den
+    Fehlern einzelner Blöcke zurück.
+    """
+    inserted = 0
+    failed = 0
+    errors = []
+    position = 0
+
+    for chunk in chunked(daten_iter, chunk_size):
+        try:
+            insert_chunk(vorlage_id, chunk)
+            db.session.commit()
+            inserted += len(chunk)
+        except Exception as e:
+            db.session.rollback()
+            failed += len(chunk)
+            errors.append(f"Zeilen {position + 1}-{position + len(chunk)}: {e}")
+        position += len(chunk)
+        if job is not None:
+            job.progress(position)
+
+    return {"inserted": inserted, "failed": failed, "errors": errors}
+
+
+def identity_key(daten, key_fields):
+    """Schlüssel eines Kontakts aus den gewählten Feldern (None, wenn alle leer sind)."""
+    werte = tuple(str(daten.get(feld) or "").strip().casefold() for feld in key_fields)
+    return werte if any(werte) else None
+
+
+def upsert_kontakte(vorlage_id, daten_iter, key_fields, mode="update",
+                    chunk_size=DEFAULT_CHUNK_SIZE, job=None):
+    """
+    Import mit Abgleich über `key_fields` (z.B. ["E-Mail"]): Die Schlüssel der
+    vorhandenen Kontakte werden einmal in ein Dict geladen; passende Zeilen
+    aktualisieren den vorhandenen Kontakt ("update" überschreibt, "merge"
+    ergänzt nur leere Felder, "skip" lässt ihn unverändert), alle übrigen
+    werden blockweise eingefügt. Weitere Zeilen mit demselben Schlüssel werden
+    in die erste zusammengeführt und als "merged" gezählt.
+    """
+    if mode not in UPSERT_MODES:
+        raise ValueError(f"Unbekannter Abgleich-Modus '{mode}'.")
+    query = (
+        db.session.query(Kontakt.id, *[feld_ausdruck(feld) for feld in key_fields])
+        .filter(Kontakt.vorlage_id == vorlage_id)
+        .order_by(Kontakt.id)
+        .execution_options(yield_per=5000)
+    )
+    index = {}
+    for row in query:
+        key = identity_key(dict(zip(key_fields, row[1:])), key_fields)
+        if key is not None:
+            index.setdefault(key, row[0])
+
+    summary = {
+        "inserted": 0, "updated": 0, "merged": 0, "unchanged": 0, "failed": 0, "errors": [],
+    }
+    position = 0
+
+    for chunk in chunked(daten_iter, chunk_size):
+        neue = []           # Daten der einzufügenden Zeilen
+        neue_keys = {}      # Schlüssel -> Position in `neue`
+        treffer = []        # (Kontakt-ID, Import-Daten)
+        unchanged = merged = 0
+        for daten in chunk:
+            key = identity_key(daten, key_fields)
+            if mode == "skip" and key is not None and (key in index or key in neue_keys):
+                unchanged += 1
+            elif key is not None and key in index:
+                treffer.append((index[key], daten))
+            elif key is not None and key in neue_keys:
+                # Schlüssel kommt mehrfach in der Datei vor
+                slot = neue_keys[key]
+                neue[slot] = merge_daten(neue[slot], daten, mode)
+                merged += 1
+            else:
+                if key is not None:
+                    neue_keys[key] = len(neue)
+                neue.append(daten)
+
+        vorhanden = load_daten({kontakt_id for kontakt_id, _ in treffer}) if treffer else {}
+        updates = {}
+        zeilen_je_kontakt = Counter()
+        geloescht = set()   # Kontakte, die seit dem Laden des Schlüssel-Index fehlen
+        fehlend = 0
+        for kontakt_id, daten in treffer:
+            if kontakt_id not in vorhanden:
+                geloescht.add(kontakt_id)
+                fehlend += 1
+                continue
+            zeilen_je_kontakt[kontakt_id] += 1
+            ergebnis = merge_daten(updates.get(kontakt_id, vorhanden[kontakt_id]), daten, mode)
+            if ergebnis != vorhanden[kontakt_id] or kontakt_id in updates:
+                updates[kontakt_id] = ergebnis
+        # Pro Kontakt zählt eine Zeile als aktualisiert/unverändert, weitere als zusammengeführt
+        for kontakt_id, anzahl in zeilen_je_kontakt.items():
+            if kontakt_id not in updates:
+                unchanged += 1
+            merged += anzahl - 1
+
+        try:
+            ids = insert_chunk(vorlage_id, neue) if neue else []
+            if updates:
+                update_chunk(updates)
+            db.session.commit()
+            summary["inserted"] += len(ids)
+            summary["updated"] += len(updates)
+            summary["merged"] += merged
+            summary["unchanged"] += unchanged
+            if fehlend:
+                summary["failed"] += fehlend
+                summary["errors"].append(
+                    f"Zeilen {position + 1}-{position + len(chunk)}: {fehlend} Zeile(n) passen "
+                    f"zu inzwischen gelöschten Kontakten {sorted(geloescht)}"
+                )
+            for key, slot in neue_keys.items():
+                index[key] = ids[slot]
+        except Exception as e:
+            db.session.rollback()
+            summary["failed"] += len(chunk)
+            summary["errors"].append(f"Zeilen {position + 1}-{position + len(chunk)}: {e}")
+        position += len(chunk)
+        if job is not None:
+            job.progress(position)
+
+    return summary
@@ -0,0 +1,406 @@
+# app/services/duplicate_service.py
+"""
+Dubletten-Erkennung für Kontakte.
+
+Statt jeden Kontakt mit jedem zu vergleichen (O(n²)), wird jeder Kontakt
+über Blocking-Schlüssel (E-Mail, Telefonnummer, Kölner Phonetik des
+Nachnamens plus PLZ bzw. Vorname) in Blöcke einsortiert. Verglichen wird nur
+innerhalb eines Blocks, dadurch wächst der Aufwand nahezu linear.
+"""
+import re
+from collections import defaultdict
+from difflib import SequenceMatcher
+from itertools import combinations
+from ..models import db, Kontakt, Vorlage
+from . import bulk_writer, kontakt_index, kontakt_service
+
+DUPLIKAT_FELD = "Status"
+DUPLIKAT_WERT = "Doppelt 🔃"
+DEFAULT_THRESHOLD = 0.85
+# Größere Blöcke (z.B. info@-Adressen) werden übersprungen, sonst droht O(n²)
+MAX_BLOCK_SIZE = 200
+MAX_BEISPIELE = 20
+
+IMPORT_MODES = ("insert", "skip", "update", "merge")
+
+# Felder in `Kontakt.daten`, die für den Vergleich gelesen werden
+NAMEN_FELDER = ["Vorname", "Nachname"]
+FIRMEN_FELDER = ["Firmenname", "Firma"]
+EMAIL_FELDER = ["E-Mail"]
+TELEFON_FELDER = ["Telefon (geschäftlich)", "Telefon (privat)", "Mobilnummer"]
+PLZ_FELDER = ["Postleitzahl"]
+STRASSEN_FELDER = ["Straße"]
+ALLE_FELDER = (
+    NAMEN_FELDER + FIRMEN_FELDER + EMAIL_FELDER + TELEFON_FELDER + PLZ_FELDER + STRASSEN_FELDER
+)
+
+# Gewichte der Einzelvergleiche für den Gesamt-Score
+GEWICHTE = {"name": 3, "firma": 1, "email": 2, "telefon": 2, "plz": 1, "strasse": 2}
+
+
+# --- Normalisierung ---
+
+def _erstes(daten, felder):
+    for feld in felder:
+        wert = daten.get(feld)
+        if wert not in (None, ""):
+            return str(wert)
+    return ""
+
+
+def normalize_text(wert):
+    """Kleinbuchstaben, Umlaute ausgeschrieben, nur Buchstaben/Ziffern und einfache Leerzeichen."""
+    wert = kontakt_index.fold(str(wert or "")).lower()
+    return " ".join(re.findall(r"[^\W_]+", wert))
+
+
+def normalize_phone(wert):
+    """Nur Ziffern, internationale Vorwahl +49/0049 wird zur führenden 0."""
+    wert = str(wert or "").strip()
+    ziffern = re.sub(r"\D", "", wert)
+    if wert.startswith("+") or ziffern.startswith("00"):
+        ziffern = ziffern.lstrip("0")
+        ziffern = "0" + ziffern[2:] if ziffern.startswith("49") else "00" + ziffern
+    return ziffern if len(ziffern) >= 6 else ""
+
+
+def normalize_street(wert):
+    wert = normalize_text(wert)
+    return re.sub(r"str\b|strasse\b", "str", wert).replace(" ", "")
+
+
+def koelner_phonetik(wort):
+    """Phonetischer Code nach der Kölner Phonetik (Meier/Mayer/Maier -> "67")."""
+    wort = re.sub(r"[^A-Z]", "", kontakt_index.fold(wort or "").upper())
+    ziffern = []
+    for i, c in enumerate(wort):
+        vor = wort[i - 1] if i > 0 else ""
+        nach = wort[i + 1] if i + 1 < len(wort) else ""
+        if c in "AEIJOUY":
+            code = "0"
+        elif c == "H":
+            continue
+        elif c == "B":
+            code = "1"
+        elif c == "P":
+            code = "3" if nach == "H" else "1"
+        elif c in "DT":
+            code = "8" if nach and nach in "CSZ" else "2"
+        elif c in "FVW":
+            code = "3"
+        elif c in "GKQ":
+            code = "4"
+        elif c == "C":
+            if i == 0:
+                code = "4" if nach and nach in "AHKLOQRUX" else "8"
+            elif vor in ("S", "Z"):
+                code = "8"
+            else:
+                code = "4" if nach and nach in "AHKOQUX" else "8"
+        elif c == "X":
+            code = "8" if vor and vor in "CKQ" else "48"
+        elif c == "L":
+            code = "5"
+        elif c in "MN":
+            code = "6"
+        elif c == "R":
+            code = "7"
+        else:  # S, Z
+            code = "8"
+        for ziffer in code:
+            if not ziffern or ziffern[-1] != ziffer:
+                ziffern.append(ziffer)
+    if not ziffern:
+        return ""
+    return ziffern[0] + "".join(z for z in ziffern[1:] if z != "0")
+
+
+def profil(daten):
+    """Verdichtet die Kontakt-Daten auf die normalisierten Vergleichswerte."""
+    vorname = normalize_text(daten.get("Vorname"))
+    nachname = normalize_text(daten.get("Nachname"))
+    return {
+        "vorname": vorname,
+        "nachname": nachname,
+        "name": f"{vorname} {nachname}".strip(),
+        "firma": normalize_text(_erstes(daten, FIRMEN_FELDER)),
+        "email": _erstes(daten, EMAIL_FELDER).strip().lower(),
+        "telefon": {t for t in (normalize_phone(daten.get(f)) for f in TELEFON_FELDER) if t},
+        "plz": re.sub(r"\D", "", _erstes(daten, PLZ_FELDER)),
+        "strasse": normalize_street(_erstes(daten, STRASSEN_FELDER)),
+    }
+
+
+def blocking_keys(p):
+    """Schlüssel der Blöcke, in die ein Kontakt einsortiert wird."""
+    keys = []
+    if p["email"]:
+        keys.append(("e", p["email"]))
+    for telefon in p["telefon"]:
+        keys.append(("t", telefon))
+    if p["nachname"]:
+        code = koelner_phonetik(p["nachname"])
+        if p["plz"]:
+            keys.append(("n", code, p["plz"]))
+        if p["vorname"]:
+            keys.append(("v", code, koelner_phonetik(p["vorname"])[:2]))
+    elif p["firma"] and p["plz"]:
+        keys.append(("f", koelner_phonetik(p["firma"]), p["plz"]))
+    return keys
+
+
+def similarity(a, b):
+    """
+    Gewichteter Ähnlichkeits-Score (0..1) zweier Profile. Verglichen werden nur
+    Felder, die in beiden gefüllt sind; ohne Name bzw. Firma oder mit nur einem
+    gemeinsamen Feld gilt das Paar nicht als vergleichbar (0).
+    """
+    werte = {}
+    if a["name"] and b["name"]:
+        gedreht = f"{b['nachname']} {b['vorname']}".strip()
+        werte["name"] = max(
+            SequenceMatcher(None, a["name"], b["name"]).ratio(),
+            SequenceMatcher(None, a["name"], gedreht).ratio(),
+        )
+    if a["firma"] and b["firma"]:
+        werte["firma"] = SequenceMatcher(None, a["firma"], b["firma"]).ratio()
+    if "name" not in werte and "firma" not in werte:
+        return 0.0
+    if a["email"] and b["email"]:
+        werte["email"] = 1.0 if a["email"] == b["email"] else 0.0
+    if a["telefon"] and b["telefon"]:
+        werte["telefon"] = 1.0 if a["telefon"] & b["telefon"] else 0.0
+    if a["plz"] and b["plz"]:
+        werte["plz"] = 1.0 if a["plz"] == b["plz"] else 0.0
+    if a["strasse"] and b["strasse"]:
+        werte["strasse"] = SequenceMatcher(None, a["strasse"], b["strasse"]).ratio()
+    if len(werte) < 2:
+        return 0.0
+    gewicht = sum(GEWICHTE[k] for k in werte)
+    return sum(GEWICHTE[k] * v for k, v in werte.items()) / gewicht
+
+
+# --- Index ---
+
+class DuplicateIndex:
+    """
+    Hält die Profile und Blöcke aller Kontakte einer Vorlage im Speicher.
+    Einträge sind über frei wählbare Schlüssel adressiert (Kontakt-ID oder ein
+    Platzhalter für noch nicht gespeicherte Import-Zeilen).
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self.profile = {}
+        self.bloecke = defaultdict(list)
+        self.aliase = {}
+
+    def alias(self, key, kontakt_id):
+        """Verweist einen Platzhalter nach dem Speichern auf die echte Kontakt-ID."""
+        self.aliase[key] = kontakt_id
+
+    def add(self, key, daten):
+        p = profil(daten)
+        self.profile[key] = p
+        for block_key in blocking_keys(p):
+            self.bloecke[block_key].append(key)
+
+    def best_match(self, daten):
+        """Bester Treffer (Schlüssel, Score) für neue Daten oder None."""
+        p = profil(daten)
+        bester = None
+        gesehen = set()
+        for block_key in blocking_keys(p):
+            block = self.bloecke.get(block_key, ())
+            if len(block) > MAX_BLOCK_SIZE:
+                continue
+            for key in block:
+                if key in gesehen:
+                    continue
+                gesehen.add(key)
+                score = similarity(p, self.profile[key])
+                if score >= self.threshold and (bester is None or score > bester[1]):
+                    bester = (key, score)
+        if bester is not None:
+            bester = (self.aliase.get(bester[0], bester[0]), bester[1])
+        return bester
+
+    def clusters(self, progress=None):
+        """
+        Vergleicht paarweise innerhalb der Blöcke und fasst Treffer per
+        Union-Find zu Gruppen zusammen. Gibt Gruppen als sortierte ID-Listen zurück.
+        """
+        eltern = {}
+
+        def finde(x):
+            eltern.setdefault(x, x)
+            while eltern[x] != x:
+                eltern[x] = eltern[eltern[x]]
+                x = eltern[x]
+            return x
+
+        verglichen = set()
+        bloecke = [b for b in self.bloecke.values() if 1 < len(b) <= MAX_BLOCK_SIZE]
+        for position, block in enumerate(bloecke, start=1):
+            for a, b in combinations(block, 2):
+                paar = (a, b) if a < b else (b, a)
+                if paar in verglichen:
+                    continue
+                verglichen.add(paar)
+                if finde(a) == finde(b):
+                    continue
+                if similarity(self.profile[a], self.profile[b]) >= self.threshold:
+                    eltern[finde(b)] = finde(a)
+            if progress is not None:
+                progress(position, len(bloecke))
+
+        gruppen = defaultdict(list)
+        for key in eltern:
+            gruppen[finde(key)].append(key)
+        return sorted((sorted(g) for g in gruppen.values() if len(g) > 1), key=lambda g: g[0])
+
+
+def load_index(vorlage_id, threshold=DEFAULT_THRESHOLD, batch_size=2000):
+    """Baut den Index für alle Kontakte einer Vorlage; gelesen werden nur die Vergleichsfelder."""
+    spalten = [kontakt_service.feld_ausdruck(feld) for feld in ALLE_FELDER]
+    query = (
+        db.session.query(Kontakt.id, *spalten)
+        .filter(Kontakt.vorlage_id == vorlage_id)
+        .execution_options(yield_per=batch_size)
+    )
+    index = DuplicateIndex(threshold)
+    for row in query:
+        index.add(row[0], dict(zip(ALLE_FELDER, row[1:])))
+    return index
+
+
+# --- Batch-Job ---
+
+def _hat_feld(vorlage_id, feld_name):
+    vorlage = db.session.get(Vorlage, vorlage_id)
+    return vorlage is not None and any(
+        e.name == feld_name for g in vorlage.gruppen for e in g.eigenschaften
+    )
+
+
+def flag_duplicates(job, vorlage_id, threshold=DEFAULT_THRESHOLD):
+    """
+    Hintergrund-Job: sucht Dubletten in einer Vorlage und setzt bei allen
+    Kontakten außer dem ältesten jeder Gruppe den Status "Doppelt 🔃".
+    """
+    index = load_index(vorlage_id, threshold)
+    gruppen = index.clusters(progress=job.progress if job is not None else None)
+
+    markieren = [kontakt_id for gruppe in gruppen for kontakt_id in gruppe[1:]]
+    markiert = 0
+    if markieren and _hat_feld(vorlage_id, DUPLIKAT_FELD):
+        # Ein json_set je Block; bereits markierte Kontakte bleiben unverändert
+        for chunk in bulk_writer.chunked(markieren, bulk_writer.DEFAULT_CHUNK_SIZE):
+            markiert += kontakt_service.bulk_update({DUPLIKAT_FELD: DUPLIKAT_WERT}, ids=chunk)
+
+    return {
+        "kontakte": len(index.profile),
+        "gruppen": len(gruppen),
+        "duplikate": len(markieren),
+        "markiert": markiert,
+        "beispiele": gruppen[:MAX_BEISPIELE],
+    }
+
+
+# --- Import ---
+
+def check_import(vorlage_id, daten_iter, threshold=DEFAULT_THRESHOLD):
+    """
+    Prüft Import-Zeilen gegen die vorhandenen Kontakte (und gegen frühere
+    Zeilen derselben Datei), ohne etwas zu schreiben.
+    """
+    index = load_index(vorlage_id, threshold)
+    treffer = 0
+    zeilen = 0
+    beispiele = []
+    for position, daten in enumerate(daten_iter):
+        zeilen += 1
+        match = index.best_match(daten)
+        if match is None:
+            index.add(("neu", position), daten)
+            continue
+        treffer += 1
+        if len(beispiele) < MAX_BEISPIELE:
+            key, score = match
+            beispiele.append({
+                "zeile": position + 1,
+                "daten": daten,
+                "kontakt_id": key if not isinstance(key, tuple) else None,
+                "import_zeile": key[1] + 1 if isinstance(key, tuple) else None,
+                "score": round(score, 3),
+            })
+    vorschlag = "merge" if treffer else "insert"
+    return {"zeilen": zeilen, "duplikate": treffer, "vorschlag": vorschlag, "beispiele": beispiele}
+
+
+def import_kontakte(vorlage_id, daten_iter, mode, chunk_size=bulk_writer.DEFAULT_CHUNK_SIZE,
+                    job=None, threshold=DEFAULT_THRESHOLD):
+    """
+    Import mit Dubletten-Prüfung. Zeilen ohne Treffer werden eingefügt, bei
+    einem Treffer entscheidet `mode`: "skip" überspringt die Zeile, "update"
+    überschreibt und "merge" ergänzt den gefundenen Kontakt. Dubletten
+    innerhalb der Import-Datei werden ebenso zusammengeführt und als
+    "merged" gezählt, "updated" zählt die geänderten vorhandenen Kontakte.
+    """
+    if mode not in IMPORT_MODES:
+        raise ValueError(f"Unbekannter Dubletten-Modus '{mode}'.")
+    if mode == "insert":
+        return bulk_writer.insert_kontakte(vorlage_id, daten_iter, chunk_size, job=job)
+
+    index = load_index(vorlage_id, threshold)
+    summary = {"inserted": 0, "updated": 0, "merged": 0, "skipped": 0, "failed": 0, "errors": []}
+    position = 0
+
+    for chunk in bulk_writer.chunked(daten_iter, chunk_size):
+        neue = []          # Daten der einzufügenden Zeilen
+        treffer = []       # (Kontakt-ID, Import-Daten) für vorhandene Kontakte
+        # Gezählt wird erst nach dem Commit; ein fehlgeschlagener Block zählt nur als "failed"
+        skipped = merged = 0
+        for daten in chunk:
+            match = index.best_match(daten)
+            key = match[0] if match is not None else None
+            slot = key[1] - position if isinstance(key, tuple) else None
+            if key is None or (slot is not None and not 0 <= slot < len(neue)):
+                # Kein Treffer (oder Treffer in einem fehlgeschlagenen Block)
+                index.add(("neu", position + len(neue)), daten)
+                neue.append(daten)
+            elif mode == "skip":
+                skipped += 1
+            elif slot is not None:
+                # Dublette einer Zeile aus demselben Block: vor dem Einfügen zusammenführen
+                neue[slot] = bulk_writer.merge_daten(neue[slot], daten, mode)
+                merged += 1
+            else:
+                treffer.append((key, daten))
+
+        updates = bulk_writer.load_daten({kontakt_id for kontakt_id, _ in treffer}) if treffer else {}
+        for kontakt_id, daten in treffer:
+            if kontakt_id in updates:
+                updates[kontakt_id] = bulk_writer.merge_daten(updates[kontakt_id], daten, mode)
+
+        try:
+            ids = bulk_writer.insert_chunk(vorlage_id, neue) if neue else []
+            if updates:
+                bulk_writer.update_chunk(updates)
+            db.session.commit()
+            summary["inserted"] += len(ids)
+            summary["updated"] += len(updates)
+            summary["merged"] += merged
+            summary["skipped"] += skipped
+            # Eingefügte Zeilen sind ab jetzt über ihre echte ID auffindbar
+            for slot, kontakt_id in enumerate(ids):
+                index.alias(("neu", position + slot), kontakt_id)
+        except Exception as e:
+            db.session.rollback()
+            summary["failed"] += len(chunk)
+            summary["errors"].append(f"Zeilen {position + 1}-{position + len(chunk)}: {e}")
+        position += len(chunk)
+        if job is not None:
+            job.progress(position)
+
+    return summary
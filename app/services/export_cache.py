@@ -0,0 +1,248 @@
+# app/services/export_cache.py
+"""
+Plattencache für fertige Export-Dateien. Schlüssel ist (Vorlage, Format,
+Variante, `Vorlage.schema_version`, `Vorlage.daten_version`), bei Layouts mit
+Tagesdatum zusätzlich das Datum; jede Änderung an der Struktur oder an einem
+Kontakt der Vorlage ergibt also einen neuen Dateinamen, veraltete Dateien
+werden beim Ablegen der neuen entfernt. Zuletzt benutzte Dateien bleiben
+liegen, bis `EXPORT_CACHE_MAX_MB` überschritten ist; dann werden die am
+längsten nicht abgerufenen gelöscht.
+
+Mit `EXPORT_PREBUILD` (z.B. "xlsx,pdf") werden die Exporte nach
+Massenänderungen (Import, Bulk-Update, Bulk-Delete) im Hintergrund neu
+erzeugt, so dass der nächste Abruf direkt aus dem Cache kommt.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import date
+from flask import current_app
+from ..models import db, Kontakt, Vorlage
+from .. import instrumentation
+from . import exporter_service, jobs, schema_registry
+from .exporters import pdf_exporter
+
+EXTENSIONS = {
+    "text/csv": "csv",
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet": "xlsx",
+    "application/pdf": "pdf",
+    "application/zip": "zip",
+}
+MIMETYPES = {ext: mimetype for mimetype, ext in EXTENSIONS.items()}
+
+FORMATE = ("csv", "xlsx", "pdf")
+
+_locks = {}          # Präfix -> Lock, damit ein Export nur einmal gleichzeitig entsteht
+_locks_lock = threading.Lock()
+_vorgemerkt = set()  # Vorlagen mit geplantem Vorab-Export
+_vorgemerkt_lock = threading.Lock()
+
+
+def iter_kontakte(vorlage_id, batch_size=1000):
+    """Liest die Kontakte einer Vorlage blockweise aus der DB, ohne alle gleichzeitig zu halten."""
+    query = (
+        db.session.query(Kontakt.id, Kontakt.daten)
+        .filter(Kontakt.vorlage_id == vorlage_id)
+        .order_by(Kontakt.id)
+        .execution_options(yield_per=batch_size)
+    )
+    for kontakt_id, daten in query:
+        instrumentation.zeilen_geladen(1)
+        yield {"id": kontakt_id, "daten": instrumentation.json_loads(daten or "{}")}
+
+
+def pdf_optionen(layout="details", chunk_size=None):
+    """PDF-Einstellungen aus der App-Konfiguration."""
+    config = current_app.config
+    return {
+        "layout": layout,
+        "chunk_size": config.get("PDF_CHUNK_SIZE", 0) if chunk_size is None else chunk_size,
+        "workers": config.get("PDF_WORKERS", 1),
+        "fonts": pdf_exporter.find_fonts(config.get("PDF_FONT_PATH"), config.get("PDF_FONT_BOLD_PATH")),
+    }
+
+
+def _variante(file_format, pdf_options):
+    if file_format != "pdf":
+        return "standard"
+    return f"{pdf_options['layout']}-{pdf_options['chunk_size'] or 0}"
+
+
+def cache_dir():
+    return current_app.config["EXPORT_CACHE_DIR"]
+
+
+def ist_aktiv():
+    return current_app.config.get("EXPORT_CACHE_MAX_MB", 0) > 0
+
+
+class Artefakt:
+    """Eine (evtl. noch nicht erzeugte) Export-Datei im Cache."""
+
+    def __init__(self, schema, daten_version, file_format, pdf_options):
+        self.vorlage_id = schema.id
+        self.file_format = file_format
+        self.pdf_options = pdf_options
+        self.praefix = f"{schema.id}_{file_format}_{_variante(file_format, pdf_options)}_"
+        self.schluessel = f"{self.praefix}{schema.version}_{daten_version}"
+        if file_format == "pdf" and pdf_options["layout"] in pdf_exporter.DATUMS_LAYOUTS:
+            # Das Datum gehört nicht zum Präfix: der Brief von gestern gilt als veraltet
+            self.schluessel += f"_{date.today().isoformat()}"
+        self.etag = hashlib.sha1(self.schluessel.encode("utf-8")).hexdigest()
+
+    def vorhanden(self):
+        """Pfad und Mimetype der fertigen Datei oder None."""
+        for ext, mimetype in MIMETYPES.items():
+            pfad = os.path.join(cache_dir(), f"{self.schluessel}.{ext}")
+            if os.path.exists(pfad):
+                return pfad, mimetype
+        return None
+
+
+def artefakt(vorlage_id, file_format, pdf_options=None):
+    """Cache-Eintrag für den aktuellen Stand der Vorlage (None, wenn es sie nicht gibt)."""
+    schema = schema_registry.get(vorlage_id)
+    daten_version = db.session.query(Vorlage.daten_version).filter(Vorlage.id == vorlage_id).scalar()
+    if schema is None or daten_version is None:
+        return None
+    return Artefakt(schema, daten_version, file_format, pdf_options)
+
+
+def _lock_fuer(praefix):
+    with _locks_lock:
+        return _locks.setdefault(praefix, threading.Lock())
+
+
+def _schreiben(content, ziel):
+    """Schreibt den Export-Inhalt (Generator, Datei oder Bytes) in eine Datei."""
+    if hasattr(content, "read"):
+        with content:
+            shutil.copyfileobj(content, ziel)
+    elif isinstance(content, (bytes, str)):
+        ziel.write(content.encode("utf-8") if isinstance(content, str) else content)
+    else:
+        for teil in content:
+            ziel.write(teil.encode("utf-8") if isinstance(teil, str) else teil)
+
+
+def holen(eintrag):
+    """
+    Liefert (Pfad, Mimetype) der Export-Datei und erzeugt sie, falls sie noch
+    nicht im Cache liegt. Die Daten-Version wird vor dem Lesen der Kontakte
+    bestimmt; ein Export enthält also höchstens neuere Daten als sein Schlüssel.
+    """
+    treffer = eintrag.vorhanden()
+    if treffer:
+        try:
+            os.utime(treffer[0])  # Zuletzt benutzt (LRU)
+            return treffer
+        except FileNotFoundError:
+            pass  # Gerade verdrängt: neu erzeugen
+
+    with _lock_fuer(eintrag.praefix):
+        treffer = eintrag.vorhanden()
+        if treffer:
+            return treffer
+
+        schema = schema_registry.get(eintrag.vorlage_id)
+        content, mimetype = exporter_service.export_data(
+            eintrag.file_format, iter_kontakte(eintrag.vorlage_id), schema.export_struktur,
+            eintrag.pdf_options,
+        )
+        if mimetype is None:
+            return None
+        ordner = cache_dir()
+        os.makedirs(ordner, exist_ok=True)
+        pfad = os.path.join(ordner, f"{eintrag.schluessel}.{EXTENSIONS[mimetype]}")
+        fd, temp_pfad = tempfile.mkstemp(dir=ordner, prefix=".tmp_")
+        try:
+            with os.fdopen(fd, "wb") as ziel:
+                _schreiben(content, ziel)
+            os.replace(temp_pfad, pfad)
+        except BaseException:
+            os.unlink(temp_pfad)
+            raise
+
+    _veraltete_entfernen(eintrag)
+    aufraeumen()
+    return pfad, mimetype
+
+
+def _veraltete_entfernen(eintrag):
+    """Löscht ältere Stände desselben Exports (gleiche Vorlage, Format und Variante)."""
+    for name in os.listdir(cache_dir()):
+        if name.startswith(eintrag.praefix) and not name.startswith(eintrag.schluessel + "."):
+            try:
+                os.unlink(os.path.join(cache_dir(), name))
+            except FileNotFoundError:
+                pass
+
+
+def aufraeumen(max_bytes=None):
+    """Löscht die am längsten nicht benutzten Dateien, bis die Obergrenze eingehalten ist."""
+    if max_bytes is None:
+        max_bytes = current_app.config.get("EXPORT_CACHE_MAX_MB", 0) * 1024 * 1024
+    dateien = []
+    with os.scandir(cache_dir()) as eintraege:
+        for e in eintraege:
+            if e.is_file() and not e.name.startswith(".tmp_"):
+                stat = e.stat()
+                dateien.append((stat.st_mtime, stat.st_size, e.path))
+    gesamt = sum(groesse for _, groesse, _ in dateien)
+    for _, groesse, pfad in sorted(dateien):
+        if gesamt <= max_bytes:
+            break
+        try:
+            os.unlink(pfad)
+        except FileNotFoundError:
+            pass
+        gesamt -= groesse
+
+
+def verwerfen(vorlage_id):
+    """Entfernt alle Exporte einer Vorlage (z.B. nach dem Löschen der Vorlage)."""
+    ordner = cache_dir()
+    if not os.path.isdir(ordner):
+        return
+    for name in os.listdir(ordner):
+        if name.startswith(f"{vorlage_id}_"):
+            try:
+                os.unlink(os.path.join(ordner, name))
+            except FileNotFoundError:
+                pass
+
+
+def vormerken(vorlage_id):
+    """Plant den Vorab-Export einer Vorlage nach einer Massenänderung (falls eingeschaltet)."""
+    formate = [
+        f.strip() for f in current_app.config.get("EXPORT_PREBUILD", "").split(",")
+        if f.strip() in FORMATE
+    ]
+    if not formate or not ist_aktiv():
+        return None
+    with _vorgemerkt_lock:
+        if vorlage_id in _vorgemerkt:
+            return None
+        _vorgemerkt.add(vorlage_id)
+    return jobs.start("export-cache", _vorab_erzeugen, vorlage_id, formate)
+
+
+def _vorab_erzeugen(job, vorlage_id, formate):
+    """Hintergrund-Job: erzeugt die Exporte einer Vorlage für den aktuellen Stand."""
+    # Kurz warten, damit mehrere aufeinanderfolgende Änderungen zusammengefasst werden
+    time.sleep(current_app.config.get("EXPORT_PREBUILD_DELAY", 0))
+    with _vorgemerkt_lock:
+        _vorgemerkt.discard(vorlage_id)
+    job.progress(0, len(formate))
+    erzeugt = []
+    for index, file_format in enumerate(formate, start=1):
+        eintrag = artefakt(
+            vorlage_id, file_format, pdf_optionen() if file_format == "pdf" else None
+        )
+        if eintrag is not None and holen(eintrag):
+            erzeugt.append(file_format)
+        job.progress(index)
+    return {"vorlage_id": vorlage_id, "formate": erzeugt}
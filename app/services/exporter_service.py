@@ -3,9 +3,12 @@
 # KORRIGIERTER IMPORT-PFAD: Nutzt relative Imports
 from .exporters import csv_exporter, xlsx_exporter, pdf_exporter
 
-def export_data(file_format, kontakte_data, vorlage_struktur):
+def export_data(file_format, kontakte_data, vorlage_struktur, pdf_options=None):
     """
     Erkennt das gewünschte Exportformat und ruft die entsprechende Funktion auf.
+    `kontakte_data` darf ein Generator sein. Der Inhalt ist je nach Format ein
+    Generator (CSV), eine geöffnete temporäre Datei (XLSX, PDF in Teilen als
+    ZIP) oder Bytes (PDF).
     """
     eigenschaften = [e for g in vorlage_struktur['gruppen'] for e in g['eigenschaften']]
     
@@ -16,9 +19,10 @@ def export_data(file_format, kontakte_data, vorlage_struktur):
         content = xlsx_exporter.generate_xlsx(kontakte_data, eigenschaften)
         mimetype = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
     elif file_format == 'pdf':
-        content = pdf_exporter.generate_pdf(kontakte_data, vorlage_struktur)
-        mimetype = 'application/pdf'
+        pdf_options = pdf_options or {}
+        content = pdf_exporter.generate_pdf(kontakte_data, vorlage_struktur, **pdf_options)
+        mimetype = 'application/zip' if pdf_options.get('chunk_size') else 'application/pdf'
     else:
         return None, None
         
-    return content, mimetype
\ No newline at end of file
+    return content, mimetype
@@ -2,17 +2,29 @@
 import csv
 import io
 
+ROWS_PER_CHUNK = 500
+
 def generate_csv(kontakte, eigenschaften):
-    """Erstellt eine CSV-Datei im Speicher."""
+    """Erzeugt eine CSV-Datei als Generator, der die Zeilen blockweise liefert."""
     output = io.StringIO()
     writer = csv.writer(output)
+
+    def take_chunk():
+        chunk = output.getvalue()
+        output.seek(0)
+        output.truncate(0)
+        return chunk
     
     headers = [e['name'] for e in eigenschaften]
     writer.writerow(headers)
+    yield take_chunk()
     
-    for kontakt in kontakte:
+    for index, kontakt in enumerate(kontakte, start=1):
         row = [str(kontakt['daten'].get(h, '')) for h in headers]
         writer.writerow(row)
-        
-    output.seek(0)
-    return output.getvalue()
\ No newline at end of file
+        if index % ROWS_PER_CHUNK == 0:
+            yield take_chunk()
+
+    rest = take_chunk()
+    if rest:
+        yield rest
@@ -1,61 +1,311 @@
 # src/exporters/pdf_exporter.py
+import os
+import tempfile
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from itertools import islice
 from fpdf import FPDF
+from fpdf.enums import XPos, YPos
 
-def generate_pdf(kontakte, vorlage_struktur):
+LAYOUTS = ("details", "brief", "etiketten", "kalender")
+# Layouts, die das aktuelle Datum drucken (Export-Cache muss täglich neu erzeugen)
+DATUMS_LAYOUTS = ("brief",)
+FONT_FAMILY = "KontaktSans"
+SPOOL_MAX_SIZE = 10 * 1024 * 1024
+
+# Übliche Ablageorte einer Unicode-Schrift, falls in der Konfiguration keine angegeben ist
+FONT_CANDIDATES = [
+    ("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"),
+    ("/usr/share/fonts/dejavu/DejaVuSans.ttf", "/usr/share/fonts/dejavu/DejaVuSans-Bold.ttf"),
+    ("/usr/share/fonts/TTF/DejaVuSans.ttf", "/usr/share/fonts/TTF/DejaVuSans-Bold.ttf"),
+    ("C:\\Windows\\Fonts\\arial.ttf", "C:\\Windows\\Fonts\\arialbd.ttf"),
+    ("/System/Library/Fonts/Supplemental/Arial.ttf", "/System/Library/Fonts/Supplemental/Arial Bold.ttf"),
+]
+
+# Etikettenbogen 2 x 6 auf A4 (105 x 48 mm, z.B. Ultragrip/Zweckform 3424)
+LABEL_COLUMNS, LABEL_ROWS = 2, 6
+LABEL_WIDTH, LABEL_HEIGHT = 105, 48
+
+BRIEF_TEXT = (
+    "wir bedanken uns herzlich für die gute Zusammenarbeit in diesem Jahr "
+    "und wünschen Ihnen und Ihrer Familie frohe Weihnachten sowie einen "
+    "guten Start in das neue Jahr."
+)
+
+
+def find_fonts(regular=None, bold=None):
     """
-    Erstellt eine detaillierte PDF-Ansicht für jeden Kontakt.
+    Sucht eine Unicode-TTF-Schrift (normal, fett). Ohne Fund wird (None, None)
+    zurückgegeben und auf die eingebaute Latin-1-Schrift ausgewichen.
     """
-    pdf = FPDF()
-    pdf.set_auto_page_break(auto=True, margin=15)
+    candidates = [(regular, bold)] if regular else []
+    candidates += FONT_CANDIDATES
+    for regular_path, bold_path in candidates:
+        if regular_path and os.path.exists(regular_path):
+            if not (bold_path and os.path.exists(bold_path)):
+                bold_path = None
+            return regular_path, bold_path
+    return None, None
+
+
+class PdfLayout:
+    """Die Gruppen- und Eigenschaftsstruktur einer Vorlage, einmal pro Export aufbereitet."""
+
+    def __init__(self, vorlage_struktur):
+        self.name = vorlage_struktur['name']
+        self.gruppen = tuple(
+            (gruppe['name'], tuple(e['name'] for e in gruppe['eigenschaften']))
+            for gruppe in vorlage_struktur['gruppen']
+        )
+
+
+class _Document(FPDF):
+    """FPDF mit einmal registrierter Schrift und zwischengespeichertem Schriftschnitt."""
+
+    def __init__(self, fonts):
+        super().__init__()
+        regular, bold = fonts
+        if regular:
+            self.add_font(FONT_FAMILY, "", regular)
+            self.add_font(FONT_FAMILY, "B", bold or regular)
+            self._family = FONT_FAMILY
+            self._unicode = True
+        else:
+            self._family = "Helvetica"
+            self._unicode = False
+        self._current_style = None
+
+    def style(self, bold=False, size=10):
+        if self._current_style != (bold, size):
+            self.set_font(self._family, "B" if bold else "", size)
+            self._current_style = (bold, size)
+
+    def text_safe(self, value):
+        value = str(value)
+        if self._unicode:
+            return value
+        return value.encode('latin-1', 'replace').decode('latin-1')
+
+
+def _full_name(daten):
+    anrede = daten.get('Anrede', '')
+    titel = daten.get('Titel', '')
+    vorname = daten.get('Vorname', '')
+    nachname = daten.get('Nachname', '')
+    if vorname or nachname:
+        return f"{anrede} {titel} {vorname} {nachname}".strip().replace("  ", " ")
+    return daten.get('Firmenname', '') or daten.get('Firma', '')
+
+
+def _address_lines(daten):
+    """Anschriftenzeilen für Briefe und Etiketten."""
+    lines = []
+    firma = daten.get('Firmenname') or daten.get('Firma')
+    person = " ".join(
+        str(daten[k]) for k in ('Anrede', 'Titel', 'Vorname', 'Nachname') if daten.get(k)
+    )
+    if firma:
+        lines.append(str(firma))
+    if person and person != firma:
+        lines.append(person)
+    strasse = " ".join(str(daten[k]) for k in ('Straße', 'Hausnummer') if daten.get(k))
+    if strasse:
+        lines.append(strasse)
+    ort = " ".join(str(daten[k]) for k in ('Postleitzahl', 'Ort') if daten.get(k))
+    if ort:
+        lines.append(ort)
+    land = daten.get('Land')
+    if land and str(land).strip().lower() not in ('deutschland', 'de', 'germany'):
+        lines.append(str(land).upper())
+    return lines
+
+
+def _salutation(daten):
+    nachname = daten.get('Nachname')
+    titel = f"{daten['Titel']} " if daten.get('Titel') else ""
+    if nachname and daten.get('Anrede') == 'Herr':
+        return f"Sehr geehrter Herr {titel}{nachname},"
+    if nachname and daten.get('Anrede') == 'Frau':
+        return f"Sehr geehrte Frau {titel}{nachname},"
+    return "Sehr geehrte Damen und Herren,"
+
+
+def _render_details(pdf, layout, kontakt, state):
+    """Eine Seite pro Kontakt mit allen gefüllten Eigenschaften, nach Gruppen geordnet."""
+    daten = kontakt['daten']
+    pdf.add_page()
+
+    pdf.style(bold=True, size=16)
+    pdf.cell(0, 10, text=pdf.text_safe(_full_name(daten)), new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+    pdf.line(pdf.get_x(), pdf.get_y(), pdf.get_x() + 190, pdf.get_y())
+    pdf.ln(10)
+
+    value_width = pdf.w - pdf.l_margin - pdf.r_margin - 60
+    for gruppen_name, eigenschaften in layout.gruppen:
+        werte = [(name, daten.get(name)) for name in eigenschaften if daten.get(name)]
+        if not werte:
+            continue
+
+        pdf.style(bold=True, size=12)
+        pdf.cell(0, 10, text=pdf.text_safe(gruppen_name), new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        pdf.ln(2)
+
+        for prop_name, prop_value in werte:
+            pdf.style(bold=True, size=10)
+            pdf.cell(60, 8, text=pdf.text_safe(prop_name))
+            pdf.style(bold=False, size=10)
+            pdf.multi_cell(value_width, 8, text=pdf.text_safe(prop_value), align='L',
+                           new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+            pdf.ln(5)
+        pdf.ln(5)
+
+
+def _render_brief(pdf, layout, kontakt, state):
+    """Serienbrief nach DIN 5008 mit Anschriftfeld, Datum und Anrede."""
+    daten = kontakt['daten']
+    pdf.add_page()
+
+    pdf.style(bold=False, size=11)
+    pdf.set_xy(25, 50)
+    for line in _address_lines(daten):
+        pdf.cell(85, 5, text=pdf.text_safe(line), new_x=XPos.LEFT, new_y=YPos.NEXT)
+
+    pdf.set_xy(125, 95)
+    pdf.cell(60, 5, text=state['datum'], align='R')
+
+    pdf.set_xy(25, 110)
+    pdf.cell(0, 6, text=pdf.text_safe(_salutation(daten)), new_x=XPos.LEFT, new_y=YPos.NEXT)
+    pdf.ln(4)
+    pdf.set_x(25)
+    pdf.multi_cell(160, 6, text=pdf.text_safe(state['brief_text']), align='L',
+                   new_x=XPos.LEFT, new_y=YPos.NEXT)
+    pdf.ln(8)
+    pdf.set_x(25)
+    pdf.cell(0, 6, text=pdf.text_safe("Mit freundlichen Grüßen"))
+
+
+def _render_etiketten(pdf, layout, kontakt, state):
+    """Adressetiketten, 2 x 6 pro A4-Bogen."""
+    index = state['index'] % (LABEL_COLUMNS * LABEL_ROWS)
+    if index == 0:
+        pdf.add_page()
+    state['index'] += 1
+
+    column, row = index % LABEL_COLUMNS, index // LABEL_COLUMNS
+    x = column * LABEL_WIDTH + 8
+    y = row * LABEL_HEIGHT + 10
+    pdf.style(bold=False, size=10)
+    pdf.set_xy(x, y)
+    for line in _address_lines(kontakt['daten'])[:6]:
+        pdf.cell(LABEL_WIDTH - 16, 5, text=pdf.text_safe(line), new_x=XPos.LEFT, new_y=YPos.NEXT)
+
+
+KALENDER_SPALTEN = (("Name", 55), ("Firma", 50), ("Straße", 45), ("PLZ / Ort", 40))
+
+
+def _render_kalender(pdf, layout, kontakt, state):
+    """Versandliste für den Kalenderversand: eine Tabellenzeile pro Kontakt."""
+    daten = kontakt['daten']
+    if state['index'] == 0 or pdf.get_y() > pdf.h - pdf.b_margin - 10:
+        pdf.add_page()
+        pdf.style(bold=True, size=14)
+        pdf.cell(0, 10, text=pdf.text_safe(f"Kalenderversand - {layout.name}"),
+                 new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        pdf.style(bold=True, size=9)
+        for title, width in KALENDER_SPALTEN:
+            pdf.cell(width, 7, text=pdf.text_safe(title), border='B')
+        pdf.ln(7)
+    state['index'] += 1
+
+    strasse = " ".join(str(daten[k]) for k in ('Straße', 'Hausnummer') if daten.get(k))
+    ort = " ".join(str(daten[k]) for k in ('Postleitzahl', 'Ort') if daten.get(k))
+    werte = (
+        " ".join(str(daten[k]) for k in ('Vorname', 'Nachname') if daten.get(k)),
+        daten.get('Firmenname') or daten.get('Firma') or '',
+        strasse,
+        ort,
+    )
+    pdf.style(bold=False, size=9)
+    for (_, width), value in zip(KALENDER_SPALTEN, werte):
+        pdf.cell(width, 6, text=pdf.text_safe(value)[:40])
+    pdf.ln(6)
+
+
+RENDERERS = {
+    "details": _render_details,
+    "brief": _render_brief,
+    "etiketten": _render_etiketten,
+    "kalender": _render_kalender,
+}
+
+
+def render_pdf(kontakte, layout, layout_name="details", fonts=(None, None), brief_text=BRIEF_TEXT):
+    """Rendert alle Kontakte in ein PDF-Dokument und gibt die Bytes zurück."""
+    render = RENDERERS[layout_name]
+    pdf = _Document(fonts)
+    pdf.set_auto_page_break(auto=layout_name in ("details", "brief"), margin=15)
+    state = {"index": 0, "datum": date.today().strftime("%d.%m.%Y"), "brief_text": brief_text}
 
     for kontakt in kontakte:
+        render(pdf, layout, kontakt, state)
+
+    if pdf.page == 0:
         pdf.add_page()
-        
-        # --- Kontakt-Header ---
-        anrede = kontakt['daten'].get('Anrede', '')
-        titel = kontakt['daten'].get('Titel', '')
-        vorname = kontakt['daten'].get('Vorname', '')
-        nachname = kontakt['daten'].get('Nachname', '')
-        firmenname = kontakt['daten'].get('Firmenname', '')
-
-        if vorname or nachname:
-            full_name = f"{anrede} {titel} {vorname} {nachname}".strip().replace("  ", " ")
-        else:
-            full_name = firmenname
-
-        pdf.set_font("Arial", 'B', 16)
-        safe_full_name = full_name.encode('latin-1', 'replace').decode('latin-1')
-        pdf.cell(0, 10, txt=safe_full_name, ln=True, align='L')
-        pdf.line(pdf.get_x(), pdf.get_y(), pdf.get_x() + 190, pdf.get_y())
-        pdf.ln(10)
-
-        # --- Attribute in Gruppen ausgeben ---
-        for gruppe in vorlage_struktur['gruppen']:
-            has_content = any(kontakt['daten'].get(e['name']) for e in gruppe['eigenschaften'])
-
-            if has_content:
-                pdf.set_font("Arial", 'B', 12)
-                safe_group_name = gruppe['name'].encode('latin-1', 'replace').decode('latin-1')
-                pdf.cell(0, 10, txt=safe_group_name, ln=True, align='L')
-                pdf.ln(2)
-
-                for eigenschaft in gruppe['eigenschaften']:
-                    prop_name = eigenschaft['name']
-                    prop_value = str(kontakt['daten'].get(prop_name, ''))
-
-                    if prop_value:
-                        start_x = pdf.get_x()
-                        pdf.set_font("Arial", 'B', 10)
-                        safe_prop_name = prop_name.encode('latin-1', 'replace').decode('latin-1')
-                        pdf.cell(60, 8, txt=safe_prop_name, align='L')
-                        
-                        pdf.set_font("Arial", '', 10)
-                        safe_prop_value = prop_value.encode('latin-1', 'replace').decode('latin-1')
-                        value_width = pdf.w - pdf.l_margin - pdf.r_margin - 60
-                        pdf.multi_cell(value_width, 8, txt=safe_prop_value, align='L')
-                        
-                        pdf.set_x(start_x)
-                        pdf.ln(5)
-                pdf.ln(5)
-
-    return bytes(pdf.output())
\ No newline at end of file
+    return bytes(pdf.output())
+
+
+def _render_chunk(args):
+    return render_pdf(*args)
+
+
+def _chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _render_chunks(chunks, layout, layout_name, fonts, brief_text, workers):
+    """Rendert die Teil-PDFs in Reihenfolge, bei mehreren Workern parallel in Prozessen."""
+    if workers <= 1:
+        for chunk in chunks:
+            yield render_pdf(chunk, layout, layout_name, fonts, brief_text)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(_render_chunk, (chunk, layout, layout_name, fonts, brief_text)))
+            # Nur wenige Teile gleichzeitig im Speicher halten
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def generate_pdf(kontakte, vorlage_struktur, layout="details", chunk_size=None, workers=1,
+                 fonts=(None, None), brief_text=BRIEF_TEXT):
+    """
+    Erstellt die PDF-Ausgabe im gewählten Layout. Ohne `chunk_size` entsteht
+    eine einzelne Datei (Bytes), sonst ein ZIP-Archiv mit je `chunk_size`
+    Kontakten pro PDF als geöffnete temporäre Datei.
+    """
+    if layout not in RENDERERS:
+        raise ValueError(f"Unbekanntes PDF-Layout '{layout}'.")
+    pdf_layout = PdfLayout(vorlage_struktur)
+
+    if not chunk_size:
+        return render_pdf(kontakte, pdf_layout, layout, fonts, brief_text)
+
+    output = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as archive:
+        parts = _render_chunks(_chunked(kontakte, chunk_size), pdf_layout, layout,
+                               fonts, brief_text, workers)
+        for index, pdf_bytes in enumerate(parts, start=1):
+            archive.writestr(f"{pdf_layout.name}_{layout}_{index:03d}.pdf", pdf_bytes)
+    output.seek(0)
+    return output
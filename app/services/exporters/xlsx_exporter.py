@@ -1,11 +1,17 @@
 # src/exporters/xlsx_exporter.py
 import openpyxl
-import io
+import tempfile
+
+# Bis zu dieser Größe bleibt die Datei im Speicher, danach wird sie auf die Platte ausgelagert
+SPOOL_MAX_SIZE = 10 * 1024 * 1024
 
 def generate_xlsx(kontakte, eigenschaften):
-    """Erstellt eine Excel-Datei (.xlsx) im Speicher."""
-    workbook = openpyxl.Workbook()
-    sheet = workbook.active
+    """
+    Erstellt eine Excel-Datei (.xlsx) im write-only-Modus von openpyxl und
+    gibt sie als geöffnete, an den Anfang gesetzte temporäre Datei zurück.
+    """
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet()
     
     headers = [e['name'] for e in eigenschaften]
     sheet.append(headers)
@@ -14,7 +20,7 @@ def generate_xlsx(kontakte, eigenschaften):
         row = [kontakt['daten'].get(h, '') for h in headers]
         sheet.append(row)
         
-    output = io.BytesIO()
+    output = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
     workbook.save(output)
     output.seek(0)
-    return output.getvalue()
\ No newline at end of file
+    return output
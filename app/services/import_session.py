@@ -0,0 +1,124 @@
+# app/services/import_session.py
+"""
+Zwischenspeicher für Importe: Die geparsten Zeilen einer Upload-Sitzung werden
+als JSON-Lines-Datei im Upload-Ordner abgelegt und beim Abschluss des Imports
+blockweise wieder gelesen. So gehen die Daten nur einmal über die Leitung.
+"""
+import json
+import os
+import re
+import time
+import uuid
+from itertools import islice
+from flask import current_app
+
+PREVIEW_SIZE = 5
+SESSION_MAX_AGE = 24 * 60 * 60  # Sekunden
+_SESSION_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+
+class ImportSessionNotFound(Exception):
+    pass
+
+
+def _session_dir():
+    path = current_app.config["UPLOAD_FOLDER"]
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _paths(session_id):
+    if not session_id or not _SESSION_ID_RE.match(session_id):
+        raise ImportSessionNotFound("Ungültige Import-Sitzung.")
+    base = os.path.join(_session_dir(), f"import_{session_id}")
+    return base + ".jsonl", base + ".meta.json"
+
+
+class SessionWriter:
+    """Schreibt Datensätze zeilenweise in eine neue Import-Sitzung."""
+
+    def __init__(self):
+        cleanup_sessions()
+        self.session_id = uuid.uuid4().hex
+        self.rows_path, self.meta_path = _paths(self.session_id)
+        self.headers = {}
+        self.preview = []
+        self.count = 0
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self.rows_path, "w", encoding="utf-8")
+        return self
+
+    def write(self, record):
+        for key in record.keys():
+            self.headers.setdefault(key, None)
+        if len(self.preview) < PREVIEW_SIZE:
+            self.preview.append(record)
+        self._file.write(json.dumps(record, ensure_ascii=False, default=str))
+        self._file.write("\n")
+        self.count += 1
+
+    def write_many(self, records):
+        for record in records:
+            self.write(record)
+
+    def __exit__(self, exc_type, exc, tb):
+        self._file.close()
+        if exc_type is not None:
+            delete_session(self.session_id)
+            return False
+        with open(self.meta_path, "w", encoding="utf-8") as f:
+            json.dump(self.meta(), f, ensure_ascii=False, default=str)
+        return False
+
+    def meta(self):
+        return {
+            "session_id": self.session_id,
+            "headers": list(self.headers),
+            "preview_data": self.preview,
+            "total": self.count,
+        }
+
+
+def get_meta(session_id):
+    _, meta_path = _paths(session_id)
+    if not os.path.exists(meta_path):
+        raise ImportSessionNotFound("Import-Sitzung nicht gefunden oder abgelaufen.")
+    with open(meta_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def iter_batches(session_id, batch_size):
+    """Liest die Zeilen einer Sitzung als Listen von höchstens `batch_size` Einträgen."""
+    rows_path, _ = _paths(session_id)
+    if not os.path.exists(rows_path):
+        raise ImportSessionNotFound("Import-Sitzung nicht gefunden oder abgelaufen.")
+    with open(rows_path, "r", encoding="utf-8") as f:
+        rows = (json.loads(line) for line in f if line.strip())
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            yield batch
+
+
+def delete_session(session_id):
+    for path in _paths(session_id):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def cleanup_sessions(max_age=SESSION_MAX_AGE):
+    """Entfernt liegengebliebene Sitzungen, die nie abgeschlossen wurden."""
+    directory = _session_dir()
+    cutoff = time.time() - max_age
+    for filename in os.listdir(directory):
+        if not filename.startswith("import_"):
+            continue
+        path = os.path.join(directory, filename)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
@@ -1,36 +1,145 @@
 # app/services/importer_service.py
+import json
 import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from werkzeug.utils import secure_filename
 from flask import current_app
 
 # KORRIGIERTER IMPORT-PFAD: Nutzt relative Imports innerhalb des 'app'-Pakets
 from .importers import csv_importer, msg_importer, vcf_importer, xlsx_importer
 
-def import_file(file_storage):
+DEFAULT_MAX_WORKERS = 4
+
+
+def parse_file(file_path, file_ext, sheet=None):
     """
     Erkennt den Dateityp und ruft den entsprechenden Parser auf.
+    `sheet` wählt bei Excel-Dateien das Tabellenblatt.
+    """
+    if file_ext == '.csv':
+        return csv_importer.parse_csv_txt(file_path, delimiter=',')
+    elif file_ext == '.txt':
+        return csv_importer.parse_csv_txt(file_path, delimiter='\t')
+    elif file_ext == '.xlsx':
+        return xlsx_importer.parse_xlsx(file_path, sheet=sheet)
+    elif file_ext == '.vcf':
+        return vcf_importer.parse_vcf(file_path)
+    elif file_ext in ['.msg', '.oft']:
+        return msg_importer.parse_msg_file(file_path)
+    else:
+        return {"error": f"Dateityp {file_ext} wird für den Import noch nicht unterstützt."}
+
+
+def _open_records_safe(file_path, file_ext, sheet=None):
+    """
+    Öffnet den Parser einer Datei, ohne die Datensätze zu sammeln. Gibt
+    (Datensätze, Fehler) zurück; die Datensätze können ein Generator sein.
+    """
+    try:
+        data = parse_file(file_path, file_ext, sheet)
+    except Exception as e:
+        return None, str(e)
+    if isinstance(data, dict) and "error" in data:
+        return None, data["error"]
+    return data, None
+
+
+def _spool_file_safe(file_path, file_ext, sheet=None):
+    """
+    Parst eine Datei im Worker-Prozess und schreibt die Datensätze als JSON
+    Lines neben die Upload-Datei. Zurück an den Hauptprozess gehen nur
+    (Spool-Pfad, Anzahl, Fehler), nicht die Datensätze selbst.
+    """
+    records, error = _open_records_safe(file_path, file_ext, sheet)
+    if error:
+        return None, 0, error
+    spool_path = file_path + ".jsonl"
+    count = 0
+    try:
+        with open(spool_path, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False, default=str))
+                f.write("\n")
+                count += 1
+    except Exception as e:
+        return None, 0, str(e)
+    return spool_path, count, None
+
+
+def _read_spool(spool_path):
+    """Liest die Datensätze einer Spool-Datei zeilenweise (Generator)."""
+    with open(spool_path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _spool_parallel(saved, sheet):
+    """
+    Verteilt die Dateien auf einen Prozess-Pool. Liefert pro Datei
+    (Spool-Pfad, Anzahl, Fehler) in der Reihenfolge von `saved`; auch ein
+    abgestürzter Worker (BrokenProcessPool) gilt nur als Fehler der
+    betroffenen Dateien.
+    """
+    max_workers = min(
+        current_app.config.get('IMPORT_MAX_WORKERS', DEFAULT_MAX_WORKERS),
+        len(saved),
+    )
+    results = [None] * len(saved)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(_spool_file_safe, file_path, file_ext, sheet): index
+            for index, (_, file_path, file_ext) in enumerate(saved)
+        }
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                results[index] = future.result()
+            except Exception as e:
+                current_app.logger.warning(
+                    f"Import von '{saved[index][0]}' im Worker fehlgeschlagen: {e!r}"
+                )
+                results[index] = (None, 0, f"Datei konnte nicht verarbeitet werden: {e}")
+    return results
+
+
+def import_files(file_storages, sheet=None):
+    """
+    Parst mehrere hochgeladene Dateien, bei mehr als einer Datei parallel in
+    einem Prozess-Pool. Liefert pro Datei (Dateiname, Datensätze, Fehler) in
+    der Reihenfolge des Uploads; ein Fehler in einer Datei bricht die übrigen
+    nicht ab. `sheet` gilt für alle Excel-Dateien. Die Datensätze kommen als
+    Generator und müssen gelesen werden, bevor der nächste Eintrag
+    angefordert wird (danach wird die temporäre Datei gelöscht); bei mehreren
+    Dateien stammen sie aus den Spool-Dateien der Worker.
     """
-    filename = secure_filename(file_storage.filename)
-    file_ext = os.path.splitext(filename)[1].lower()
-    
     temp_dir = current_app.config['UPLOAD_FOLDER']
     os.makedirs(temp_dir, exist_ok=True)
-    file_path = os.path.join(temp_dir, filename)
-    file_storage.save(file_path)
+
+    saved = []
+    for file_storage in file_storages:
+        filename = secure_filename(file_storage.filename)
+        file_ext = os.path.splitext(filename)[1].lower()
+        # Eindeutiger Name, da mehrere Dateien gleich heißen können
+        file_path = os.path.join(temp_dir, f"{uuid.uuid4().hex}_{filename}")
+        file_storage.save(file_path)
+        saved.append((file_storage.filename, file_path, file_ext))
 
     try:
-        if file_ext == '.csv':
-            return csv_importer.parse_csv_txt(file_path, delimiter=',')
-        elif file_ext == '.txt':
-            return csv_importer.parse_csv_txt(file_path, delimiter='\t')
-        elif file_ext == '.xlsx':
-            return xlsx_importer.parse_xlsx(file_path)
-        elif file_ext == '.vcf':
-            return vcf_importer.parse_vcf(file_path)
-        elif file_ext in ['.msg', '.oft']:
-            return msg_importer.parse_msg_file(file_path)
-        else:
-            return {"error": f"Dateityp {file_ext} wird für den Import noch nicht unterstützt."}
+        if len(saved) > 1:
+            results = _spool_parallel(saved, sheet)
+            for (original_name, _, _), (spool_path, _, error) in zip(saved, results):
+                if error:
+                    yield original_name, None, error
+                else:
+                    yield original_name, _read_spool(spool_path), None
+        elif saved:
+            original_name, file_path, file_ext = saved[0]
+            records, error = _open_records_safe(file_path, file_ext, sheet)
+            yield original_name, records, error
     finally:
-        if os.path.exists(file_path):
-            os.remove(file_path)
\ No newline at end of file
+        for _, file_path, _ in saved:
+            for path in (file_path, file_path + ".jsonl"):
+                if os.path.exists(path):
+                    os.remove(path)
@@ -1,18 +1,70 @@
 # src/importers/csv_importer.py
+import codecs
 import csv
 
-def parse_csv_txt(file_path, delimiter=','):
-    """Liest CSV- oder TXT-Dateien und gibt eine Liste von Dictionaries zurück."""
-    records = []
+SNIFF_SIZE = 64 * 1024
+SNIFF_DELIMITERS = ",;\t|"
+# Typische Kodierung deutscher Excel-CSV-Dateien, wenn es kein UTF-8 ist
+FALLBACK_ENCODING = 'cp1252'
+
+
+def _fallback_decode(error):
+    """Fehlerbehandlung: ungültige UTF-8-Bytes werden als cp1252 gelesen statt verworfen."""
+    if not isinstance(error, UnicodeDecodeError):
+        raise error
+    bad = error.object[error.start:error.end]
+    return bad.decode(FALLBACK_ENCODING, errors='replace'), error.end
+
+
+codecs.register_error('kontakt_cp1252_fallback', _fallback_decode)
+
+_BOMS = [
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+
+
+def detect_encoding(sample):
+    """Bestimmt die Kodierung anhand der ersten Bytes (BOM, sonst UTF-8-Prüfung)."""
+    for bom, encoding in _BOMS:
+        if sample.startswith(bom):
+            return encoding
     try:
-        with open(file_path, mode='r', encoding='utf-8', errors='ignore') as f:
-            reader = csv.DictReader(f, delimiter=delimiter)
-            for row in reader:
-                records.append(row)
-    except Exception as e:
-        # Fallback für andere Kodierungen, falls UTF-8 fehlschlägt
-        with open(file_path, mode='r', encoding='latin-1', errors='ignore') as f:
-            reader = csv.DictReader(f, delimiter=delimiter)
-            for row in reader:
-                records.append(row)
-    return records
\ No newline at end of file
+        # final=False: ein am Ende abgeschnittenes Mehrbyte-Zeichen ist kein Fehler
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return FALLBACK_ENCODING
+
+
+def detect_delimiter(text, default):
+    """Erkennt das Trennzeichen anhand der ersten Zeilen, sonst `default`."""
+    try:
+        return csv.Sniffer().sniff(text, delimiters=SNIFF_DELIMITERS).delimiter
+    except csv.Error:
+        return default
+
+
+def parse_csv_txt(file_path, delimiter=','):
+    """
+    Liest CSV- oder TXT-Dateien zeilenweise (Generator). Kodierung und
+    Trennzeichen werden einmalig aus den ersten Kilobytes bestimmt.
+    """
+    with open(file_path, 'rb') as f:
+        sample = f.read(SNIFF_SIZE)
+    encoding = detect_encoding(sample)
+    sample_text = sample.decode(encoding, errors='ignore')
+    # Nur vollständige Zeilen an den Sniffer geben
+    if len(sample) == SNIFF_SIZE and '\n' in sample_text:
+        sample_text = sample_text[:sample_text.rindex('\n')]
+    delimiter = detect_delimiter(sample_text, delimiter)
+
+    # Taucht erst hinter der Stichprobe ein Nicht-UTF-8-Zeichen auf, wird es als
+    # cp1252 gelesen, statt es zu verschlucken
+    errors = 'kontakt_cp1252_fallback' if encoding == 'utf-8' else 'replace'
+    with open(file_path, mode='r', encoding=encoding, errors=errors, newline='') as f:
+        reader = csv.DictReader(f, delimiter=delimiter)
+        for row in reader:
+            if any(value not in (None, '') for value in row.values()):
+                yield row
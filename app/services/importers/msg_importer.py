@@ -1,42 +1,86 @@
 # src/importers/msg_importer.py
-import os
 import re
-import subprocess
-import tempfile
-import shutil
+import extract_msg
+
+# Kontakt-Eigenschaften (MAPI) und die Felder, unter denen sie importiert werden
+CONTACT_FIELDS = {
+    'Vorname': 'givenName',
+    'Nachname': 'surname',
+    'Position': 'jobTitle',
+    'Firma': 'companyName',
+    'Abteilung': 'departmentName',
+    'Telefon (geschäftlich)': 'businessTelephoneNumber',
+    'Telefon (privat)': 'homeTelephoneNumber',
+    'Mobilnummer': 'mobileTelephoneNumber',
+    'Faxnummer': 'businessFaxNumber',
+    'E-Mail': 'email1EmailAddress',
+    'Website': 'businessHomePage',
+    'Straße': 'workAddressStreet',
+    'Postleitzahl': 'workAddressPostalCode',
+    'Ort': 'workAddressLocality',
+    'Land': 'workAddressCountry',
+}
+
 
 def parse_msg_file(file_path):
     """
-    Extrahiert den Inhalt einer .msg-Datei, parst ihn und gibt die strukturierten Daten zurück.
+    Liest eine .msg/.oft-Datei direkt über die extract_msg-Bibliothek und gibt
+    die strukturierten Kontaktdaten zurück.
     """
-    temp_dir = tempfile.mkdtemp(prefix="msg_extract_")
-    
+    msg = extract_msg.openMsg(file_path, strict=False)
     try:
-        # Führe das extract_msg-Tool aus
-        subprocess.run(
-            ["python", "-m", "extract_msg", "--out", temp_dir, file_path],
-            capture_output=True, text=True, check=False
-        )
-        
-        # Finde die extrahierte message.txt
-        message_txt_path = os.path.join(temp_dir, 'message.txt')
-        if not os.path.exists(message_txt_path):
-             # Versuche es in einem Unterordner (manchmal wird einer erstellt)
-            for root, _, files in os.walk(temp_dir):
-                if 'message.txt' in files:
-                    message_txt_path = os.path.join(root, 'message.txt')
-                    break
-        
-        if not os.path.exists(message_txt_path):
-            return {"error": "Konnte 'message.txt' nicht aus der MSG-Datei extrahieren."}
-
-        with open(message_txt_path, 'r', encoding='utf-8', errors='ignore') as f:
-            text = f.read()
-        
-        return [_parse_message_text(text)] # In eine Liste packen für Konsistenz
-
+        if (msg.classType or '').startswith('IPM.Contact'):
+            data = _parse_contact(msg)
+        else:
+            # Keine Kontakt-Datei (z.B. eine Notiz): Felder aus dem Text lesen
+            data = _parse_message_text(msg.body or "")
     finally:
-        shutil.rmtree(temp_dir)
+        msg.close()
+
+    return [data] # In eine Liste packen für Konsistenz
+
+
+def _parse_contact(contact):
+    """Liest die Felder eines Outlook-Kontakts aus den MAPI-Eigenschaften."""
+    data = {field: _get_property(contact, prop) for field, prop in CONTACT_FIELDS.items()}
+
+    anrede = _get_property(contact, 'displayNamePrefix')
+    if anrede in ('Herr', 'Frau'):
+        data['Anrede'] = anrede
+
+    # Outlook legt den Ort teilweise zusammen mit der Postleitzahl ab ("10115 Berlin")
+    ort_match = re.match(r"(\d{4,5})\s+(.+)", data['Ort'])
+    if ort_match:
+        data['Postleitzahl'] = data['Postleitzahl'] or ort_match.group(1)
+        data['Ort'] = ort_match.group(2).strip()
+
+    if not data['Straße']:
+        business_address = _get_property(contact, 'workAddress')
+        if business_address:
+            _apply_address(data, business_address)
+
+    return {k: v for k, v in data.items() if v} # Nur gefüllte Felder zurückgeben
+
+
+def _get_property(msg, name):
+    """Liest eine Eigenschaft als bereinigten Text; fehlende Eigenschaften ergeben ''."""
+    try:
+        value = getattr(msg, name, None)
+    except Exception:
+        return ""
+    return value.strip() if isinstance(value, str) else ""
+
+
+def _apply_address(data, address):
+    """Zerlegt eine einzeilige Adresse ("Straße 1, 12345 Ort") in ihre Teile."""
+    address = " ".join(address.split())
+    addr_match = re.match(r"(.+?),?\s+(\d{4,5})\s+(.+)", address)
+    if addr_match:
+        data['Straße'] = addr_match.group(1).strip()
+        data['Postleitzahl'] = addr_match.group(2).strip()
+        data['Ort'] = addr_match.group(3).strip()
+    else:
+        data['Straße'] = address
 
 
 def _parse_message_text(text):
@@ -58,17 +102,11 @@ def _parse_message_text(text):
     # Adress-Parsing
     business_address = _search_field(r"Business Address:\s*(.*)", text)
     if business_address:
-        addr_match = re.match(r"(.+),\s*(\d{4,5})\s+(.+)", business_address)
-        if addr_match:
-            data['Straße'] = addr_match.group(1).strip()
-            data['Postleitzahl'] = addr_match.group(2).strip()
-            data['Ort'] = addr_match.group(3).strip()
-        else:
-            data['Straße'] = business_address
+        _apply_address(data, business_address)
 
     return {k: v for k, v in data.items() if v} # Nur gefüllte Felder zurückgeben
 
 def _search_field(pattern, text):
     """Hilfsfunktion für die Regex-Suche."""
     match = re.search(pattern, text)
-    return match.group(1).strip() if match else ""
\ No newline at end of file
+    return match.group(1).strip() if match else ""
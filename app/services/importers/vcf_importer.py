@@ -1,44 +1,148 @@
 # src/importers/vcf_importer.py
 import vobject
+from .csv_importer import SNIFF_SIZE, detect_encoding
+
+# Reihenfolge entscheidet: ein Eintrag mit TYPE=CELL,WORK wird zur Mobilnummer
+TEL_FIELDS = [
+    ("CELL", "Mobilnummer"),
+    ("FAX", "Faxnummer"),
+    ("HOME", "Telefon (privat)"),
+    ("WORK", "Telefon (geschäftlich)"),
+]
+DEFAULT_TEL_FIELD = "Telefon (geschäftlich)"
+ADR_FIELDS = [
+    ("street", "Straße"),
+    ("code", "Postleitzahl"),
+    ("city", "Ort"),
+    ("country", "Land"),
+]
+
 
 def parse_vcf(file_path):
-    """Liest eine .vcf-Datei und gibt eine Liste mit einem Kontakt-Dictionary zurück."""
-    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-        vcard_text = f.read()
-
-    try:
-        vcard = vobject.readOne(vcard_text)
-    except Exception:
-        # Manchmal haben VCFs Probleme, versuche es Zeile für Zeile
-        vcard = vobject.readOne(vcard_text, ignoreUnreadable=True)
-        
+    """
+    Liest eine .vcf-Datei Karte für Karte (Generator), so dass auch komplette
+    Adressbuch-Exporte mit tausenden Kontakten nicht am Stück im Speicher landen.
+    Die Kodierung wird wie beim CSV-Import erkannt (BOM, UTF-8, sonst cp1252),
+    so dass z.B. Outlook-Exporte mit CHARSET=Windows-1252 ihre Umlaute behalten.
+    """
+    with open(file_path, 'rb') as f:
+        encoding = detect_encoding(f.read(SNIFF_SIZE))
+    errors = 'kontakt_cp1252_fallback' if encoding == 'utf-8' else 'replace'
+    with open(file_path, 'r', encoding=encoding, errors=errors) as f:
+        for vcard in vobject.readComponents(f, ignoreUnreadable=True):
+            if vcard.name != 'VCARD':
+                continue
+            data = _parse_card(vcard)
+            if data:
+                yield data
+
+
+def _parse_card(vcard):
     data = {}
     if hasattr(vcard, 'n'):
-        data['Vorname'] = vcard.n.value.given
-        data['Nachname'] = vcard.n.value.family
+        name = vcard.n.value
+        data['Vorname'] = _text(name.given)
+        data['Nachname'] = _text(name.family)
+        prefix = _text(name.prefix)
+        if prefix in ('Herr', 'Frau'):
+            data['Anrede'] = prefix
+        elif prefix:
+            data['Titel'] = prefix
     if hasattr(vcard, 'fn'):
-        data['Name'] = vcard.fn.value
+        data['Name'] = _text(vcard.fn.value)
     if hasattr(vcard, 'org'):
-        data['Firma'] = vcard.org.value[0] if vcard.org.value else ''
+        org = vcard.org.value if isinstance(vcard.org.value, list) else [vcard.org.value]
+        data['Firma'] = _text(org[0]) if org else ''
+        if len(org) > 1:
+            data['Abteilung'] = _text(org[1])
     if hasattr(vcard, 'title'):
-        data['Position'] = vcard.title.value
-    if hasattr(vcard, 'tel'):
-        for tel in vcard.tel_list:
-            if 'WORK' in tel.type_param:
-                data['Telefon (geschäftlich)'] = tel.value
-            elif 'HOME' in tel.type_param:
-                data['Telefon (privat)'] = tel.value
-            elif 'CELL' in tel.type_param:
-                data['Mobilnummer'] = tel.value
-    if hasattr(vcard, 'email'):
-        data['E-Mail'] = vcard.email.value
+        data['Position'] = _text(vcard.title.value)
     if hasattr(vcard, 'url'):
-        data['Website'] = vcard.url.value
-    if hasattr(vcard, 'adr'):
-        addr = vcard.adr.value
-        data['Straße'] = addr.street
-        data['Ort'] = addr.city
-        data['Postleitzahl'] = addr.code
-        data['Land'] = addr.country
-        
-    return [data] # In eine Liste packen, um konsistent mit anderen Importern zu sein
\ No newline at end of file
+        data['Website'] = _text(vcard.url.value)
+    if hasattr(vcard, 'note'):
+        data['Notizen'] = _text(vcard.note.value)
+    if hasattr(vcard, 'bday'):
+        data['Geburtstag'] = _text(vcard.bday.value)
+
+    _parse_tels(vcard, data)
+    _parse_emails(vcard, data)
+    _parse_addresses(vcard, data)
+
+    return {k: v for k, v in data.items() if v} # Nur gefüllte Felder zurückgeben
+
+
+def _text(value):
+    if isinstance(value, list):
+        value = " ".join(str(v) for v in value if v)
+    return str(value or "").strip()
+
+
+def _types(prop):
+    """Typen einer Eigenschaft, egal ob als TYPE=work,voice (3.0/4.0) oder ;WORK;VOICE (2.1)."""
+    types = set()
+    for value in list(prop.params.get('TYPE', [])) + list(prop.singletonparams):
+        types.update(t.strip().upper() for t in str(value).split(','))
+    if 'PREF' in prop.params:
+        types.add('PREF')
+    return types
+
+
+def _sorted_by_pref(props):
+    """Bevorzugte Einträge (TYPE=pref) zuerst, sonst Reihenfolge der Datei."""
+    return sorted(props, key=lambda p: 'PREF' not in _types(p))
+
+
+def _parse_tels(vcard, data):
+    weitere = []
+    for tel in _sorted_by_pref(vcard.contents.get('tel', [])):
+        nummer = _text(tel.value)
+        if not nummer:
+            continue
+        types = _types(tel)
+        feld = next((f for t, f in TEL_FIELDS if t in types), DEFAULT_TEL_FIELD)
+        if data.get(feld):
+            weitere.append(nummer)
+        else:
+            data[feld] = nummer
+    if weitere:
+        data['Weitere Telefonnummern'] = ", ".join(weitere)
+
+
+def _parse_emails(vcard, data):
+    weitere = []
+    for email in _sorted_by_pref(vcard.contents.get('email', [])):
+        adresse = _text(email.value)
+        if not adresse:
+            continue
+        if 'HOME' in _types(email) and not data.get('E-Mail (privat)'):
+            data['E-Mail (privat)'] = adresse
+        elif not data.get('E-Mail'):
+            data['E-Mail'] = adresse
+        else:
+            weitere.append(adresse)
+    if weitere:
+        data['Weitere E-Mails'] = ", ".join(weitere)
+
+
+def _parse_addresses(vcard, data):
+    # Geschäftliche bzw. bevorzugte Adresse wird zur Hauptadresse, eine
+    # weitere private Adresse landet in den Feldern mit "(privat)"
+    adressen = sorted(
+        vcard.contents.get('adr', []),
+        key=lambda a: ('PREF' not in _types(a), 'HOME' in _types(a)),
+    )
+    for position, adr in enumerate(adressen):
+        if position == 0:
+            suffix = ''
+        elif 'HOME' in _types(adr) and not data.get('Straße (privat)'):
+            suffix = ' (privat)'
+        else:
+            continue
+        addr = adr.value
+        for attr, feld in ADR_FIELDS:
+            wert = getattr(addr, attr, '')
+            if isinstance(wert, list):
+                wert = ", ".join(w for w in wert if w)
+            data[feld + suffix] = ", ".join(
+                line.strip() for line in str(wert or '').splitlines() if line.strip()
+            )
@@ -1,18 +1,46 @@
 # src/importers/xlsx_importer.py
 import openpyxl
 
-def parse_xlsx(file_path):
-    """Liest eine .xlsx-Datei und gibt eine Liste von Dictionaries zurück."""
-    records = []
-    workbook = openpyxl.load_workbook(file_path)
-    sheet = workbook.active
-    
-    # Lese die Kopfzeile
-    headers = [cell.value for cell in sheet[1]]
-    
-    # Lese die Datenzeilen
-    for row in sheet.iter_rows(min_row=2, values_only=True):
-        if any(row): # Ignoriere komplett leere Zeilen
-            records.append(dict(zip(headers, row)))
-            
-    return records
\ No newline at end of file
+
+def list_sheets(file):
+    """Gibt die Namen der Tabellenblätter zurück (Pfad oder Datei-Objekt)."""
+    workbook = openpyxl.load_workbook(file, read_only=True)
+    try:
+        return list(workbook.sheetnames)
+    finally:
+        workbook.close()
+
+
+def parse_xlsx(file_path, sheet=None):
+    """
+    Liest eine .xlsx-Datei zeilenweise (Generator) im Nur-Lese-Modus, so dass
+    der Speicherbedarf unabhängig von der Dateigröße bleibt. `sheet` wählt ein
+    Tabellenblatt per Name, sonst wird das aktive Blatt gelesen.
+    """
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        if sheet:
+            if sheet not in workbook.sheetnames:
+                raise ValueError(f"Tabellenblatt '{sheet}' nicht gefunden.")
+            worksheet = workbook[sheet]
+        else:
+            worksheet = workbook.active or workbook.worksheets[0]
+
+        rows = worksheet.iter_rows(values_only=True)
+        # Die erste nicht leere Zeile ist die Kopfzeile
+        headers = None
+        for row in rows:
+            if any(cell not in (None, '') for cell in row):
+                headers = [
+                    str(cell).strip() if cell not in (None, '') else f"Spalte {i + 1}"
+                    for i, cell in enumerate(row)
+                ]
+                break
+        if headers is None:
+            return
+
+        for row in rows:
+            if any(cell not in (None, '') for cell in row): # Ignoriere komplett leere Zeilen
+                yield dict(zip(headers, row))
+    finally:
+        workbook.close()
@@ -0,0 +1,77 @@
+# app/services/jobs.py
+"""
+Einfache Hintergrund-Jobs im Anwendungsprozess. Jeder Job läuft in einem
+eigenen Thread mit App-Kontext und meldet seinen Fortschritt über ein
+`Job`-Objekt, das per ID abgefragt werden kann.
+"""
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from flask import current_app
+
+MAX_JOBS = 100
+
+_jobs = OrderedDict()
+_lock = threading.Lock()
+
+
+class Job:
+    def __init__(self, name):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.status = "pending"
+        self.total = None
+        self.processed = 0
+        self.result = None
+        self.errors = []
+        self.created = time.time()
+        self.finished = None
+
+    def progress(self, processed, total=None):
+        self.processed = processed
+        if total is not None:
+            self.total = total
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "name": self.name,
+            "status": self.status,
+            "total": self.total,
+            "processed": self.processed,
+            "result": self.result,
+            "errors": self.errors,
+        }
+
+
+def start(name, func, *args, **kwargs):
+    """Startet `func(job, *args, **kwargs)` im Hintergrund und gibt den Job zurück."""
+    app = current_app._get_current_object()
+    job = Job(name)
+    with _lock:
+        _jobs[job.id] = job
+        while len(_jobs) > MAX_JOBS:
+            _jobs.popitem(last=False)
+
+    def run():
+        with app.app_context():
+            job.status = "running"
+            try:
+                job.result = func(job, *args, **kwargs)
+                job.status = "done"
+            except Exception as e:
+                app.logger.error(f"Job '{job.name}' fehlgeschlagen: {e}\n{traceback.format_exc()}")
+                job.errors.append(str(e))
+                job.status = "failed"
+            finally:
+                job.finished = time.time()
+
+    threading.Thread(target=run, name=f"job-{name}-{job.id[:8]}", daemon=True).start()
+    return job
+
+
+def get(job_id):
+    with _lock:
+        return _jobs.get(job_id)
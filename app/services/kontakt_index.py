@@ -0,0 +1,241 @@
+# app/services/kontakt_index.py
+"""
+Hält die abfragbaren Nebentabellen von `Kontakt.daten` aktuell: die
+Feld-Werte in `kontakt_wert`, den Volltext-Index `kontakt_fts` (FTS5) sowie
+die abgeleiteten Spalten `Kontakt.display_name` und `Kontakt.sort_name`.
+
+ORM-Schreibzugriffe auf `Kontakt` werden über Mapper-Events automatisch
+erfasst. Schreibpfade, die direkt per SQL arbeiten (Bulk-Import, Bulk-Delete
+usw.), rufen `sync()` bzw. `remove()` selbst mit der aktuellen Connection auf.
+Beide erhöhen außerdem `Vorlage.daten_version` (Schlüssel des Export-Caches).
+"""
+import re
+import unicodedata
+from sqlalchemy import DDL, bindparam, event, inspect, text
+from ..models import Kontakt
+
+MAX_WERT_LAENGE = 255
+BATCH_SIZE = 500
+
+# Umlaute werden für die Suche ausgeschrieben, damit "Müller" und "Mueller"
+# denselben Begriff ergeben. Den Rest (Groß-/Kleinschreibung, Akzente wie
+# "é") übernimmt der FTS5-Tokenizer.
+UMLAUT_FOLDING = [
+    ("ä", "ae"), ("ö", "oe"), ("ü", "ue"),
+    ("Ä", "Ae"), ("Ö", "Oe"), ("Ü", "Ue"),
+    ("ß", "ss"), ("ẞ", "SS"),
+]
+
+CREATE_FTS = DDL(
+    "CREATE VIRTUAL TABLE IF NOT EXISTS kontakt_fts USING fts5("
+    "inhalt, vorlage_id UNINDEXED, tokenize = 'unicode61 remove_diacritics 2')"
+)
+# Legt den Volltext-Index auch bei `db.create_all()` an
+event.listen(Kontakt.__table__, "after_create", CREATE_FTS)
+
+# Tag-Zuordnungen sind keine abgeleiteten Daten, verschwinden aber mit dem Kontakt
+_DELETE_TAGS = text(
+    "DELETE FROM kontakt_tag WHERE kontakt_id IN :ids"
+).bindparams(bindparam("ids", expanding=True))
+
+# Neue Daten-Version für die Vorlagen der geänderten Kontakte
+_DATEN_VERSION = text(
+    "UPDATE vorlage SET daten_version = daten_version + 1 "
+    "WHERE id IN (SELECT DISTINCT vorlage_id FROM kontakt WHERE id IN :ids)"
+).bindparams(bindparam("ids", expanding=True))
+_DATEN_VERSION_VORLAGEN = text(
+    "UPDATE vorlage SET daten_version = daten_version + 1 WHERE id IN :ids"
+).bindparams(bindparam("ids", expanding=True))
+_DATEN_VERSION_ALLE = text("UPDATE vorlage SET daten_version = daten_version + 1")
+
+_DELETE_WERTE = text(
+    "DELETE FROM kontakt_wert WHERE kontakt_id IN :ids"
+).bindparams(bindparam("ids", expanding=True))
+
+# Zerlegt das JSON direkt in SQLite, so dass kein Kontakt nach Python geladen wird.
+_INSERT_WERTE_SQL = f"""
+    INSERT INTO kontakt_wert (kontakt_id, name, wert)
+    SELECT k.id, j.key, CAST(j.value AS TEXT)
+    FROM kontakt AS k, json_each(k.daten) AS j
+    WHERE j.type NOT IN ('null', 'object', 'array')
+      AND CAST(j.value AS TEXT) != ''
+      AND length(CAST(j.value AS TEXT)) <= {MAX_WERT_LAENGE}
+"""
+_INSERT_WERTE = text(_INSERT_WERTE_SQL + " AND k.id IN :ids").bindparams(
+    bindparam("ids", expanding=True)
+)
+
+
+def _fold_sql(expr):
+    for umlaut, ersatz in UMLAUT_FOLDING:
+        expr = f"replace({expr}, '{umlaut}', '{ersatz}')"
+    return expr
+
+
+def fold(wert):
+    """Schreibt Umlaute aus (gleiche Regeln wie im Volltext-Index)."""
+    for umlaut, ersatz in UMLAUT_FOLDING:
+        wert = wert.replace(umlaut, ersatz)
+    return wert
+
+
+def anzeige_name(name=None, vorname=None, nachname=None, firma=None):
+    """
+    Anzeigename und Sortiergrundlage eines Kontakts: "Name", sonst
+    "Vorname Nachname" (sortiert nach Nachname), sonst "Firmenname".
+    """
+    name, vorname, nachname, firma = (
+        " ".join(str(w).split()) if w is not None else "" for w in (name, vorname, nachname, firma)
+    )
+    if name:
+        return name, name
+    if vorname or nachname:
+        return f"{vorname} {nachname}".strip(), f"{nachname} {vorname}".strip()
+    return firma, firma
+
+
+def sortier_schluessel(wert):
+    """
+    Normalisierter Schlüssel für Sortierung und Präfixsuche nach DIN 5007-2
+    (Namenslisten): Umlaute ausgeschrieben, ohne Akzente, ohne Groß-/Kleinschreibung.
+    """
+    wert = unicodedata.normalize("NFKD", fold(unicodedata.normalize("NFC", wert or "")))
+    wert = "".join(c for c in wert if not unicodedata.combining(c))
+    return " ".join(wert.casefold().split())[:MAX_WERT_LAENGE]
+
+
+_NAMEN_LESEN = text(
+    "SELECT id, display_name, sort_name, json_extract(daten, '$.Name'), "
+    "json_extract(daten, '$.Vorname'), json_extract(daten, '$.Nachname'), "
+    "json_extract(daten, '$.Firmenname') FROM kontakt WHERE id IN :ids"
+).bindparams(bindparam("ids", expanding=True))
+_NAMEN_SCHREIBEN = text(
+    "UPDATE kontakt SET display_name = :anzeige, sort_name = :sortierung WHERE id = :kontakt_id"
+)
+
+
+def _namen_aktualisieren(connection, batch):
+    """Berechnet Anzeigename und Sortierschlüssel neu; unveränderte Zeilen bleiben unberührt."""
+    geaendert = []
+    for kontakt_id, anzeige_alt, sortierung_alt, *felder in connection.execute(
+        _NAMEN_LESEN, {"ids": batch}
+    ):
+        anzeige, basis = anzeige_name(*felder)
+        anzeige = anzeige[:MAX_WERT_LAENGE]
+        sortierung = sortier_schluessel(basis)
+        if (anzeige, sortierung) != (anzeige_alt, sortierung_alt):
+            geaendert.append({"kontakt_id": kontakt_id, "anzeige": anzeige, "sortierung": sortierung})
+    if geaendert:
+        connection.execute(_NAMEN_SCHREIBEN, geaendert)
+
+
+_DELETE_FTS = text(
+    "DELETE FROM kontakt_fts WHERE rowid IN :ids"
+).bindparams(bindparam("ids", expanding=True))
+
+# Ein Dokument pro Kontakt aus allen Feld-Werten. Enthält der Text Umlaute,
+# wird zusätzlich das Original indexiert, damit auch "Muller" noch trifft.
+_INSERT_FTS_SQL = f"""
+    INSERT INTO kontakt_fts (rowid, inhalt, vorlage_id)
+    SELECT id, CASE WHEN gefaltet = roh THEN roh ELSE gefaltet || ' ' || roh END, vorlage_id
+    FROM (
+        SELECT id, vorlage_id, roh, {_fold_sql("roh")} AS gefaltet
+        FROM (
+            SELECT k.id AS id, k.vorlage_id AS vorlage_id,
+                   group_concat(CAST(j.value AS TEXT), ' ') AS roh
+            FROM kontakt AS k, json_each(k.daten) AS j
+            WHERE j.type NOT IN ('null', 'object', 'array') {{bedingung}}
+            GROUP BY k.id
+        )
+    )
+"""
+_INSERT_FTS = text(_INSERT_FTS_SQL.format(bedingung="AND k.id IN :ids")).bindparams(
+    bindparam("ids", expanding=True)
+)
+
+
+def fts_query(suchtext):
+    """
+    Übersetzt eine Benutzereingabe in eine FTS5-Abfrage: jedes Wort als
+    Präfix, alle Wörter müssen vorkommen. Gibt None zurück, wenn nichts
+    Suchbares übrig bleibt.
+    """
+    woerter = re.findall(r"\w+", fold(suchtext or ""))
+    if not woerter:
+        return None
+    return " ".join(f'"{wort}"*' for wort in woerter)
+
+
+def ist_indexierbar(wert):
+    """Prüft, ob ein Filterwert in `kontakt_wert` gesucht werden kann."""
+    return wert is not None and 0 < len(str(wert)) <= MAX_WERT_LAENGE
+
+
+def _batches(ids):
+    ids = list(ids)
+    for start in range(0, len(ids), BATCH_SIZE):
+        yield ids[start:start + BATCH_SIZE]
+
+
+def sync(connection, kontakt_ids):
+    """Baut die Index-Einträge für die angegebenen Kontakte neu auf."""
+    for batch in _batches(kontakt_ids):
+        connection.execute(_DELETE_WERTE, {"ids": batch})
+        connection.execute(_INSERT_WERTE, {"ids": batch})
+        connection.execute(_DELETE_FTS, {"ids": batch})
+        connection.execute(_INSERT_FTS, {"ids": batch})
+        _namen_aktualisieren(connection, batch)
+        connection.execute(_DATEN_VERSION, {"ids": batch})
+
+
+def daten_geaendert(connection, vorlage_ids=None):
+    """Erhöht die Daten-Version der Vorlagen (ohne `vorlage_ids`: aller Vorlagen)."""
+    if vorlage_ids is None:
+        connection.execute(_DATEN_VERSION_ALLE)
+    elif vorlage_ids:
+        connection.execute(_DATEN_VERSION_VORLAGEN, {"ids": list(vorlage_ids)})
+
+
+def remove(connection, kontakt_ids, vorlage_ids=None):
+    """
+    Entfernt die Index-Einträge und Tag-Zuordnungen gelöschter Kontakte. Da
+    die Kontakte schon gelöscht sind, wird ohne `vorlage_ids` die
+    Daten-Version aller Vorlagen erhöht.
+    """
+    kontakt_ids = list(kontakt_ids)
+    for batch in _batches(kontakt_ids):
+        connection.execute(_DELETE_WERTE, {"ids": batch})
+        connection.execute(_DELETE_FTS, {"ids": batch})
+        connection.execute(_DELETE_TAGS, {"ids": batch})
+    if kontakt_ids:
+        daten_geaendert(connection, vorlage_ids)
+
+
+def rebuild(connection):
+    """Baut den gesamten Index neu auf (z.B. nach einer Migration)."""
+    connection.execute(text("DELETE FROM kontakt_wert"))
+    connection.execute(text(_INSERT_WERTE_SQL))
+    connection.execute(text("DELETE FROM kontakt_fts"))
+    connection.execute(text(_INSERT_FTS_SQL.format(bedingung="")))
+    ids = connection.execute(text("SELECT id FROM kontakt")).scalars().all()
+    for batch in _batches(ids):
+        _namen_aktualisieren(connection, batch)
+
+
+@event.listens_for(Kontakt, "after_insert")
+def _kontakt_eingefuegt(mapper, connection, target):
+    sync(connection, [target.id])
+
+
+@event.listens_for(Kontakt, "after_update")
+def _kontakt_geaendert(mapper, connection, target):
+    attrs = inspect(target).attrs
+    if attrs.daten.history.has_changes() or attrs.vorlage_id.history.has_changes():
+        sync(connection, [target.id])
+        # Beim Verschieben ändert sich auch die bisherige Vorlage
+        daten_geaendert(connection, [v for v in attrs.vorlage_id.history.deleted if v])
+
+
+@event.listens_for(Kontakt, "after_delete")
+def _kontakt_geloescht(mapper, connection, target):
+    remove(connection, [target.id], [target.vorlage_id])
@@ -0,0 +1,360 @@
+# app/services/kontakt_service.py
+import base64
+import json
+from sqlalchemy import Integer, func, or_, and_, select, text, update
+from ..models import db, Kontakt, KontaktWert
+from .. import instrumentation
+from . import kontakt_index, tag_service
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+DEFAULT_SEARCH_LIMIT = 20
+
+
+class UpdateConflict(Exception):
+    """Mindestens ein Kontakt fehlt oder wurde zwischenzeitlich geändert."""
+
+    def __init__(self, conflicts):
+        super().__init__("Kontakte wurden zwischenzeitlich geändert oder gelöscht.")
+        self.conflicts = conflicts
+
+
+def json_path(feld_name):
+    """Erzeugt den JSON-Pfad für ein Feld in `Kontakt.daten` (z.B. '$."E-Mail"')."""
+    return '$."' + feld_name.replace('"', '\\"') + '"'
+
+
+def feld_ausdruck(feld_name):
+    """SQL-Ausdruck, der den Wert eines Feldes direkt in SQLite ausliest."""
+    return func.json_extract(Kontakt.daten, json_path(feld_name))
+
+
+def encode_cursor(sort_wert, kontakt_id):
+    raw = json.dumps([sort_wert, kontakt_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor):
+    """Liest einen Cursor wieder aus. Ungültige Cursor lösen einen ValueError aus."""
+    try:
+        sort_wert, kontakt_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except Exception:
+        raise ValueError("Ungültiger Cursor.")
+    return sort_wert, int(kontakt_id)
+
+
+def feld_gleich(feld_name, wert):
+    """
+    Bedingung "Feld = Wert" für Kontakt-Abfragen. Kurze Werte werden über den
+    Index auf `kontakt_wert` gesucht, nur überlange Werte direkt im JSON.
+    """
+    if kontakt_index.ist_indexierbar(wert):
+        treffer = select(KontaktWert.kontakt_id).where(
+            KontaktWert.name == feld_name, KontaktWert.wert == str(wert)
+        )
+        return Kontakt.id.in_(treffer)
+    return feld_ausdruck(feld_name) == wert
+
+
+def apply_filters(query, filters):
+    """Schränkt eine Kontakt-Abfrage auf exakte Feldwerte ein (z.B. {"Status": "Fehler"})."""
+    for feld_name, wert in (filters or {}).items():
+        if wert is None or wert == "":
+            continue
+        query = query.filter(feld_gleich(feld_name, wert))
+    return query
+
+
+def volltext_treffer(suchtext):
+    """Bedingung "Kontakt passt zum Suchtext" über den Volltext-Index (oder None)."""
+    query = kontakt_index.fts_query(suchtext)
+    if query is None:
+        return None
+    treffer = text(
+        "SELECT rowid FROM kontakt_fts WHERE kontakt_fts MATCH :fts_query"
+    ).bindparams(fts_query=query).columns(rowid=Integer)
+    return Kontakt.id.in_(treffer)
+
+
+def auswahl(vorlage_id, filters=None, q=None, tags=None):
+    """Kontakt-Abfrage für eine Vorlage mit Feld-Filtern, Suchtext und Tags."""
+    query = apply_filters(Kontakt.query.filter(Kontakt.vorlage_id == vorlage_id), filters)
+    suche = volltext_treffer(q)
+    if suche is not None:
+        query = query.filter(suche)
+    tag_bedingung = tag_service.mit_allen_tags(tags)
+    if tag_bedingung is not None:
+        query = query.filter(tag_bedingung)
+    return query
+
+
+def vorlagen_von(kontakt_ids, vorlage_id=None):
+    """IDs der Vorlagen, zu denen die Kontakte gehören (oder nur `vorlage_id`)."""
+    if kontakt_ids is None:
+        return [vorlage_id] if vorlage_id is not None else []
+    return [
+        v for (v,) in db.session.query(Kontakt.vorlage_id)
+        .filter(Kontakt.id.in_(list(kontakt_ids))).distinct()
+    ]
+
+
+def list_kontakte(vorlage_id, filters=None, sort=None, order="asc", fields=None,
+                  cursor=None, limit=DEFAULT_PAGE_SIZE, q=None, tags=None):
+    """
+    Liefert eine Seite von Kontakten einer Vorlage. Filter, Suchtext, Tags
+    (alle müssen zutreffen), Sortierung und die Spaltenauswahl werden
+    vollständig in SQLite ausgewertet, geblättert wird per Keyset-Cursor über
+    (Sortierwert, ID), damit jede Seite gleich schnell ist.
+    """
+    limit = max(1, min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+    descending = order == "desc"
+
+    base_query = auswahl(vorlage_id, filters=filters, q=q, tags=tags)
+
+    sort_key = func.coalesce(feld_ausdruck(sort), "") if sort else None
+
+    columns = [Kontakt.id, Kontakt.version]
+    if sort_key is not None:
+        columns.append(sort_key.label("sort_key"))
+    if fields:
+        columns.extend(feld_ausdruck(f) for f in fields)
+    else:
+        columns.append(Kontakt.daten)
+
+    query = base_query.with_entities(*columns)
+
+    if cursor:
+        last_value, last_id = decode_cursor(cursor)
+        if sort_key is not None:
+            if descending:
+                query = query.filter(or_(sort_key < last_value,
+                                         and_(sort_key == last_value, Kontakt.id < last_id)))
+            else:
+                query = query.filter(or_(sort_key > last_value,
+                                         and_(sort_key == last_value, Kontakt.id > last_id)))
+        else:
+            query = query.filter(Kontakt.id < last_id if descending else Kontakt.id > last_id)
+
+    if sort_key is not None:
+        query = query.order_by(sort_key.desc() if descending else sort_key.asc(),
+                               Kontakt.id.desc() if descending else Kontakt.id.asc())
+    else:
+        query = query.order_by(Kontakt.id.desc() if descending else Kontakt.id.asc())
+
+    # Eine Zeile mehr laden, um zu wissen, ob es eine weitere Seite gibt
+    rows = query.limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    instrumentation.zeilen_geladen(len(rows))
+
+    value_offset = 3 if sort_key is not None else 2
+    tags_je_kontakt = tag_service.tags_fuer(row[0] for row in rows)
+    kontakte = []
+    for row in rows:
+        if fields:
+            daten = {f: row[value_offset + i] for i, f in enumerate(fields) if row[value_offset + i] is not None}
+        else:
+            daten = instrumentation.json_loads(row[value_offset] or "{}")
+        kontakte.append({
+            "id": row[0],
+            "version": row[1],
+            "daten": daten,
+            "tags": tags_je_kontakt.get(row[0], []),
+        })
+
+    next_cursor = None
+    if has_more and rows:
+        last = rows[-1]
+        next_cursor = encode_cursor(last[2] if sort_key is not None else None, last[0])
+
+    result = {"kontakte": kontakte, "next_cursor": next_cursor}
+    if not cursor:
+        # Die Gesamtzahl wird nur für die erste Seite ermittelt
+        result["total"] = base_query.count()
+    return result
+
+
+_SEARCH_SQL = """
+    SELECT k.id, k.vorlage_id, k.version, k.daten, kontakt_fts.rank
+    FROM kontakt_fts JOIN kontakt AS k ON k.id = kontakt_fts.rowid
+    WHERE kontakt_fts MATCH :fts_query {bedingung}
+    ORDER BY kontakt_fts.rank
+    LIMIT :limit
+"""
+
+
+def search_kontakte(suchtext, vorlage_id=None, limit=DEFAULT_SEARCH_LIMIT):
+    """
+    Volltextsuche über alle Feld-Werte, nach Relevanz (BM25) sortiert. Jedes
+    Wort wird als Präfix gesucht, Umlaute und Schreibweisen wie "ue" gelten
+    als gleich. Nur die Trefferzeilen werden geladen.
+    """
+    limit = max(1, min(limit or DEFAULT_SEARCH_LIMIT, MAX_PAGE_SIZE))
+    query = kontakt_index.fts_query(suchtext)
+    if query is None:
+        return []
+
+    params = {"fts_query": query, "limit": limit}
+    bedingung = ""
+    if vorlage_id is not None:
+        bedingung = "AND kontakt_fts.vorlage_id = :vorlage_id"
+        params["vorlage_id"] = vorlage_id
+    rows = db.session.execute(text(_SEARCH_SQL.format(bedingung=bedingung)), params).all()
+    instrumentation.zeilen_geladen(len(rows))
+    return [
+        {
+            "id": row.id,
+            "vorlage_id": row.vorlage_id,
+            "version": row.version,
+            "daten": instrumentation.json_loads(row.daten or "{}"),
+            "rank": row.rank,
+        }
+        for row in rows
+    ]
+
+
+def anzeige(kontakt_id, display_name):
+    return display_name or f"Kontakt ID: {kontakt_id}"
+
+
+def namen_liste(vorlage_id):
+    """Alle Kontakte einer Vorlage als [{id, display_name}], nach `sort_name` sortiert."""
+    rows = db.session.execute(
+        select(Kontakt.id, Kontakt.display_name)
+        .where(Kontakt.vorlage_id == vorlage_id)
+        # Kontakte ohne Namen zuletzt
+        .order_by(Kontakt.sort_name == "", Kontakt.sort_name, Kontakt.id)
+    )
+    return [{"id": kontakt_id, "display_name": anzeige(kontakt_id, name)} for kontakt_id, name in rows]
+
+
+def suggest(vorlage_id, q, limit=DEFAULT_SEARCH_LIMIT):
+    """
+    Kontakte, deren Sortierschlüssel mit `q` beginnt (Nachname, Name oder
+    Firmenname; Umlaute und Groß-/Kleinschreibung wie beim Sortieren). Die
+    Abfrage ist ein Bereich auf dem Index (vorlage_id, sort_name).
+    """
+    limit = max(1, min(limit or DEFAULT_SEARCH_LIMIT, MAX_PAGE_SIZE))
+    praefix = kontakt_index.sortier_schluessel(q)
+    query = select(Kontakt.id, Kontakt.display_name).where(Kontakt.vorlage_id == vorlage_id)
+    if praefix:
+        # Größtes Unicode-Zeichen als Obergrenze: alle Schlüssel mit diesem Präfix
+        query = query.where(Kontakt.sort_name >= praefix, Kontakt.sort_name < praefix + "\U0010ffff")
+    else:
+        query = query.where(Kontakt.sort_name != "")
+    rows = db.session.execute(query.order_by(Kontakt.sort_name, Kontakt.id).limit(limit))
+    return [{"id": kontakt_id, "display_name": anzeige(kontakt_id, name)} for kontakt_id, name in rows]
+
+
+def json_wert(value):
+    """Bereitet einen Python-Wert so auf, dass json_set ihn mit passendem JSON-Typ speichert."""
+    if isinstance(value, (dict, list, bool)):
+        return func.json(json.dumps(value, ensure_ascii=False))
+    return value
+
+
+def update_fields(operations):
+    """
+    Setzt einzelne Felder mehrerer Kontakte in einer Transaktion per `json_set`,
+    ohne die übrigen Felder anzufassen. `operations` ist eine Liste von
+    {"id", "field", "value"} mit optionaler "version"; weicht die Version eines
+    Kontakts ab, wird nichts gespeichert und `UpdateConflict` ausgelöst.
+    Gibt die neuen Versionen als {kontakt_id: version} zurück.
+    """
+    per_kontakt = {}
+    for op in operations:
+        entry = per_kontakt.setdefault(int(op["id"]), {"fields": {}, "version": None})
+        entry["fields"][op["field"]] = op.get("value")
+        if op.get("version") is not None:
+            entry["version"] = int(op["version"])
+
+    versions = {}
+    conflicts = []
+    for kontakt_id, entry in per_kontakt.items():
+        set_args = []
+        for feld_name, wert in entry["fields"].items():
+            set_args.extend([json_path(feld_name), json_wert(wert)])
+
+        stmt = (
+            update(Kontakt)
+            .where(Kontakt.id == kontakt_id)
+            .values(daten=func.json_set(Kontakt.daten, *set_args), version=Kontakt.version + 1)
+            .returning(Kontakt.version)
+            .execution_options(synchronize_session=False)
+        )
+        if entry["version"] is not None:
+            stmt = stmt.where(Kontakt.version == entry["version"])
+
+        new_version = db.session.execute(stmt).scalar()
+        if new_version is None:
+            current = db.session.query(Kontakt.version).filter(Kontakt.id == kontakt_id).scalar()
+            conflicts.append({
+                "id": kontakt_id,
+                "reason": "not_found" if current is None else "version",
+                "version": current,
+            })
+        else:
+            versions[kontakt_id] = new_version
+
+    if conflicts:
+        db.session.rollback()
+        raise UpdateConflict(conflicts)
+
+    kontakt_index.sync(db.session.connection(), list(versions))
+    db.session.commit()
+    return versions
+
+
+def _weicht_ab(zuweisungen):
+    """
+    Bedingung "mindestens ein Feld hat noch nicht den neuen Wert", damit
+    unveränderte Kontakte keine neue Version bekommen. Nur für Text und Zahlen;
+    bei anderen Werten (None, bool, Listen, Objekte) wird None geliefert.
+    """
+    bedingungen = []
+    for feld_name, wert in zuweisungen.items():
+        if isinstance(wert, bool) or not isinstance(wert, (str, int, float)):
+            return None
+        bedingungen.append(feld_ausdruck(feld_name).is_distinct_from(wert))
+    return or_(*bedingungen)
+
+
+def bulk_update(zuweisungen, ids=None, vorlage_id=None, filters=None, q=None, tags=None):
+    """
+    Setzt dieselben Feldwerte ({feld: wert}) bei vielen Kontakten in einer
+    Transaktion per `json_set`. Ausgewählt wird entweder über `ids` oder wie
+    in `list_kontakte` über Vorlage, Filter, Suchtext und Tags, ohne die
+    Kontakte zu laden. Kontakte, die bereits alle Werte haben, bleiben
+    unverändert. Gibt die Anzahl der geänderten Kontakte zurück.
+    """
+    set_args = []
+    for feld_name, wert in zuweisungen.items():
+        set_args.extend([json_path(feld_name), json_wert(wert)])
+    abweichend = _weicht_ab(zuweisungen)
+
+    if ids is not None:
+        ids = list(dict.fromkeys(int(i) for i in ids))
+        bedingungen = [
+            Kontakt.id.in_(ids[i:i + kontakt_index.BATCH_SIZE])
+            for i in range(0, len(ids), kontakt_index.BATCH_SIZE)
+        ]
+    else:
+        treffer = auswahl(vorlage_id, filters=filters, q=q, tags=tags).with_entities(Kontakt.id)
+        bedingungen = [Kontakt.id.in_(treffer.subquery().select())]
+
+    geaendert = []
+    for bedingung in bedingungen:
+        stmt = (
+            update(Kontakt)
+            .where(bedingung)
+            .values(daten=func.json_set(Kontakt.daten, *set_args), version=Kontakt.version + 1)
+            .returning(Kontakt.id)
+            .execution_options(synchronize_session=False)
+        )
+        if abweichend is not None:
+            stmt = stmt.where(abweichend)
+        geaendert.extend(db.session.execute(stmt).scalars())
+
+    kontakt_index.sync(db.session.connection(), geaendert)
+    db.session.commit()
+    return len(geaendert)
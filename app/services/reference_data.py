@@ -0,0 +1,84 @@
+# app/services/reference_data.py
+"""
+Zwischenspeicher für die Referenzdaten in `data/` (Auswahllisten und
+Attribut-Vorschläge). Der Inhalt wird einmal gelesen und samt ETag im Speicher
+gehalten; ein `os.stat` pro Zugriff erkennt Änderungen durch andere Prozesse.
+Schreiben läuft unter einer Sperre über eine temporäre Datei plus `os.replace`,
+so dass Leser nie eine halb geschriebene Datei sehen.
+"""
+import hashlib
+import json
+import os
+import stat
+import tempfile
+import threading
+from datetime import datetime, timezone
+from flask import current_app
+
+
+class ReferenzDatei:
+    """Eine JSON-Datei in `data/` mit Inhalt, ETag und Änderungszeit im Speicher."""
+
+    def __init__(self, filename, default):
+        self.filename = filename
+        self.default = default
+        self._lock = threading.Lock()
+        self._stand = None  # (mtime_ns, body, etag, last_modified)
+
+    def pfad(self):
+        """Absoluter Pfad der Datei."""
+        return os.path.join(current_app.root_path, "..", "data", self.filename)
+
+    def _laden(self, pfad):
+        try:
+            mtime_ns = os.stat(pfad).st_mtime_ns
+        except FileNotFoundError:
+            body = json.dumps(self.default, ensure_ascii=False).encode("utf-8")
+            return (None, body, hashlib.sha1(body).hexdigest(), None)
+        stand = self._stand
+        if stand is not None and stand[0] == mtime_ns:
+            return stand
+        with open(pfad, "rb") as f:
+            body = f.read()
+        last_modified = datetime.fromtimestamp(mtime_ns / 1e9, tz=timezone.utc)
+        stand = (mtime_ns, body, hashlib.sha1(body).hexdigest(), last_modified)
+        self._stand = stand
+        return stand
+
+    def get(self):
+        """Liefert (body, etag, last_modified) des aktuellen Inhalts."""
+        _, body, etag, last_modified = self._laden(self.pfad())
+        return body, etag, last_modified
+
+    def daten(self):
+        """Der aktuelle Inhalt als Python-Objekt."""
+        return json.loads(self.get()[0].decode("utf-8"))
+
+    def schreiben(self, daten):
+        """Schreibt den Inhalt atomar und verwirft den Zwischenspeicher."""
+        pfad = self.pfad()
+        body = json.dumps(daten, ensure_ascii=False, indent=2) + "\n"
+        with self._lock:
+            fd, temp_pfad = tempfile.mkstemp(
+                dir=os.path.dirname(pfad), prefix=f".{self.filename}.", suffix=".tmp"
+            )
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    f.write(body)
+                    f.flush()
+                    os.fsync(f.fileno())
+                # mkstemp legt die Datei mit 0600 an; Rechte der alten Datei übernehmen
+                try:
+                    os.chmod(temp_pfad, stat.S_IMODE(os.stat(pfad).st_mode))
+                except FileNotFoundError:
+                    os.chmod(temp_pfad, 0o644)
+                os.replace(temp_pfad, pfad)
+            except BaseException:
+                if os.path.exists(temp_pfad):
+                    os.remove(temp_pfad)
+                raise
+            self._stand = None
+
+
+selection_options = ReferenzDatei("selection_options.json", {"options": []})
+attribute_suggestions = ReferenzDatei("attribute_suggestions.json", {"categories": []})
@@ -0,0 +1,129 @@
+# app/services/schema_registry.py
+"""
+Zwischenspeicher für die Struktur der Vorlagen (Gruppen und Eigenschaften).
+
+Die verschachtelten Schemas werden einmal aufgebaut und samt fertig
+serialisiertem JSON im Prozess gehalten. Schlüssel ist die Vorlagen-ID plus
+`Vorlage.schema_version`; ändert sich der Stempel (auch in einem anderen
+Prozess), wird das Schema beim nächsten Zugriff neu geladen. `vorlagen.speichern`
+und `vorlagen.loeschen` verwerfen den Eintrag zusätzlich sofort.
+"""
+import json
+import threading
+from sqlalchemy.orm import subqueryload
+from ..models import db, Vorlage, Gruppe
+
+_cache = {}       # vorlage_id -> VorlageSchema
+_listen = {}      # Stempel aller Vorlagen -> JSON-Liste für die Kontaktübersicht
+_lock = threading.Lock()
+
+
+class VorlageSchema:
+    """Unveränderliche Sicht auf eine Vorlage mit vorberechneten JSON-Fragmenten."""
+
+    def __init__(self, vorlage):
+        self.id = vorlage.id
+        self.name = vorlage.name
+        self.is_standard = vorlage.is_standard
+        self.version = vorlage.schema_version
+        self.gruppen = [
+            {
+                "id": g.id,
+                "name": g.name,
+                "eigenschaften": [
+                    {"id": e.id, "name": e.name, "datentyp": e.datentyp, "optionen": e.optionen}
+                    for e in g.eigenschaften
+                ],
+            }
+            for g in vorlage.gruppen
+        ]
+        self.eigenschaften = [e for g in self.gruppen for e in g["eigenschaften"]]
+        self.feld_namen = [e["name"] for e in self.eigenschaften]
+
+        # Struktur, wie sie die Exporter erwarten
+        self.export_struktur = {
+            "name": self.name,
+            "gruppen": [
+                {"name": g["name"], "eigenschaften": [{"name": e["name"]} for e in g["eigenschaften"]]}
+                for g in self.gruppen
+            ],
+        }
+        # Kontaktübersicht (kontakte.auflisten)
+        self.liste_json = json.dumps({
+            "id": self.id,
+            "name": self.name,
+            "eigenschaften": self.eigenschaften,
+            "gruppen": self.gruppen,
+        })
+        # Kontakt-Editor (kontakte.editor)
+        self.editor_json = json.dumps({"id": self.id, "name": self.name, "gruppen": self.gruppen})
+        # Vorlagen-Editor (vorlagen.editor); die IDs braucht das differenzielle Speichern
+        self.vorlagen_editor_json = json.dumps({
+            "id": self.id,
+            "name": self.name,
+            "is_standard": self.is_standard,
+            "gruppen": self.gruppen,
+        })
+
+
+def _laden(vorlage_ids):
+    """Lädt die Vorlagen samt Gruppen und Eigenschaften in drei Abfragen und legt sie ab."""
+    vorlagen = (
+        Vorlage.query.options(subqueryload(Vorlage.gruppen).subqueryload(Gruppe.eigenschaften))
+        .filter(Vorlage.id.in_(vorlage_ids))
+        .all()
+    )
+    schemas = {v.id: VorlageSchema(v) for v in vorlagen}
+    with _lock:
+        _cache.update(schemas)
+    return schemas
+
+
+def get(vorlage_id):
+    """Schema einer Vorlage oder None, wenn es sie nicht gibt."""
+    version = db.session.query(Vorlage.schema_version).filter(Vorlage.id == vorlage_id).scalar()
+    if version is None:
+        invalidate(vorlage_id)
+        return None
+    schema = _cache.get(vorlage_id)
+    if schema is None or schema.version != version:
+        schema = _laden([vorlage_id]).get(vorlage_id)
+    return schema
+
+
+def get_all():
+    """Schemas aller Vorlagen, nach Name sortiert. Nur geänderte werden neu geladen."""
+    stempel = (
+        db.session.query(Vorlage.id, Vorlage.schema_version).order_by(Vorlage.name).all()
+    )
+    fehlend = [
+        vorlage_id for vorlage_id, version in stempel
+        if vorlage_id not in _cache or _cache[vorlage_id].version != version
+    ]
+    schemas = dict(_cache)
+    if fehlend:
+        schemas.update(_laden(fehlend))
+    return [schemas[vorlage_id] for vorlage_id, _ in stempel if vorlage_id in schemas]
+
+
+def liste_json():
+    """Fertiges JSON-Array aller Vorlagen für die Kontaktübersicht."""
+    schemas = get_all()
+    key = tuple((s.id, s.version) for s in schemas)
+    cached = _listen.get(key)
+    if cached is None:
+        cached = "[" + ",".join(s.liste_json for s in schemas) + "]"
+        with _lock:
+            _listen.clear()
+            _listen[key] = cached
+    return cached
+
+
+def invalidate(vorlage_id=None):
+    """Verwirft das Schema einer Vorlage (oder aller Vorlagen)."""
+    with _lock:
+        if vorlage_id is None:
+            _cache.clear()
+        else:
+            _cache.pop(vorlage_id, None)
+        _listen.clear()
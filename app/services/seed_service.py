@@ -0,0 +1,111 @@
+# app/services/seed_service.py
+"""
+Spielt die Vorlagen aus `data/standard_vorlagen` und `data/user_vorlagen`
+sowie die Tags aus `tags.json` in die Datenbank ein. Pro Datei wird ein
+SHA-256 des Inhalts in `seed_datei` gemerkt; unveränderte Dateien werden
+übersprungen, geänderte als Differenz (siehe `vorlage_service.apply_structure`
+bzw. `tag_service.apply_tags`) übernommen.
+"""
+import hashlib
+import json
+import os
+from ..models import db, Vorlage, SeedDatei
+from . import vorlage_service, schema_registry, tag_service
+
+# Unterordner von data/ -> is_standard
+SEED_ORDNER = [
+    ("standard_vorlagen", True),
+    ("user_vorlagen", False),
+]
+TAG_DATEI = "tags.json"
+
+
+def projekt_pfad(app):
+    """Projektverzeichnis (enthält `data/` und `tags.json`)."""
+    return os.path.normpath(os.path.join(app.root_path, ".."))
+
+
+def seed_dateien(projekt_dir):
+    """Liefert (relativer Pfad, absoluter Pfad, Anwenden-Funktion) aller Seed-Dateien."""
+    for ordner, is_standard in SEED_ORDNER:
+        pfad = os.path.join(projekt_dir, "data", ordner)
+        if not os.path.isdir(pfad):
+            continue
+        for filename in sorted(os.listdir(pfad)):
+            if filename.endswith(".json"):
+                anwenden = _vorlage_standard if is_standard else _vorlage_user
+                yield f"{ordner}/{filename}", os.path.join(pfad, filename), anwenden
+    tag_pfad = os.path.join(projekt_dir, TAG_DATEI)
+    if os.path.isfile(tag_pfad):
+        yield TAG_DATEI, tag_pfad, _tags
+
+
+def _vorlage(data, is_standard):
+    """Legt die Vorlage an oder gleicht sie ab. Liefert "angelegt", "aktualisiert" oder None."""
+    vorlage = Vorlage.query.filter_by(name=data["name"]).first()
+    if vorlage is None:
+        vorlage = Vorlage(name=data["name"], is_standard=is_standard)
+        db.session.add(vorlage)
+        vorlage_service.apply_structure(vorlage, data.get("gruppen", []))
+        return "angelegt"
+    geaendert, _ = vorlage_service.apply_structure(vorlage, data.get("gruppen", []))
+    if geaendert:
+        vorlage.touch_schema()
+        return "aktualisiert"
+    return None
+
+
+def _vorlage_standard(data):
+    return _vorlage(data, True), f"Vorlage {data['name']}"
+
+
+def _vorlage_user(data):
+    return _vorlage(data, False), f"Vorlage {data['name']}"
+
+
+def _tags(data):
+    return ("aktualisiert" if tag_service.apply_tags(data) else None), "Tags"
+
+
+def seed_all(projekt_dir, force=False, log=print, nur=None):
+    """
+    Gleicht alle Seed-Dateien mit der Datenbank ab. Mit `force` werden auch
+    Dateien mit bekanntem Hash erneut angewendet; `nur` beschränkt den Abgleich
+    auf die angegebenen relativen Pfade (z.B. `neue_dateien`).
+    """
+    bekannt = {} if force else dict(db.session.query(SeedDatei.pfad, SeedDatei.hash))
+    stats = {"angelegt": 0, "aktualisiert": 0, "unveraendert": 0, "fehler": 0}
+
+    for rel_pfad, pfad, anwenden in seed_dateien(projekt_dir):
+        if nur is not None and rel_pfad not in nur:
+            continue
+        with open(pfad, "rb") as f:
+            inhalt = f.read()
+        digest = hashlib.sha256(inhalt).hexdigest()
+        if bekannt.get(rel_pfad) == digest:
+            stats["unveraendert"] += 1
+            continue
+        try:
+            ergebnis, was = anwenden(json.loads(inhalt.decode("utf-8")))
+            db.session.merge(SeedDatei(pfad=rel_pfad, hash=digest))
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            log(f"Fehler beim Einspielen von '{rel_pfad}': {e}")
+            stats["fehler"] += 1
+            continue
+        if ergebnis:
+            log(f"{was} aus JSON {ergebnis}")
+            stats[ergebnis] += 1
+        else:
+            stats["unveraendert"] += 1
+
+    if stats["angelegt"] or stats["aktualisiert"]:
+        schema_registry.invalidate()
+    return stats
+
+
+def neue_dateien(projekt_dir):
+    """Seed-Dateien, die noch nie eingespielt wurden (z.B. frische Datenbank)."""
+    bekannt = {pfad for (pfad,) in db.session.query(SeedDatei.pfad)}
+    return [rel for rel, _, _ in seed_dateien(projekt_dir) if rel not in bekannt]
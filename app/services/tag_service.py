@@ -0,0 +1,155 @@
+# app/services/tag_service.py
+"""
+Tags mit Kategorien und Farben sowie ihre Zuordnung zu Kontakten.
+
+Zuordnen und Entfernen laufen als eine Anweisung je Block von Kontakt-IDs
+(INSERT OR IGNORE ... SELECT bzw. DELETE ... IN). Gefiltert wird über den
+Index (tag_id, kontakt_id) von `kontakt_tag`, so dass "alle A-Kunden in der
+Branche IT" eine reine Index-Abfrage ist.
+"""
+from sqlalchemy import and_, delete, insert, select, true
+from sqlalchemy.orm import selectinload
+from ..models import db, Kontakt, Tag, TagKategorie, kontakt_tag
+
+BATCH_SIZE = 500
+
+
+class UnbekannteTags(ValueError):
+    """Mindestens ein Tag-Name existiert nicht."""
+
+    def __init__(self, namen):
+        super().__init__(f"Unbekannte Tags: {', '.join(namen)}")
+        self.namen = namen
+
+
+def _batches(ids):
+    ids = list(ids)
+    for start in range(0, len(ids), BATCH_SIZE):
+        yield ids[start:start + BATCH_SIZE]
+
+
+def tags_payload():
+    """Alle Kategorien mit ihren Tags: {"categories": [{name, tags: [{name, color}]}]}."""
+    kategorien = (
+        TagKategorie.query.options(selectinload(TagKategorie.tags))
+        .order_by(TagKategorie.position, TagKategorie.id)
+        .all()
+    )
+    return {
+        "categories": [
+            {"name": k.name, "tags": [{"name": t.name, "color": t.color} for t in k.tags]}
+            for k in kategorien
+        ]
+    }
+
+
+def tag_ids(namen):
+    """IDs zu Tag-Namen; wirft UnbekannteTags, wenn einer fehlt."""
+    namen = list(dict.fromkeys(namen))
+    ids = dict(db.session.execute(select(Tag.name, Tag.id).where(Tag.name.in_(namen))).all())
+    fehlend = [n for n in namen if n not in ids]
+    if fehlend:
+        raise UnbekannteTags(fehlend)
+    return [ids[n] for n in namen]
+
+
+def tag_kontakte(kontakt_ids, namen):
+    """Ordnet allen Kontakten die Tags zu (bestehende bleiben). Liefert neue Zuordnungen."""
+    ids = tag_ids(namen)
+    neu = 0
+    for batch in _batches(kontakt_ids):
+        quelle = (
+            select(Kontakt.id, Tag.id)
+            .join(Tag, true())
+            .where(Kontakt.id.in_(batch), Tag.id.in_(ids))
+        )
+        stmt = (
+            insert(kontakt_tag)
+            .prefix_with("OR IGNORE")
+            .from_select(["kontakt_id", "tag_id"], quelle)
+        )
+        neu += db.session.execute(stmt).rowcount
+    db.session.commit()
+    return neu
+
+
+def untag_kontakte(kontakt_ids, namen):
+    """Entfernt die Tags von allen Kontakten. Liefert die Zahl entfernter Zuordnungen."""
+    ids = tag_ids(namen)
+    entfernt = 0
+    for batch in _batches(kontakt_ids):
+        stmt = delete(kontakt_tag).where(
+            kontakt_tag.c.kontakt_id.in_(batch), kontakt_tag.c.tag_id.in_(ids)
+        )
+        entfernt += db.session.execute(stmt).rowcount
+    db.session.commit()
+    return entfernt
+
+
+def mit_allen_tags(namen):
+    """Bedingung "Kontakt trägt alle genannten Tags" (oder None ohne Tags)."""
+    namen = [n for n in dict.fromkeys(namen or []) if n]
+    if not namen:
+        return None
+    # Ein IN je Tag: jede Teilabfrage ist ein Bereich im Index (tag_id, kontakt_id)
+    bedingungen = [
+        Kontakt.id.in_(
+            select(kontakt_tag.c.kontakt_id).where(
+                kontakt_tag.c.tag_id == select(Tag.id).where(Tag.name == name).scalar_subquery()
+            )
+        )
+        for name in namen
+    ]
+    return and_(*bedingungen)
+
+
+def tags_fuer(kontakt_ids):
+    """Tag-Namen je Kontakt als {kontakt_id: [name, ...]}."""
+    ergebnis = {}
+    for batch in _batches(kontakt_ids):
+        rows = db.session.execute(
+            select(kontakt_tag.c.kontakt_id, Tag.name)
+            .join(Tag, Tag.id == kontakt_tag.c.tag_id)
+            .where(kontakt_tag.c.kontakt_id.in_(batch))
+            .order_by(Tag.kategorie_id, Tag.position, Tag.id)
+        )
+        for kontakt_id, name in rows:
+            ergebnis.setdefault(kontakt_id, []).append(name)
+    return ergebnis
+
+
+def apply_tags(data):
+    """
+    Übernimmt Kategorien und Tags aus einem Dict im Format von `tags.json`
+    (ohne Commit). Vorhandene Einträge werden per Name aktualisiert, nichts
+    wird gelöscht. Liefert True, wenn sich etwas geändert hat.
+    """
+    kategorien = {k.name: k for k in TagKategorie.query.all()}
+    tags = {t.name: t for t in Tag.query.all()}
+    geaendert = False
+    for position, kategorie_data in enumerate(data.get("categories", [])):
+        kategorie = kategorien.get(kategorie_data["name"])
+        if kategorie is None:
+            kategorie = TagKategorie(name=kategorie_data["name"])
+            db.session.add(kategorie)
+            kategorien[kategorie.name] = kategorie
+        if kategorie.position != position:
+            kategorie.position = position
+            geaendert = True
+        for t_position, tag_data in enumerate(kategorie_data.get("tags", [])):
+            tag = tags.get(tag_data["name"])
+            if tag is None:
+                tag = Tag(name=tag_data["name"])
+                db.session.add(tag)
+                tags[tag.name] = tag
+                geaendert = True
+            werte = {
+                "color": tag_data.get("color") or "#e9ecef",
+                "kategorie": kategorie,
+                "position": t_position,
+            }
+            for attr, wert in werte.items():
+                if getattr(tag, attr) != wert:
+                    setattr(tag, attr, wert)
+                    geaendert = True
+    return geaendert
@@ -0,0 +1,195 @@
+# app/services/vorlage_service.py
+"""
+Speichert die Struktur einer Vorlage als Differenz zum Bestand.
+
+Gruppen und Eigenschaften werden über ihre ID (aus dem Editor) oder, falls die
+fehlt, über den Namen wiedererkannt. Nur tatsächlich geänderte Einträge werden
+geschrieben, so dass IDs stabil bleiben. Wird eine Eigenschaft umbenannt, zieht
+der Schlüssel in `Kontakt.daten` aller Kontakte der Vorlage per UPDATE mit.
+"""
+import json
+import os
+from sqlalchemy import func, update
+from ..models import db, Kontakt, Gruppe, Eigenschaft
+from . import kontakt_index
+from .kontakt_service import json_path
+
+
+def _zuordnen(eintraege, vorhanden):
+    """
+    Ordnet neue Einträge (dicts) bestehenden Objekten zu: zuerst per ID, dann
+    per Name unter den noch freien. Liefert eine Liste von (daten, objekt|None).
+    """
+    nach_id = {obj.id: obj for obj in vorhanden}
+    vergeben = set()
+    paare = []
+    for daten in eintraege:
+        obj = nach_id.get(daten.get("id"))
+        if obj is not None and obj.id not in vergeben:
+            vergeben.add(obj.id)
+            paare.append([daten, obj])
+        else:
+            paare.append([daten, None])
+
+    # Gleichnamige Einträge (kommen in Vorlagen vor) werden der Reihe nach vergeben
+    frei_nach_name = {}
+    for obj in vorhanden:
+        if obj.id not in vergeben:
+            frei_nach_name.setdefault(obj.name, []).append(obj)
+    for paar in paare:
+        if paar[1] is None and frei_nach_name.get(paar[0]["name"]):
+            paar[1] = frei_nach_name[paar[0]["name"]].pop(0)
+    return paare
+
+
+def _setzen(obj, werte):
+    """Setzt nur abweichende Attribute; True, wenn sich etwas geändert hat."""
+    geaendert = False
+    for attr, wert in werte.items():
+        if getattr(obj, attr) != wert:
+            setattr(obj, attr, wert)
+            geaendert = True
+    return geaendert
+
+
+def apply_structure(vorlage, gruppen_data):
+    """
+    Gleicht Gruppen und Eigenschaften der Vorlage mit `gruppen_data` ab (ohne
+    Commit). Liefert (geaendert, umbenennungen) mit umbenennungen als Liste von
+    (alter_name, neuer_name).
+    """
+    geaendert = False
+    umbenennungen = []
+    alle_eigenschaften = [e for g in vorlage.gruppen for e in g.eigenschaften]
+    eigenschaft_paare = {}
+
+    gruppen_paare = _zuordnen(gruppen_data, list(vorlage.gruppen))
+    behaltene_gruppen = set()
+
+    # Eigenschaften werden über die ganze Vorlage zugeordnet, damit ein
+    # Verschieben in eine andere Gruppe kein Löschen + Neuanlegen ist
+    alle_eintraege = [
+        e for gruppe_data in gruppen_data for e in gruppe_data.get("eigenschaften", [])
+    ]
+    for daten, obj in _zuordnen(alle_eintraege, alle_eigenschaften):
+        eigenschaft_paare[id(daten)] = obj
+
+    behaltene_eigenschaften = set()
+    for position, (gruppe_data, gruppe) in enumerate(gruppen_paare):
+        if gruppe is None:
+            gruppe = Gruppe(name=gruppe_data["name"], position=position)
+            vorlage.gruppen.append(gruppe)
+            geaendert = True
+        else:
+            geaendert |= _setzen(gruppe, {"name": gruppe_data["name"], "position": position})
+            behaltene_gruppen.add(gruppe.id)
+
+        for e_position, eigenschaft_data in enumerate(gruppe_data.get("eigenschaften", [])):
+            werte = {
+                "name": eigenschaft_data["name"],
+                "datentyp": eigenschaft_data["datentyp"],
+                "optionen": eigenschaft_data.get("optionen") or "",
+                "position": e_position,
+            }
+            eigenschaft = eigenschaft_paare[id(eigenschaft_data)]
+            if eigenschaft is None:
+                gruppe.eigenschaften.append(Eigenschaft(**werte))
+                geaendert = True
+                continue
+            behaltene_eigenschaften.add(eigenschaft.id)
+            if eigenschaft.name != werte["name"]:
+                umbenennungen.append((eigenschaft.name, werte["name"]))
+            if eigenschaft.gruppe is not gruppe:
+                eigenschaft.gruppe = gruppe
+                geaendert = True
+            geaendert |= _setzen(eigenschaft, werte)
+
+    for eigenschaft in alle_eigenschaften:
+        if eigenschaft.id not in behaltene_eigenschaften:
+            eigenschaft.gruppe.eigenschaften.remove(eigenschaft)
+            geaendert = True
+    for gruppe in list(vorlage.gruppen):
+        if gruppe.id is not None and gruppe.id not in behaltene_gruppen:
+            vorlage.gruppen.remove(gruppe)
+            geaendert = True
+
+    return geaendert, umbenennungen
+
+
+def _umbenennungs_schritte(umbenennungen):
+    """
+    Zerlegt Umbenennungen in ausführbare Schritte. Überschneiden sich alte und
+    neue Namen (z.B. Tausch A <-> B), läuft es über Zwischenschlüssel.
+    """
+    umbenennungen = [(alt, neu) for alt, neu in umbenennungen if alt != neu]
+    alte = {alt for alt, _ in umbenennungen}
+    if not any(neu in alte for _, neu in umbenennungen):
+        return umbenennungen
+    temp = [(alt, f"__umbenennung_{i}__") for i, (alt, _) in enumerate(umbenennungen)]
+    return temp + [(t, neu) for (_, t), (_, neu) in zip(temp, umbenennungen)]
+
+
+def rename_felder(vorlage_id, umbenennungen):
+    """
+    Benennt Schlüssel in `Kontakt.daten` aller Kontakte der Vorlage um, eine
+    UPDATE-Anweisung je Umbenennung (ohne Commit). Ist der neue Schlüssel bei
+    einem Kontakt schon belegt, bleibt dieser Kontakt unverändert.
+    """
+    geaenderte_ids = set()
+    for alt, neu in _umbenennungs_schritte(umbenennungen):
+        alt_pfad, neu_pfad = json_path(alt), json_path(neu)
+        stmt = (
+            update(Kontakt)
+            .where(
+                Kontakt.vorlage_id == vorlage_id,
+                func.json_type(Kontakt.daten, alt_pfad).isnot(None),
+                func.json_type(Kontakt.daten, neu_pfad).is_(None),
+            )
+            .values(
+                daten=func.json_remove(
+                    func.json_set(
+                        Kontakt.daten, neu_pfad, func.json_extract(Kontakt.daten, alt_pfad)
+                    ),
+                    alt_pfad,
+                ),
+                version=Kontakt.version + 1,
+            )
+            .returning(Kontakt.id)
+            .execution_options(synchronize_session=False)
+        )
+        geaenderte_ids.update(db.session.execute(stmt).scalars())
+    if geaenderte_ids:
+        kontakt_index.sync(db.session.connection(), list(geaenderte_ids))
+    return len(geaenderte_ids)
+
+
+def struktur_daten(vorlage):
+    """Struktur der Vorlage ohne IDs, wie sie in den JSON-Dateien steht."""
+    return {
+        "name": vorlage.name,
+        "gruppen": [
+            {
+                "name": g.name,
+                "eigenschaften": [
+                    {"name": e.name, "datentyp": e.datentyp, "optionen": e.optionen or ""}
+                    for e in g.eigenschaften
+                ],
+            }
+            for g in vorlage.gruppen
+        ],
+    }
+
+
+def write_json_if_changed(filepath, data):
+    """Schreibt die JSON-Datei nur, wenn sich ihr Inhalt ändert. True = geschrieben."""
+    inhalt = json.dumps(data, ensure_ascii=False, indent=2)
+    try:
+        with open(filepath, "r", encoding="utf-8") as f:
+            if f.read() == inhalt:
+                return False
+    except FileNotFoundError:
+        pass
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    with open(filepath, "w", encoding="utf-8") as f:
+        f.write(inhalt)
+    return True
@@ -0,0 +1,2 @@
+# benchmarks/__init__.py
+"""Mess-Skripte für Datenbank- und Import/Export-Durchsatz (nicht Teil der App)."""
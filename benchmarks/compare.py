@@ -0,0 +1,66 @@
+# benchmarks/compare.py
+"""
+Vergleicht zwei JSON-Ergebnisse von `benchmarks.hotpaths` und markiert
+Messfälle, die langsamer geworden sind oder mehr Speicher brauchen.
+
+Aufruf:  python -m benchmarks.compare alt.json neu.json --threshold 0.15
+Der Rückgabewert ist 1, wenn mindestens eine Verschlechterung gefunden wurde.
+"""
+import argparse
+import json
+import sys
+
+
+def _laden(pfad):
+    with open(pfad, encoding="utf-8") as f:
+        daten = json.load(f)
+    return {(r["size"], r["vorlage"], r["case"]): r for r in daten["results"]}
+
+
+def _aenderung(alt, neu):
+    if not alt:
+        return None
+    return (neu - alt) / alt
+
+
+def vergleichen(alt, neu, threshold):
+    """Liefert Zeilen (Schlüssel, Zeit alt/neu, Änderung, Speicher alt/neu, Änderung, schlechter)."""
+    zeilen = []
+    for key in sorted(set(alt) & set(neu), key=lambda k: (k[0], k[1], k[2])):
+        a, n = alt[key], neu[key]
+        zeit = _aenderung(a["median"], n["median"])
+        speicher = _aenderung(a.get("peak_kib"), n.get("peak_kib")) if "peak_kib" in n else None
+        schlechter = any(x is not None and x > threshold for x in (zeit, speicher))
+        zeilen.append((key, a["median"], n["median"], zeit, a.get("peak_kib"), n.get("peak_kib"),
+                       speicher, schlechter))
+    return zeilen
+
+
+def _prozent(wert):
+    return f"{wert:+.0%}" if wert is not None else "-"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("alt")
+    parser.add_argument("neu")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="Ab dieser relativen Verschlechterung wird markiert (0.15 = 15 %%)")
+    args = parser.parse_args(argv)
+
+    alt, neu = _laden(args.alt), _laden(args.neu)
+    zeilen = vergleichen(alt, neu, args.threshold)
+    print(f"{'Größe':>8} {'Vorlage':<22}{'Messfall':<24}{'alt s':>10}{'neu s':>10}{'Δ':>7}{'Δ Speicher':>12}")
+    for (size, vorlage, case), t_alt, t_neu, dt, _, _, dm, schlechter in zeilen:
+        print(
+            f"{size:>8} {vorlage:<22}{case:<24}{t_alt:>10.4f}{t_neu:>10.4f}"
+            f"{_prozent(dt):>7}{_prozent(dm):>12}" + ("  <-- langsamer" if schlechter else "")
+        )
+    fehlend = sorted(set(alt) - set(neu))
+    if fehlend:
+        print(f"{len(fehlend)} Messfälle fehlen im neuen Lauf.")
+    return 1 if any(z[-1] for z in zeilen) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
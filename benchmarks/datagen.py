@@ -0,0 +1,252 @@
+# benchmarks/datagen.py
+"""
+Erzeugt realistische, deutsche Kontaktdaten für die Benchmarks – passend zu
+den Feldern der Vorlagen in `data/standard_vorlagen` – sowie Import-Dateien
+daraus (.csv, .xlsx, .vcf und Outlook-Notiztexte, wie sie der .msg-Import
+auswertet). Alles ist über `seed` reproduzierbar.
+
+Aufruf:  python -m benchmarks.datagen --size 10000 --out /tmp/kontakte
+"""
+import argparse
+import csv
+import json
+import os
+import random
+
+VORNAMEN_M = [
+    "Lukas", "Jonas", "Leon", "Finn", "Paul", "Felix", "Maximilian", "Elias", "Ben",
+    "Noah", "Thomas", "Michael", "Andreas", "Stefan", "Jürgen", "Klaus", "Uwe", "Jörg",
+    "Björn", "Sören", "Matthias", "Tobias", "Florian", "Sebastian", "Dieter",
+]
+VORNAMEN_W = [
+    "Emma", "Mia", "Hannah", "Sophia", "Lea", "Marie", "Lena", "Anna", "Laura", "Julia",
+    "Sabine", "Petra", "Monika", "Ursula", "Jülide", "Käthe", "Lisa", "Sarah", "Katrin",
+    "Birgit", "Susanne", "Claudia", "Renate", "Gisela", "Bärbel",
+]
+NACHNAMEN = [
+    "Müller", "Schmidt", "Schneider", "Fischer", "Weber", "Meyer", "Meier", "Maier",
+    "Wagner", "Becker", "Schulz", "Hoffmann", "Schäfer", "Koch", "Bauer", "Richter",
+    "Klein", "Wolf", "Schröder", "Neumann", "Schwarz", "Zimmermann", "Braun", "Krüger",
+    "Hofmann", "Hartmann", "Lange", "Schmitt", "Werner", "Schmitz", "Krause", "Köhler",
+    "Groß", "Weiß", "Jäger", "Böhm", "Günther", "Förster", "Löffler", "Ötzürk",
+]
+TITEL = ["", "", "", "", "", "", "Dr.", "Prof.", "Dipl.-Ing.", "M. Sc."]
+ORTE = [
+    ("10115", "Berlin"), ("20095", "Hamburg"), ("80331", "München"), ("50667", "Köln"),
+    ("60311", "Frankfurt am Main"), ("70173", "Stuttgart"), ("40213", "Düsseldorf"),
+    ("04109", "Leipzig"), ("44135", "Dortmund"), ("45127", "Essen"), ("28195", "Bremen"),
+    ("01067", "Dresden"), ("30159", "Hannover"), ("90402", "Nürnberg"), ("47051", "Duisburg"),
+    ("44787", "Bochum"), ("42103", "Wuppertal"), ("33602", "Bielefeld"), ("53111", "Bonn"),
+    ("48143", "Münster"), ("76133", "Karlsruhe"), ("68159", "Mannheim"), ("86150", "Augsburg"),
+    ("65183", "Wiesbaden"), ("79098", "Freiburg im Breisgau"), ("24103", "Kiel"),
+]
+STRASSEN = [
+    "Hauptstraße", "Schulstraße", "Gartenstraße", "Bahnhofstraße", "Dorfstraße",
+    "Bergstraße", "Birkenweg", "Lindenstraße", "Kirchstraße", "Waldstraße",
+    "Ringstraße", "Schillerstraße", "Goethestraße", "Am Mühlbach", "Friedhofsweg",
+    "Wiesenweg", "Jahnstraße", "Königsallee", "Luisenstraße", "Grüner Weg",
+]
+FIRMEN_STAMM = [
+    "Müller & Söhne", "Bäckerei Schäfer", "Nordlicht Software", "Rheinwerk", "Alpenblick",
+    "Elbtal Logistik", "Schwarzwald Holzbau", "Hansetec", "Spreeküche", "Mainfranken Druck",
+    "Isar Consulting", "Ruhrstahl", "Bodensee Medien", "Weserkraft", "Harzer Maschinenbau",
+]
+RECHTSFORMEN = ["GmbH", "GmbH & Co. KG", "AG", "KG", "e.K.", "UG (haftungsbeschränkt)"]
+POSITIONEN = [
+    "Geschäftsführer", "Prokurist", "Einkaufsleiterin", "Sachbearbeiter", "Vertriebsleiter",
+    "Buchhalterin", "Projektleiterin", "Teamleiter", "Assistenz der Geschäftsführung",
+    "Softwareentwicklerin", "Werkstattmeister", "Personalreferentin",
+]
+ABTEILUNGEN = [
+    "Einkauf", "Vertrieb", "Buchhaltung", "IT", "Personal", "Produktion", "Marketing",
+    "Geschäftsleitung", "Kundendienst", "Logistik",
+]
+STATUS = ["Offen 📂", "In Bearbeitung 🔧", "Erledigt ✅", "Abgelehnt ❌", "Doppelt 🔃"]
+NOTIZEN = [
+    "", "", "", "Bitte nur vormittags anrufen.", "Katalog 2025 zugeschickt.",
+    "Ansprechpartner wechselt zum Quartalsende.", "Rückruf wegen Angebot Nr. 4711.",
+    "Weihnachtskarte erwünscht.", "Zahlt grundsätzlich per Überweisung.",
+]
+UMLAUTE = str.maketrans({"ä": "ae", "ö": "oe", "ü": "ue", "ß": "ss", " ": "", "&": "", ".": ""})
+
+
+def _mail_teil(text):
+    return text.lower().translate(UMLAUTE)
+
+
+def person(rnd, nummer):
+    """Grunddaten einer Person, aus denen alle Felder abgeleitet werden."""
+    weiblich = rnd.random() < 0.5
+    vorname = rnd.choice(VORNAMEN_W if weiblich else VORNAMEN_M)
+    nachname = rnd.choice(NACHNAMEN)
+    plz, ort = rnd.choice(ORTE)
+    firma = f"{rnd.choice(FIRMEN_STAMM)} {rnd.choice(RECHTSFORMEN)}"
+    domain = _mail_teil(firma.split(" ")[0]) + rnd.choice([".de", ".com", ".eu"])
+    return {
+        "nummer": nummer,
+        "anrede": "Frau" if weiblich else "Herr",
+        "titel": rnd.choice(TITEL),
+        "vorname": vorname,
+        "nachname": nachname,
+        "firma": firma,
+        "domain": domain,
+        "position": rnd.choice(POSITIONEN),
+        "abteilung": rnd.choice(ABTEILUNGEN),
+        "strasse": rnd.choice(STRASSEN),
+        "hausnummer": str(rnd.randint(1, 180)) + rnd.choice(["", "", "", "a", "b"]),
+        "plz": plz,
+        "ort": ort,
+        "email": f"{_mail_teil(vorname)}.{_mail_teil(nachname)}@{domain}",
+        "telefon": f"+49 {rnd.randint(30, 9999)} {rnd.randint(100000, 9999999)}",
+        "mobil": f"+49 1{rnd.choice(['51', '52', '60', '62', '70', '76'])} {rnd.randint(1000000, 99999999)}",
+        "geburtsdatum": f"{rnd.randint(1, 28):02d}.{rnd.randint(1, 12):02d}.{rnd.randint(1955, 2003)}",
+        "eintritt": f"{rnd.randint(1, 28):02d}.{rnd.randint(1, 12):02d}.{rnd.randint(1995, 2025)}",
+        "status": rnd.choice(STATUS),
+        "notiz": rnd.choice(NOTIZEN),
+    }
+
+
+# Feldname der Vorlage -> Wert aus den Personendaten
+FELDER = {
+    "Anrede": lambda p: p["anrede"],
+    "Titel": lambda p: p["titel"],
+    "Vorname": lambda p: p["vorname"],
+    "Nachname": lambda p: p["nachname"],
+    "Firmenname": lambda p: p["firma"],
+    "Firma": lambda p: p["firma"],
+    "Position": lambda p: p["position"],
+    "Abteilung": lambda p: p["abteilung"],
+    "E-Mail": lambda p: p["email"],
+    "E-Mail (geschäftlich)": lambda p: p["email"],
+    "Telefon (geschäftlich)": lambda p: p["telefon"],
+    "Telefon (Durchwahl)": lambda p: p["telefon"],
+    "Mobilnummer": lambda p: p["mobil"],
+    "Mobilnummer (dienstlich)": lambda p: p["mobil"],
+    "Website": lambda p: f"https://www.{p['domain']}",
+    "Straße": lambda p: p["strasse"],
+    "Hausnummer": lambda p: p["hausnummer"],
+    "Postleitzahl": lambda p: p["plz"],
+    "Ort": lambda p: p["ort"],
+    "Land": lambda p: "Deutschland",
+    "Kundennummer": lambda p: f"K-{p['nummer']:07d}",
+    "Personalnummer": lambda p: f"P-{p['nummer']:06d}",
+    "Status": lambda p: p["status"],
+    "Notizen": lambda p: p["notiz"],
+    "Geburtsdatum": lambda p: p["geburtsdatum"],
+    "Eintrittsdatum": lambda p: p["eintritt"],
+}
+
+
+def vorlage_felder(vorlage_json):
+    """Feldnamen einer Vorlage (Dict im Format der JSON-Dateien) in Reihenfolge."""
+    return [e["name"] for g in vorlage_json["gruppen"] for e in g["eigenschaften"]]
+
+
+def kontakte(felder, anzahl, seed=0):
+    """Erzeugt `anzahl` Kontakt-Dicts mit den gegebenen Feldern (Generator)."""
+    rnd = random.Random(seed)
+    for nummer in range(1, anzahl + 1):
+        p = person(rnd, nummer)
+        daten = {}
+        for feld in felder:
+            erzeuger = FELDER.get(feld)
+            wert = erzeuger(p) if erzeuger else ""
+            if wert:
+                daten[feld] = wert
+        yield daten
+
+
+def write_csv(pfad, felder, zeilen):
+    """Semikolon-getrennt mit BOM, wie Excel es unter deutschem Windows schreibt."""
+    with open(pfad, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=felder, delimiter=";", extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(zeilen)
+
+
+def write_xlsx(pfad, felder, zeilen):
+    import openpyxl
+
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("Kontakte")
+    ws.append(felder)
+    for zeile in zeilen:
+        ws.append([zeile.get(feld, "") for feld in felder])
+    wb.save(pfad)
+
+
+def _vcf_text(wert):
+    return str(wert).replace("\\", "\\\\").replace(",", "\\,").replace(";", "\\;")
+
+
+def write_vcf(pfad, zeilen):
+    """Eine .vcf-Datei (vCard 3.0) mit allen Kontakten, wie ein Adressbuch-Export."""
+    with open(pfad, "w", encoding="utf-8", newline="\r\n") as f:
+        for z in zeilen:
+            nachname, vorname = _vcf_text(z.get("Nachname", "")), _vcf_text(z.get("Vorname", ""))
+            zeilen_vcf = [
+                "BEGIN:VCARD",
+                "VERSION:3.0",
+                f"N:{nachname};{vorname};;{_vcf_text(z.get('Anrede', ''))};",
+                f"FN:{vorname} {nachname}",
+            ]
+            if z.get("Firmenname"):
+                zeilen_vcf.append(f"ORG:{_vcf_text(z['Firmenname'])};{_vcf_text(z.get('Abteilung', ''))}")
+            if z.get("Position"):
+                zeilen_vcf.append(f"TITLE:{_vcf_text(z['Position'])}")
+            if z.get("E-Mail"):
+                zeilen_vcf.append(f"EMAIL;TYPE=INTERNET,WORK:{z['E-Mail']}")
+            if z.get("Telefon (geschäftlich)"):
+                zeilen_vcf.append(f"TEL;TYPE=WORK,VOICE:{z['Telefon (geschäftlich)']}")
+            if z.get("Mobilnummer"):
+                zeilen_vcf.append(f"TEL;TYPE=CELL:{z['Mobilnummer']}")
+            if z.get("Ort"):
+                strasse = f"{z.get('Straße', '')} {z.get('Hausnummer', '')}".strip()
+                zeilen_vcf.append(
+                    f"ADR;TYPE=WORK:;;{_vcf_text(strasse)};{_vcf_text(z['Ort'])};;"
+                    f"{z.get('Postleitzahl', '')};{_vcf_text(z.get('Land', ''))}"
+                )
+            zeilen_vcf.append("END:VCARD")
+            f.write("\n".join(zeilen_vcf) + "\n")
+
+
+def msg_text(z):
+    """Text einer Outlook-Notiz, wie ihn `msg_importer._parse_message_text` auswertet."""
+    strasse = f"{z.get('Straße', '')} {z.get('Hausnummer', '')}".strip()
+    return (
+        f"Full Name: {z.get('Anrede', '')} {z.get('Vorname', '')} {z.get('Nachname', '')}\n"
+        f"Last Name: {z.get('Nachname', '')}\n"
+        f"First Name: {z.get('Vorname', '')}\n"
+        f"Company: {z.get('Firmenname', '')}\n"
+        f"Job Title: {z.get('Position', '')}\n"
+        f"Business Address: {strasse}, {z.get('Postleitzahl', '')} {z.get('Ort', '')}\n"
+        f"Business: {z.get('Telefon (geschäftlich)', '')}\n"
+        f"Mobile: {z.get('Mobilnummer', '')}\n"
+        f"Email: {z.get('E-Mail', '')}\n"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--vorlage", default=os.path.join("data", "standard_vorlagen", "standard_vorlage_kunde.json")
+    )
+    parser.add_argument("--out", required=True, help="Zielverzeichnis")
+    args = parser.parse_args(argv)
+
+    with open(args.vorlage, encoding="utf-8") as f:
+        felder = vorlage_felder(json.load(f))
+    os.makedirs(args.out, exist_ok=True)
+    zeilen = list(kontakte(felder, args.size, args.seed))
+    write_csv(os.path.join(args.out, f"kontakte_{args.size}.csv"), felder, zeilen)
+    write_xlsx(os.path.join(args.out, f"kontakte_{args.size}.xlsx"), felder, zeilen)
+    write_vcf(os.path.join(args.out, f"kontakte_{args.size}.vcf"), zeilen)
+    with open(os.path.join(args.out, f"notizen_{args.size}.txt"), "w", encoding="utf-8") as f:
+        f.write("\n".join(msg_text(z) for z in zeilen))
+    print(f"{args.size} Kontakte nach {args.out} geschrieben.")
+
+
+if __name__ == "__main__":
+    main()
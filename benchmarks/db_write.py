@@ -0,0 +1,132 @@
+# benchmarks/db_write.py
+"""
+Misst den Schreibdurchsatz der Datenbank mit mehreren gleichzeitigen
+Schreibern, je einmal pro SQLite-Profil ("default" und "tuned").
+
+Jeder Thread legt abwechselnd einen Kontakt an und ändert ein Feld eines
+zufälligen Kontakts, jeweils in einer eigenen Transaktion – wie mehrere
+Kolleginnen und Kollegen, die gleichzeitig in der Liste arbeiten.
+
+Aufruf:  python -m benchmarks.db_write --threads 8 --ops 200
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy.exc import OperationalError  # noqa: E402
+
+
+def run_profile(profile, threads, ops, seed_rows):
+    """Führt die Schreiblast mit dem angegebenen Profil auf einer frischen Datenbank aus."""
+    from app import create_app
+    from app.models import db, Vorlage
+    from app.services import bulk_writer, kontakt_service
+
+    temp_dir = tempfile.mkdtemp(prefix=f"bench_{profile}_")
+    os.environ["SQLITE_PROFILE"] = profile
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(temp_dir, 'bench.db')}"
+    try:
+        app = create_app()
+        with app.app_context():
+            db.create_all()
+            vorlage = Vorlage(name="Benchmark")
+            db.session.add(vorlage)
+            db.session.commit()
+            vorlage_id = vorlage.id
+            ids = bulk_writer.insert_chunk(
+                vorlage_id,
+                [{"Vorname": f"Vorname {i}", "Nachname": f"Nachname {i}"} for i in range(seed_rows)],
+            )
+            db.session.commit()
+
+        lock_errors = 0
+        completed = 0
+        counter_lock = threading.Lock()
+        barrier = threading.Barrier(threads + 1)
+
+        def worker(worker_id):
+            nonlocal lock_errors, completed
+            rnd = random.Random(worker_id)
+            with app.app_context():
+                barrier.wait()
+                for i in range(ops):
+                    try:
+                        if i % 2 == 0:
+                            bulk_writer.insert_chunk(
+                                vorlage_id, [{"Vorname": f"W{worker_id}", "Nachname": f"N{i}"}]
+                            )
+                            db.session.commit()
+                        else:
+                            kontakt_service.update_fields(
+                                [{"id": rnd.choice(ids), "field": "Ort", "value": f"Ort {i}"}]
+                            )
+                        with counter_lock:
+                            completed += 1
+                    except OperationalError:
+                        db.session.rollback()
+                        with counter_lock:
+                            lock_errors += 1
+                db.session.remove()
+
+        workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+        for t in workers:
+            t.start()
+        barrier.wait()
+        start = time.perf_counter()
+        for t in workers:
+            t.join()
+        elapsed = time.perf_counter() - start
+
+        with app.app_context():
+            journal_mode = db.session.execute(db.text("PRAGMA journal_mode")).scalar()
+            db.session.remove()
+            db.engine.dispose()
+
+        return {
+            "profile": profile,
+            "journal_mode": journal_mode,
+            "threads": threads,
+            "operations": threads * ops,
+            "completed": completed,
+            "lock_errors": lock_errors,
+            "seconds": round(elapsed, 3),
+            "ops_per_second": round(completed / elapsed, 1) if elapsed else None,
+        }
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--ops", type=int, default=200, help="Transaktionen pro Thread")
+    parser.add_argument("--seed-rows", type=int, default=1000)
+    parser.add_argument("--profiles", nargs="+", default=["default", "tuned"])
+    parser.add_argument("--json", dest="json_path", help="Ergebnisse zusätzlich als JSON speichern")
+    args = parser.parse_args(argv)
+
+    results = [
+        run_profile(profile, args.threads, args.ops, args.seed_rows)
+        for profile in args.profiles
+    ]
+    print(f"{'Profil':<10}{'Journal':<10}{'Ops/s':>10}{'Sekunden':>10}{'Gesperrt':>10}")
+    for r in results:
+        print(
+            f"{r['profile']:<10}{r['journal_mode']:<10}{r['ops_per_second']:>10}"
+            f"{r['seconds']:>10}{r['lock_errors']:>10}"
+        )
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
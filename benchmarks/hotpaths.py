@@ -0,0 +1,315 @@
+# benchmarks/hotpaths.py
+"""
+Misst Laufzeit und Speicherspitze der heißen Pfade der Anwendung auf
+synthetischen Daten: Kontaktliste, Einzelfeld-Änderung, Import (Upload +
+Abschluss) und jedes Exportformat, für jede Standard-Vorlage und Datenmenge.
+
+Jede Größe läuft auf einer frischen Datenbank in einem temporären Ordner.
+Die Ergebnisse lassen sich als JSON speichern und mit `benchmarks.compare`
+gegen einen früheren Lauf vergleichen.
+
+Aufruf:  python -m benchmarks.hotpaths --sizes 1000 10000 --json ergebnis.json
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+PROJEKT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJEKT)
+
+from benchmarks import datagen  # noqa: E402
+
+STANDARD_VORLAGEN = os.path.join(PROJEKT, "data", "standard_vorlagen")
+MSG_BEISPIELE = os.path.join(PROJEKT, "msgDatein")
+IMPORT_FORMATE = ("csv", "xlsx", "vcf")
+JOB_TIMEOUT = 3600
+
+
+def messen(funktion, repeat, memory):
+    """Führt `funktion` `repeat`-mal aus und einmal zusätzlich unter tracemalloc."""
+    zeiten = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        funktion()
+        zeiten.append(time.perf_counter() - start)
+    ergebnis = {
+        "seconds": [round(z, 5) for z in zeiten],
+        "median": round(statistics.median(zeiten), 5),
+        "min": round(min(zeiten), 5),
+    }
+    if memory:
+        tracemalloc.start()
+        try:
+            funktion()
+            ergebnis["peak_kib"] = tracemalloc.get_traced_memory()[1] // 1024
+        finally:
+            tracemalloc.stop()
+    return ergebnis
+
+
+def _pruefen(response, erwartet=200):
+    if response.status_code != erwartet:
+        raise RuntimeError(f"HTTP {response.status_code}: {response.get_data(as_text=True)[:200]}")
+    return response
+
+
+def _warten(client, status_url):
+    ende = time.monotonic() + JOB_TIMEOUT
+    while time.monotonic() < ende:
+        status = client.get(status_url).get_json()
+        if status["status"] == "done":
+            return status
+        if status["status"] == "failed":
+            raise RuntimeError(f"Job fehlgeschlagen: {status['errors']}")
+        time.sleep(0.01)
+    raise TimeoutError(status_url)
+
+
+class Lauf:
+    """Eine Datenmenge auf einer frischen Datenbank."""
+
+    def __init__(self, size, args, temp_dir):
+        from app import create_app
+        from app.models import db
+        from app.services import seed_service
+
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(temp_dir, 'bench.db')}"
+        os.environ["SQLITE_PROFILE"] = args.profile
+        self.app = create_app()
+        self.app.config["UPLOAD_FOLDER"] = os.path.join(temp_dir, "uploads")
+        self.app.config["EXPORT_CACHE_DIR"] = os.path.join(temp_dir, "export_cache")
+        self.app.config["EXPORT_PREBUILD"] = ""
+        self.client = self.app.test_client()
+        self.size = size
+        self.args = args
+        self.temp_dir = temp_dir
+        with self.app.app_context():
+            db.create_all()
+            seed_service.seed_all(PROJEKT, log=lambda _: None)
+
+    def vorlage(self, name):
+        from app.models import Vorlage
+
+        with self.app.app_context():
+            return Vorlage.query.filter_by(name=name).one().id
+
+    def befuellen(self, vorlage_id, felder):
+        from app.services import bulk_writer
+
+        start = time.perf_counter()
+        with self.app.app_context():
+            bulk_writer.insert_kontakte(
+                vorlage_id, datagen.kontakte(felder, self.size, self.args.seed)
+            )
+        return round(time.perf_counter() - start, 3)
+
+    def beliebige_ids(self, vorlage_id, anzahl):
+        from app.models import db, Kontakt
+
+        with self.app.app_context():
+            return [
+                i for (i,) in db.session.query(Kontakt.id)
+                .filter(Kontakt.vorlage_id == vorlage_id)
+                .order_by(Kontakt.id)
+                .limit(anzahl)
+            ]
+
+    def faelle(self, vorlage_id, felder):
+        """Liefert (Name, Funktion) aller Messfälle für eine Vorlage."""
+        c = self.client
+        api = f"/api/kontakte?vorlage_id={vorlage_id}"
+        faelle = [
+            ("list.page", lambda: _pruefen(c.get("/kontakte/"))),
+            ("list.api_first_page", lambda: _pruefen(c.get(api))),
+            ("list.api_sorted", lambda: _pruefen(c.get(f"{api}&sort=Nachname&order=desc"))),
+            ("list.api_filtered", lambda: _pruefen(c.get(
+                f"{api}&filters=" + json.dumps({"Nachname": "Müller"})
+            ))),
+            ("list.api_search", lambda: _pruefen(c.get(f"{api}&q=Müller"))),
+            ("list.api_ten_pages", lambda: self._blaettern(api, 10)),
+        ]
+
+        ids = self.beliebige_ids(vorlage_id, 50)
+        feld = "Notizen" if "Notizen" in felder else felder[-1]
+        zaehler = iter(range(10 ** 9))
+        faelle += [
+            ("update.single_field", lambda: _pruefen(c.post(
+                f"/api/kontakt/{ids[0]}/update", json={"field": feld, "value": f"Wert {next(zaehler)}"}
+            ))),
+            ("update.patch_50", lambda: _pruefen(c.patch("/api/kontakte/felder", json={
+                "operations": [
+                    {"id": i, "field": feld, "value": f"Wert {next(zaehler)}"} for i in ids
+                ]
+            }))),
+        ]
+
+        faelle.append(("export.csv", lambda: self._export(vorlage_id, "csv")))
+        faelle.append(("export.xlsx", lambda: self._export(vorlage_id, "xlsx")))
+        faelle.append(("export.xlsx_cached", lambda: self._export(vorlage_id, "xlsx", cache=True)))
+        if self.size <= self.args.pdf_max:
+            from app.services.exporters import pdf_exporter
+
+            for layout in pdf_exporter.LAYOUTS:
+                faelle.append((
+                    f"export.pdf_{layout}",
+                    lambda layout=layout: self._export(vorlage_id, "pdf", layout=layout),
+                ))
+
+        # Import zuletzt, da er die Datenmenge vergrößert
+        import_zeilen = min(self.size, self.args.import_max)
+        zeilen = list(datagen.kontakte(felder, import_zeilen, self.args.seed + 1))
+        for fmt in IMPORT_FORMATE:
+            pfad = os.path.join(self.temp_dir, f"import_{vorlage_id}.{fmt}")
+            if fmt == "csv":
+                datagen.write_csv(pfad, felder, zeilen)
+            elif fmt == "xlsx":
+                datagen.write_xlsx(pfad, felder, zeilen)
+            else:
+                datagen.write_vcf(pfad, zeilen)
+            faelle.append((f"import.{fmt}", lambda pfad=pfad: self._import(vorlage_id, pfad)))
+        msg_dateien = sorted(
+            os.path.join(MSG_BEISPIELE, name) for name in os.listdir(MSG_BEISPIELE)
+            if name.lower().endswith(".msg")
+        )
+        faelle.append(("import.msg_files", lambda: [self._hochladen([p]) for p in msg_dateien]))
+        # Mehrere Dateien in einem Upload laufen über den Prozess-Pool
+        mehrere = [
+            os.path.join(self.temp_dir, f"import_{vorlage_id}.{fmt}") for fmt in IMPORT_FORMATE
+        ] + msg_dateien
+        faelle.append(("import.multi_file", lambda: self._import(vorlage_id, *mehrere)))
+        return faelle
+
+    def _blaettern(self, api, seiten):
+        cursor = None
+        for _ in range(seiten):
+            url = api + (f"&cursor={cursor}" if cursor else "")
+            cursor = _pruefen(self.client.get(url)).get_json()["next_cursor"]
+            if not cursor:
+                break
+
+    def _export(self, vorlage_id, fmt, cache=False, **params):
+        # Ohne Cache wird jeder Export neu erzeugt; mit Cache zählt ab dem zweiten Lauf der Treffer
+        self.app.config["EXPORT_CACHE_MAX_MB"] = 500 if cache else 0
+        query = "&".join(f"{k}={v}" for k, v in params.items())
+        response = _pruefen(self.client.get(f"/export/{vorlage_id}/{fmt}?{query}"))
+        # Gestreamte Antworten vollständig lesen
+        groesse = sum(len(teil) for teil in response.response)
+        response.close()
+        return groesse
+
+    def _hochladen(self, pfade):
+        dateien = []
+        for pfad in pfade:
+            with open(pfad, "rb") as f:
+                dateien.append((io.BytesIO(f.read()), os.path.basename(pfad)))
+        upload = _pruefen(self.client.post(
+            "/import/upload", data={"files": dateien}, content_type="multipart/form-data",
+        )).get_json()
+        if upload["errors"]:
+            raise RuntimeError(f"Upload fehlgeschlagen: {upload['errors']}")
+        return upload
+
+    def _import(self, vorlage_id, *pfade):
+        upload = self._hochladen(pfade)
+        mappings = {h: h for h in upload["headers"]}
+        antwort = _pruefen(self.client.post("/import/finalize", json={
+            "vorlage_id": vorlage_id,
+            "session_id": upload["session_id"],
+            "mappings": mappings,
+        })).get_json()
+        return _warten(self.client, antwort["status_url"])
+
+
+def run_size(size, args):
+    temp_dir = tempfile.mkdtemp(prefix=f"bench_hotpaths_{size}_")
+    ergebnisse = []
+    try:
+        lauf = Lauf(size, args, temp_dir)
+        for dateiname in sorted(os.listdir(STANDARD_VORLAGEN)):
+            with open(os.path.join(STANDARD_VORLAGEN, dateiname), encoding="utf-8") as f:
+                vorlage_json = json.load(f)
+            felder = datagen.vorlage_felder(vorlage_json)
+            vorlage_id = lauf.vorlage(vorlage_json["name"])
+            befuellt = lauf.befuellen(vorlage_id, felder)
+            print(f"[{size}] {vorlage_json['name']}: {size} Kontakte in {befuellt}s angelegt")
+            for name, funktion in lauf.faelle(vorlage_id, felder):
+                if args.only and not any(name.startswith(p) for p in args.only):
+                    continue
+                repeat = 1 if name.startswith("import.") else args.repeat
+                messung = messen(funktion, repeat, not args.no_memory)
+                ergebnisse.append({
+                    "size": size,
+                    "vorlage": vorlage_json["name"],
+                    "case": name,
+                    **messung,
+                })
+                print(
+                    f"[{size}] {vorlage_json['name']:<22}{name:<24}{messung['median']:>10.4f}s"
+                    + (f"{messung['peak_kib']:>10} KiB" if "peak_kib" in messung else "")
+                )
+        with lauf.app.app_context():
+            from app.models import db
+
+            db.engine.dispose()
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    return ergebnisse
+
+
+def meta(args):
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJEKT,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "args": vars(args),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000],
+                        help="Datenmengen, z.B. 1000 10000 100000 500000")
+    parser.add_argument("--repeat", type=int, default=3, help="Wiederholungen je Messfall")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--profile", default="tuned", help="SQLITE_PROFILE")
+    parser.add_argument("--import-max", type=int, default=10000,
+                        help="Höchstens so viele Zeilen je Import-Datei")
+    parser.add_argument("--pdf-max", type=int, default=10000,
+                        help="PDF-Export nur bis zu dieser Datenmenge messen")
+    parser.add_argument("--only", nargs="+", help="Nur Messfälle mit diesen Präfixen (z.B. list. export.)")
+    parser.add_argument("--no-memory", action="store_true", help="Ohne tracemalloc-Lauf")
+    parser.add_argument("--json", dest="json_path", help="Ergebnisse als JSON speichern")
+    args = parser.parse_args(argv)
+
+    ergebnisse = []
+    for size in args.sizes:
+        ergebnisse.extend(run_size(size, args))
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"meta": meta(args), "results": ergebnisse}, f, ensure_ascii=False, indent=2)
+        print(f"Ergebnisse in {args.json_path} gespeichert.")
+
+
+if __name__ == "__main__":
+    main()
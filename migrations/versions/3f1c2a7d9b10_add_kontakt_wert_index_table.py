@@ -0,0 +1,58 @@
+"""Add kontakt_wert index table
+
+Revision ID: 3f1c2a7d9b10
+Revises: 90ced2d3e5b4
+Create Date: 2026-10-18 09:12:41.204518
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "3f1c2a7d9b10"
+down_revision = "90ced2d3e5b4"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "kontakt_wert",
+        sa.Column("kontakt_id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(length=100), nullable=False),
+        sa.Column("wert", sa.String(length=255), nullable=False),
+        sa.ForeignKeyConstraint(["kontakt_id"], ["kontakt.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("kontakt_id", "name"),
+    )
+    op.create_index(
+        "ix_kontakt_wert_name_wert",
+        "kontakt_wert",
+        ["name", "wert", "kontakt_id"],
+        unique=False,
+    )
+    with op.batch_alter_table("kontakt", schema=None) as batch_op:
+        batch_op.create_index(
+            batch_op.f("ix_kontakt_vorlage_id"), ["vorlage_id"], unique=False
+        )
+
+    # Bestehende Kontakte in die Index-Tabelle übernehmen
+    op.execute(
+        """
+        INSERT INTO kontakt_wert (kontakt_id, name, wert)
+        SELECT k.id, j.key, CAST(j.value AS TEXT)
+        FROM kontakt AS k, json_each(k.daten) AS j
+        WHERE j.type NOT IN ('null', 'object', 'array')
+          AND CAST(j.value AS TEXT) != ''
+          AND length(CAST(j.value AS TEXT)) <= 255
+        """
+    )
+
+
+def downgrade():
+    with op.batch_alter_table("kontakt", schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f("ix_kontakt_vorlage_id"))
+
+    op.drop_index("ix_kontakt_wert_name_wert", table_name="kontakt_wert")
+    op.drop_table("kontakt_wert")
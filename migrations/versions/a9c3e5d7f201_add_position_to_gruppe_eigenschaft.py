@@ -0,0 +1,35 @@
+"""Add position to Gruppe and Eigenschaft
+
+Revision ID: a9c3e5d7f201
+Revises: f4d1c8b2a6e9
+Create Date: 2026-10-18 16:21:40.913204
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "a9c3e5d7f201"
+down_revision = "f4d1c8b2a6e9"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ("gruppe", "eigenschaft"):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(
+                sa.Column("position", sa.Integer(), nullable=False, server_default="0")
+            )
+
+    # Bisher ergab sich die Reihenfolge aus der Einfüge-Reihenfolge (ID)
+    op.execute("UPDATE gruppe SET position = id")
+    op.execute("UPDATE eigenschaft SET position = id")
+
+
+def downgrade():
+    for table in ("eigenschaft", "gruppe"):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column("position")
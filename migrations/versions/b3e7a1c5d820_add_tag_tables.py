@@ -0,0 +1,60 @@
+"""Add tag tables
+
+Revision ID: b3e7a1c5d820
+Revises: d6b2f8a4c913
+Create Date: 2026-10-18 17:48:26.207815
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "b3e7a1c5d820"
+down_revision = "d6b2f8a4c913"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "tag_kategorie",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(length=100), nullable=False),
+        sa.Column("position", sa.Integer(), nullable=False, server_default="0"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("name"),
+    )
+    op.create_table(
+        "tag",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(length=100), nullable=False),
+        sa.Column("color", sa.String(length=20), nullable=False),
+        sa.Column("kategorie_id", sa.Integer(), nullable=False),
+        sa.Column("position", sa.Integer(), nullable=False, server_default="0"),
+        sa.ForeignKeyConstraint(["kategorie_id"], ["tag_kategorie.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("name"),
+    )
+    op.create_table(
+        "kontakt_tag",
+        sa.Column("kontakt_id", sa.Integer(), nullable=False),
+        sa.Column("tag_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["kontakt_id"], ["kontakt.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["tag_id"], ["tag.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("kontakt_id", "tag_id"),
+    )
+    op.create_index(
+        "ix_kontakt_tag_tag_id_kontakt_id",
+        "kontakt_tag",
+        ["tag_id", "kontakt_id"],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index("ix_kontakt_tag_tag_id_kontakt_id", table_name="kontakt_tag")
+    op.drop_table("kontakt_tag")
+    op.drop_table("tag")
+    op.drop_table("tag_kategorie")
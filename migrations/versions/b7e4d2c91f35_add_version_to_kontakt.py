@@ -0,0 +1,29 @@
+"""Add version to Kontakt
+
+Revision ID: b7e4d2c91f35
+Revises: 3f1c2a7d9b10
+Create Date: 2026-10-18 10:03:17.558120
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "b7e4d2c91f35"
+down_revision = "3f1c2a7d9b10"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("kontakt", schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column("version", sa.Integer(), nullable=False, server_default="1")
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("kontakt", schema=None) as batch_op:
+        batch_op.drop_column("version")
@@ -0,0 +1,52 @@
+"""Add kontakt_fts full-text search index
+
+Revision ID: c5a8e1f04d27
+Revises: b7e4d2c91f35
+Create Date: 2026-10-18 13:41:09.318274
+
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "c5a8e1f04d27"
+down_revision = "b7e4d2c91f35"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS kontakt_fts USING fts5("
+        "inhalt, vorlage_id UNINDEXED, tokenize = 'unicode61 remove_diacritics 2')"
+    )
+
+    # Bestehende Kontakte indexieren (Umlaute ausgeschrieben plus Original)
+    gefaltet = "roh"
+    for umlaut, ersatz in [
+        ("ä", "ae"), ("ö", "oe"), ("ü", "ue"),
+        ("Ä", "Ae"), ("Ö", "Oe"), ("Ü", "Ue"),
+        ("ß", "ss"), ("ẞ", "SS"),
+    ]:
+        gefaltet = f"replace({gefaltet}, '{umlaut}', '{ersatz}')"
+    op.execute(
+        f"""
+        INSERT INTO kontakt_fts (rowid, inhalt, vorlage_id)
+        SELECT id, CASE WHEN gefaltet = roh THEN roh ELSE gefaltet || ' ' || roh END, vorlage_id
+        FROM (
+            SELECT id, vorlage_id, roh, {gefaltet} AS gefaltet
+            FROM (
+                SELECT k.id AS id, k.vorlage_id AS vorlage_id,
+                       group_concat(CAST(j.value AS TEXT), ' ') AS roh
+                FROM kontakt AS k, json_each(k.daten) AS j
+                WHERE j.type NOT IN ('null', 'object', 'array')
+                GROUP BY k.id
+            )
+        )
+        """
+    )
+
+
+def downgrade():
+    op.execute("DROP TABLE IF EXISTS kontakt_fts")
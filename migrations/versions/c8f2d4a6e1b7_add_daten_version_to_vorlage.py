@@ -0,0 +1,29 @@
+"""Add daten_version to Vorlage
+
+Revision ID: c8f2d4a6e1b7
+Revises: b3e7a1c5d820
+Create Date: 2026-10-18 18:42:07.318562
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "c8f2d4a6e1b7"
+down_revision = "b3e7a1c5d820"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("vorlage", schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column("daten_version", sa.Integer(), nullable=False, server_default="0")
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("vorlage", schema=None) as batch_op:
+        batch_op.drop_column("daten_version")
@@ -0,0 +1,30 @@
+"""Add seed_datei table
+
+Revision ID: d6b2f8a4c913
+Revises: a9c3e5d7f201
+Create Date: 2026-10-18 17:02:11.384527
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "d6b2f8a4c913"
+down_revision = "a9c3e5d7f201"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "seed_datei",
+        sa.Column("pfad", sa.String(length=255), nullable=False),
+        sa.Column("hash", sa.String(length=64), nullable=False),
+        sa.PrimaryKeyConstraint("pfad"),
+    )
+
+
+def downgrade():
+    op.drop_table("seed_datei")
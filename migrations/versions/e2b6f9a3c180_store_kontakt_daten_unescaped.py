@@ -0,0 +1,53 @@
+"""Store Kontakt.daten without unicode escapes
+
+Revision ID: e2b6f9a3c180
+Revises: c5a8e1f04d27
+Create Date: 2026-10-18 14:22:51.904117
+
+"""
+
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "e2b6f9a3c180"
+down_revision = "c5a8e1f04d27"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+
+def upgrade():
+    # SQLite vergleicht JSON-Schlüssel ohne \u-Escapes aufzulösen: $."Straße"
+    # findet "Straße" nicht. Bestehende Daten werden deshalb unescaped
+    # neu geschrieben; doppelte Schlüssel fallen dabei weg (letzter gewinnt).
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.text(
+                "SELECT id, daten FROM kontakt WHERE id > :last_id ORDER BY id LIMIT :limit"
+            ),
+            {"last_id": last_id, "limit": BATCH_SIZE},
+        ).fetchall()
+        if not rows:
+            break
+        updates = []
+        for kontakt_id, daten in rows:
+            if not daten:
+                continue
+            neu = json.dumps(json.loads(daten), ensure_ascii=False)
+            if neu != daten:
+                updates.append({"id": kontakt_id, "daten": neu})
+        if updates:
+            bind.execute(sa.text("UPDATE kontakt SET daten = :daten WHERE id = :id"), updates)
+        last_id = rows[-1][0]
+
+
+def downgrade():
+    # Unescaped JSON ist weiterhin gültig, es gibt nichts zurückzunehmen
+    pass
@@ -0,0 +1,80 @@
+"""Add display_name and sort_name to Kontakt
+
+Revision ID: e5a1b9c3d742
+Revises: c8f2d4a6e1b7
+Create Date: 2026-10-18 19:36:52.604118
+
+"""
+
+import unicodedata
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "e5a1b9c3d742"
+down_revision = "c8f2d4a6e1b7"
+branch_labels = None
+depends_on = None
+
+UMLAUT_FOLDING = [
+    ("ä", "ae"), ("ö", "oe"), ("ü", "ue"),
+    ("Ä", "Ae"), ("Ö", "Oe"), ("Ü", "Ue"),
+    ("ß", "ss"), ("ẞ", "SS"),
+]
+
+
+def _anzeige_name(name, vorname, nachname, firma):
+    # Stand der Regeln in app/services/kontakt_index.py zum Zeitpunkt der Migration
+    name, vorname, nachname, firma = (
+        " ".join(str(w).split()) if w is not None else "" for w in (name, vorname, nachname, firma)
+    )
+    if name:
+        return name, name
+    if vorname or nachname:
+        return f"{vorname} {nachname}".strip(), f"{nachname} {vorname}".strip()
+    return firma, firma
+
+
+def _sortier_schluessel(wert):
+    wert = unicodedata.normalize("NFC", wert)
+    for umlaut, ersatz in UMLAUT_FOLDING:
+        wert = wert.replace(umlaut, ersatz)
+    wert = "".join(c for c in unicodedata.normalize("NFKD", wert) if not unicodedata.combining(c))
+    return " ".join(wert.casefold().split())[:255]
+
+
+def upgrade():
+    with op.batch_alter_table("kontakt", schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column("display_name", sa.String(length=255), nullable=False, server_default="")
+        )
+        batch_op.add_column(
+            sa.Column("sort_name", sa.String(length=255), nullable=False, server_default="")
+        )
+        batch_op.create_index(
+            "ix_kontakt_vorlage_id_sort_name", ["vorlage_id", "sort_name", "id"], unique=False
+        )
+
+    # Bestehende Kontakte befüllen
+    connection = op.get_bind()
+    rows = connection.execute(sa.text(
+        "SELECT id, json_extract(daten, '$.Name'), json_extract(daten, '$.Vorname'), "
+        "json_extract(daten, '$.Nachname'), json_extract(daten, '$.Firmenname') FROM kontakt"
+    )).all()
+    werte = []
+    for kontakt_id, *felder in rows:
+        anzeige, basis = _anzeige_name(*felder)
+        werte.append({"id": kontakt_id, "anzeige": anzeige[:255], "sortierung": _sortier_schluessel(basis)})
+    if werte:
+        connection.execute(
+            sa.text("UPDATE kontakt SET display_name = :anzeige, sort_name = :sortierung WHERE id = :id"),
+            werte,
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("kontakt", schema=None) as batch_op:
+        batch_op.drop_index("ix_kontakt_vorlage_id_sort_name")
+        batch_op.drop_column("sort_name")
+        batch_op.drop_column("display_name")
@@ -0,0 +1,37 @@
+"""Add schema_version to Vorlage
+
+Revision ID: f4d1c8b2a6e9
+Revises: e2b6f9a3c180
+Create Date: 2026-10-18 15:08:33.472610
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "f4d1c8b2a6e9"
+down_revision = "e2b6f9a3c180"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("vorlage", schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column("schema_version", sa.String(length=32), nullable=True)
+        )
+
+    # Jede vorhandene Vorlage bekommt einen eigenen Stempel
+    op.execute("UPDATE vorlage SET schema_version = lower(hex(randomblob(16)))")
+
+    with op.batch_alter_table("vorlage", schema=None) as batch_op:
+        batch_op.alter_column(
+            "schema_version", existing_type=sa.String(length=32), nullable=False
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("vorlage", schema=None) as batch_op:
+        batch_op.drop_column("schema_version")
@@ -28,6 +28,20 @@ document.addEventListener("DOMContentLoaded", () => {
       const sortDirection = ref("asc");
       const selectedKontakte = ref(new Set());
 
+      // --- Seitenweise geladene Kontakte der aktiven Vorlage ---
+      const kontakte = ref([]);
+      const totalKontakte = ref(0);
+      const nextCursor = ref(null);
+      const isLoadingKontakte = ref(false);
+      const columnFilters = ref({});
+      // Suchtext (Volltextsuche auf dem Server), verzögert übernommen
+      const searchText = ref("");
+      const activeSearch = ref("");
+      let searchTimer = null;
+      const loadMoreSentinel = ref(null);
+      let loadRequestId = 0;
+      let sentinelObserver = null;
+
       const isAddModalOpen = ref(false);
       const newContactData = ref({});
       const addModalVorlageId = ref(activeVorlageId.value);
@@ -44,6 +58,15 @@ document.addEventListener("DOMContentLoaded", () => {
       const importMappings = ref({});
       const importDefaultValues = ref({});
       const importError = ref("");
+      const importProgress = ref(null);
+      const importDuplicateMode = ref("insert");
+      const importKeyFields = ref([]);
+      const importFiles = ref([]);
+      const importSheet = ref("");
+      const importSheetOptions = ref([]);
+      const importDuplicateCheck = ref(null);
+      const isCheckingDuplicates = ref(false);
+      const duplicateJobProgress = ref(null);
 
       // --- Computed Properties ---
       const activeVorlage = computed(() => {
@@ -51,51 +74,16 @@ document.addEventListener("DOMContentLoaded", () => {
         return vorlagen.value.find((v) => v.id === activeVorlageId.value);
       });
 
-      const sortedKontakte = computed(() => {
-        if (!activeVorlage.value) {
-          return [];
-        }
-        if (!sortColumn.value) {
-          return activeVorlage.value.kontakte;
-        }
+      // Sortierung und Filter übernimmt der Server, die Liste ist bereits geordnet.
+      const sortedKontakte = computed(() => kontakte.value);
 
-        const kontakteCopy = [...activeVorlage.value.kontakte];
-
-        kontakteCopy.sort((a, b) => {
-          const valA = a.daten[sortColumn.value] || "";
-          const valB = b.daten[sortColumn.value] || "";
-          let comparison = 0;
-          const dateA = new Date(
-            valA.replace(/(\d{2})\.(\d{2})\.(\d{4})/, "$3-$2-$1")
-          );
-          const dateB = new Date(
-            valB.replace(/(\d{2})\.(\d{2})\.(\d{4})/, "$3-$2-$1")
-          );
-
-          if (!isNaN(dateA) && !isNaN(dateB) && valA && valB) {
-            comparison = dateA - dateB;
-          } else {
-            const numA = parseFloat(valA);
-            const numB = parseFloat(valB);
-            if (!isNaN(numA) && !isNaN(numB)) {
-              comparison = numA - numB;
-            } else {
-              comparison = valA.toString().localeCompare(valB.toString());
-            }
-          }
-          return sortDirection.value === "asc" ? comparison : -comparison;
-        });
-
-        return kontakteCopy;
-      });
+      const hasMoreKontakte = computed(() => nextCursor.value !== null);
 
       const isAllSelected = computed(() => {
-        if (!activeVorlage.value || activeVorlage.value.kontakte.length === 0) {
+        if (kontakte.value.length === 0) {
           return false;
         }
-        return (
-          selectedKontakte.value.size === activeVorlage.value.kontakte.length
-        );
+        return selectedKontakte.value.size === kontakte.value.length;
       });
 
       const addModalVorlage = computed(() =>
@@ -112,11 +100,90 @@ document.addEventListener("DOMContentLoaded", () => {
         return vorlagen.value.find((v) => v.id === importTargetVorlageId.value);
       });
 
+      // --- Kontakte nachladen ---
+      const loadKontakte = async (reset = false) => {
+        if (!activeVorlageId.value) {
+          kontakte.value = [];
+          nextCursor.value = null;
+          return;
+        }
+        if (!reset && (isLoadingKontakte.value || nextCursor.value === null)) {
+          return;
+        }
+
+        const requestId = ++loadRequestId;
+        const params = new URLSearchParams({
+          vorlage_id: activeVorlageId.value,
+          limit: 100,
+        });
+        if (!reset) params.set("cursor", nextCursor.value);
+        if (sortColumn.value) {
+          params.set("sort", sortColumn.value);
+          params.set("order", sortDirection.value);
+        }
+        const activeFilters = Object.fromEntries(
+          Object.entries(columnFilters.value).filter(([, v]) => v)
+        );
+        if (Object.keys(activeFilters).length > 0) {
+          params.set("filters", JSON.stringify(activeFilters));
+        }
+        if (activeSearch.value) params.set("q", activeSearch.value);
+        filteredEigenschaften.value.forEach((e) => params.append("field", e.name));
+
+        isLoadingKontakte.value = true;
+        try {
+          const response = await fetch(`/api/kontakte?${params}`);
+          const result = await response.json();
+          if (!response.ok) throw new Error(result.error || "Netzwerkfehler");
+          // Veraltete Antworten (z.B. nach Sortierwechsel) verwerfen
+          if (requestId !== loadRequestId) return;
+          if (reset) {
+            kontakte.value = result.kontakte;
+            totalKontakte.value = result.total;
+          } else {
+            kontakte.value.push(...result.kontakte);
+          }
+          nextCursor.value = result.next_cursor;
+        } catch (error) {
+          console.error("Fehler beim Laden der Kontakte:", error);
+        } finally {
+          if (requestId === loadRequestId) {
+            isLoadingKontakte.value = false;
+          }
+        }
+      };
+
+      const reloadKontakte = () => {
+        nextCursor.value = null;
+        return loadKontakte(true);
+      };
+
       // --- Watchers ---
       watch(activeVorlageId, () => {
         selectedKontakte.value.clear();
+        columnFilters.value = {};
+      });
+
+      watch(searchText, (text) => {
+        if (searchTimer) clearTimeout(searchTimer);
+        searchTimer = setTimeout(() => {
+          activeSearch.value = text.trim();
+        }, 250);
       });
 
+      watch(
+        [
+          activeVorlageId,
+          sortColumn,
+          sortDirection,
+          columnFilters,
+          activeSearch,
+          () => filteredEigenschaften.value.map((e) => e.name).join("\u0000"),
+        ],
+        () => reloadKontakte(),
+        { deep: true }
+      );
+
       watch(
         activeVorlage,
         (newVorlage) => {
@@ -209,6 +276,15 @@ document.addEventListener("DOMContentLoaded", () => {
         return list ? list.values.split(",").map((v) => v.trim()) : [];
       };
 
+      const getAuswahlOptionen = (eigenschaft) => {
+        const list = getSelectionList(eigenschaft.optionen);
+        if (list.length > 0) return list;
+        return (eigenschaft.optionen || "")
+          .split(",")
+          .map((v) => v.trim())
+          .filter((v) => v);
+      };
+
       const filteredVerknuepfungsOptionen = (eigenschaftId) => {
         const options = verknuepfungsOptionen.value[eigenschaftId] || [];
         const searchTerm = (
@@ -245,9 +321,7 @@ document.addEventListener("DOMContentLoaded", () => {
         if (isAllSelected.value) {
           selectedKontakte.value.clear();
         } else {
-          activeVorlage.value.kontakte.forEach((k) =>
-            selectedKontakte.value.add(k.id)
-          );
+          kontakte.value.forEach((k) => selectedKontakte.value.add(k.id));
         }
       };
 
@@ -271,10 +345,10 @@ document.addEventListener("DOMContentLoaded", () => {
             });
             const result = await response.json();
             if (result.success) {
-              activeVorlage.value.kontakte =
-                activeVorlage.value.kontakte.filter(
-                  (k) => !selectedKontakte.value.has(k.id)
-                );
+              kontakte.value = kontakte.value.filter(
+                (k) => !selectedKontakte.value.has(k.id)
+              );
+              totalKontakte.value -= idsToDelete.length;
               selectedKontakte.value.clear();
             } else {
               throw new Error(result.error);
@@ -360,30 +434,71 @@ document.addEventListener("DOMContentLoaded", () => {
       };
       const closeAddModal = () => (isAddModalOpen.value = false);
 
-      const updateField = async (kontakt, fieldName, newValue) => {
-        if (kontakt.daten[fieldName] === newValue) return;
+      // Feld-Änderungen werden gesammelt und gebündelt als ein PATCH gesendet
+      const pendingUpdates = new Map();
+      let flushTimer = null;
+      let isFlushing = false;
+
+      const flushUpdates = async () => {
+        flushTimer = null;
+        if (isFlushing || pendingUpdates.size === 0) return;
+        isFlushing = true;
+        const batch = Array.from(pendingUpdates.values());
+        pendingUpdates.clear();
+        const operations = batch.map(({ kontakt, fieldName, newValue }) => ({
+          id: kontakt.id,
+          field: fieldName,
+          value: newValue,
+          version: kontakt.version,
+        }));
         try {
-          const response = await fetch(`/api/kontakt/${kontakt.id}/update`, {
-            method: "POST",
+          const response = await fetch("/api/kontakte/felder", {
+            method: "PATCH",
             headers: { "Content-Type": "application/json" },
-            body: JSON.stringify({ field: fieldName, value: newValue }),
+            body: JSON.stringify({ operations }),
           });
-          if (!response.ok) throw new Error("Update fehlgeschlagen");
           const result = await response.json();
-          if (result.success) {
-            const originalKontakt = activeVorlage.value.kontakte.find(
-              (k) => k.id === kontakt.id
+          if (response.status === 409) {
+            alert(
+              "Einige Kontakte wurden zwischenzeitlich geändert. Die Liste wird neu geladen."
             );
-            if (originalKontakt) {
-              originalKontakt.daten[fieldName] = newValue;
+            reloadKontakte();
+          } else if (!response.ok || !result.success) {
+            throw new Error(result.error || "Update fehlgeschlagen");
+          } else {
+            for (const { kontakt } of batch) {
+              const version = result.versions[kontakt.id];
+              if (version !== undefined) kontakt.version = version;
             }
           }
         } catch (error) {
           console.error("Fehler:", error);
           alert("Speichern fehlgeschlagen.");
+          reloadKontakte();
+        } finally {
+          isFlushing = false;
+          if (pendingUpdates.size > 0) scheduleFlush();
         }
       };
 
+      const scheduleFlush = () => {
+        if (flushTimer) clearTimeout(flushTimer);
+        flushTimer = setTimeout(flushUpdates, 300);
+      };
+
+      const updateField = (kontakt, fieldName, newValue) => {
+        if (kontakt.daten[fieldName] === newValue) return;
+        const originalKontakt =
+          kontakte.value.find((k) => k.id === kontakt.id) || kontakt;
+        originalKontakt.daten[fieldName] = newValue;
+        pendingUpdates.set(`${originalKontakt.id}:${fieldName}`, {
+          kontakt: originalKontakt,
+          fieldName,
+          newValue,
+        });
+        scheduleFlush();
+      };
+
       const saveNewContact = async () => {
         if (!addModalVorlageId.value) {
           alert("Bitte eine Vorlage auswählen.");
@@ -400,11 +515,9 @@ document.addEventListener("DOMContentLoaded", () => {
           });
           const result = await response.json();
           if (result.success) {
-            const targetVorlage = vorlagen.value.find(
-              (v) => v.id === addModalVorlageId.value
-            );
-            if (targetVorlage) {
-              targetVorlage.kontakte.push(result.kontakt);
+            if (addModalVorlageId.value === activeVorlageId.value) {
+              kontakte.value.push(result.kontakt);
+              totalKontakte.value += 1;
             }
             closeAddModal();
           } else {
@@ -422,6 +535,12 @@ document.addEventListener("DOMContentLoaded", () => {
         importMappings.value = {};
         importDefaultValues.value = {};
         importError.value = "";
+        importDuplicateMode.value = "insert";
+        importDuplicateCheck.value = null;
+        importKeyFields.value = [];
+        importFiles.value = [];
+        importSheet.value = "";
+        importSheetOptions.value = [];
         importTargetVorlageId.value = activeVorlageId.value;
         isImportModalOpen.value = true;
       };
@@ -435,11 +554,19 @@ document.addEventListener("DOMContentLoaded", () => {
             "Bitte zuerst eine Vorlage auswählen und dann eine oder mehrere Dateien hochladen.";
           return;
         }
+        importFiles.value = Array.from(files);
+        importSheet.value = "";
+        await uploadImportFiles();
+      };
+
+      // Lädt die gewählten Dateien (erneut) hoch, z.B. nach Wahl eines Tabellenblatts
+      const uploadImportFiles = async () => {
         importError.value = "";
         const formData = new FormData();
-        for (const file of files) {
+        for (const file of importFiles.value) {
           formData.append("files", file);
         }
+        if (importSheet.value) formData.append("sheet", importSheet.value);
 
         try {
           const response = await fetch("/import/upload", {
@@ -451,6 +578,14 @@ document.addEventListener("DOMContentLoaded", () => {
             throw new Error(result.error || "Unbekannter Fehler");
           }
           importData.value = result;
+          // Tabellenblätter der ersten Excel-Datei mit mehreren Blättern
+          importSheetOptions.value =
+            Object.values(result.sheets || {}).find((names) => names.length > 1) || [];
+          if (result.errors && result.errors.length > 0) {
+            importError.value =
+              "Einige Dateien konnten nicht gelesen werden: " +
+              result.errors.map((e) => `${e.file} (${e.error})`).join(", ");
+          }
 
           importMappings.value = {};
           importDefaultValues.value = {};
@@ -484,17 +619,112 @@ document.addEventListener("DOMContentLoaded", () => {
               vorlage_id: importTargetVorlageId.value,
               mappings: importMappings.value,
               default_values: importDefaultValues.value,
-              original_data: importData.value.original_data,
+              session_id: importData.value.session_id,
+              duplicate_mode: importDuplicateMode.value,
+              key_fields: importKeyFields.value,
             }),
           });
           const result = await response.json();
-          if (result.success) {
-            window.location.href = result.redirect_url;
-          } else {
+          if (!result.success) {
             throw new Error(result.error);
           }
+          await pollImportStatus(result.status_url);
+          window.location.href = result.redirect_url;
         } catch (error) {
           importError.value = `Import fehlgeschlagen: ${error.message}`;
+        } finally {
+          importProgress.value = null;
+        }
+      };
+
+      // Fragt den Status eines Hintergrund-Jobs ab, bis er beendet ist.
+      const waitForJob = async (statusUrl, onProgress) => {
+        while (true) {
+          const response = await fetch(statusUrl);
+          const job = await response.json();
+          if (!response.ok) throw new Error(job.error || "Netzwerkfehler");
+          onProgress(job);
+          if (job.status === "done") return job;
+          if (job.status === "failed") {
+            throw new Error(job.errors.join(", ") || "Unbekannter Fehler");
+          }
+          await new Promise((resolve) => setTimeout(resolve, 500));
+        }
+      };
+
+      const pollImportStatus = async (statusUrl) => {
+        importProgress.value = { processed: 0, total: null };
+        const job = await waitForJob(statusUrl, (j) => (importProgress.value = j));
+        const result = job.result || {};
+        const details = [];
+        if (result.updated) details.push(`${result.updated} aktualisiert`);
+        if (result.merged) details.push(`${result.merged} in der Datei zusammengeführt`);
+        if (result.unchanged) details.push(`${result.unchanged} unverändert`);
+        if (result.skipped) details.push(`${result.skipped} übersprungen`);
+        if (result.failed > 0) {
+          alert(
+            `${result.inserted} Kontakte importiert, ${result.failed} fehlgeschlagen:\n` +
+              result.errors.join("\n")
+          );
+        } else if (details.length > 0) {
+          alert(`${result.inserted} Kontakte importiert, ${details.join(", ")}.`);
+        }
+        return job;
+      };
+
+      // Prüft die zugeordneten Import-Zeilen auf Dubletten und schlägt einen Modus vor
+      const checkImportDuplicates = async () => {
+        isCheckingDuplicates.value = true;
+        importError.value = "";
+        try {
+          const response = await fetch("/import/duplicates", {
+            method: "POST",
+            headers: { "Content-Type": "application/json" },
+            body: JSON.stringify({
+              vorlage_id: importTargetVorlageId.value,
+              mappings: importMappings.value,
+              default_values: importDefaultValues.value,
+              session_id: importData.value.session_id,
+            }),
+          });
+          const result = await response.json();
+          if (!result.success) throw new Error(result.error);
+          importDuplicateCheck.value = result;
+          importDuplicateMode.value = result.vorschlag;
+        } catch (error) {
+          importError.value = `Dubletten-Prüfung fehlgeschlagen: ${error.message}`;
+        } finally {
+          isCheckingDuplicates.value = false;
+        }
+      };
+
+      // Sucht Dubletten in der aktiven Vorlage und markiert sie als "Doppelt"
+      const findDuplicates = async () => {
+        if (!activeVorlageId.value || duplicateJobProgress.value) return;
+        duplicateJobProgress.value = { processed: 0, total: null };
+        try {
+          const response = await fetch("/api/kontakte/duplikate", {
+            method: "POST",
+            headers: { "Content-Type": "application/json" },
+            body: JSON.stringify({ vorlage_id: activeVorlageId.value }),
+          });
+          const start = await response.json();
+          if (!start.success) throw new Error(start.error);
+          const job = await waitForJob(
+            start.status_url,
+            (j) => (duplicateJobProgress.value = j)
+          );
+          const result = job.result;
+          alert(
+            result.gruppen === 0
+              ? "Keine Dubletten gefunden."
+              : `${result.gruppen} Dubletten-Gruppen gefunden, ${result.markiert} Kontakte als "Doppelt" markiert.`
+          );
+          reloadKontakte();
+        } catch (error) {
+          alert(`Dubletten-Suche fehlgeschlagen: ${error.message}`);
+        } finally {
+          duplicateJobProgress.value = null;
         }
       };
 
@@ -504,6 +734,24 @@ document.addEventListener("DOMContentLoaded", () => {
       };
 
       onMounted(async () => {
+        // Weitere Seiten laden, sobald das Tabellenende sichtbar wird
+        sentinelObserver = new IntersectionObserver(
+          (entries) => {
+            if (entries.some((entry) => entry.isIntersecting)) {
+              loadKontakte();
+            }
+          },
+          { rootMargin: "400px" }
+        );
+        watch(
+          loadMoreSentinel,
+          (el, oldEl) => {
+            if (oldEl) sentinelObserver.unobserve(oldEl);
+            if (el) sentinelObserver.observe(el);
+          },
+          { immediate: true }
+        );
+
         try {
           const response = await fetch("/api/selection-options");
           if (!response.ok) throw new Error("Netzwerkfehler");
@@ -535,9 +783,26 @@ document.addEventListener("DOMContentLoaded", () => {
         importMappings,
         importDefaultValues,
         importError,
+        importProgress,
+        importDuplicateMode,
+        importKeyFields,
+        importSheet,
+        importSheetOptions,
+        uploadImportFiles,
+        importDuplicateCheck,
+        isCheckingDuplicates,
+        checkImportDuplicates,
+        duplicateJobProgress,
+        findDuplicates,
         sortColumn,
         sortDirection,
         sortedKontakte,
+        totalKontakte,
+        hasMoreKontakte,
+        isLoadingKontakte,
+        columnFilters,
+        searchText,
+        loadMoreSentinel,
         selectedKontakte,
         isAllSelected,
         sortBy,
@@ -558,6 +823,7 @@ document.addEventListener("DOMContentLoaded", () => {
         finalizeImport,
         getExportUrl,
         getSelectionList,
+        getAuswahlOptionen,
         filteredVerknuepfungsOptionen,
       };
     },